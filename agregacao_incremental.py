@@ -0,0 +1,158 @@
+"""
+AGREGAÇÃO INCREMENTAL: despesas_agregadas sem recalcular todo o histórico
+Autora: Mileide Silva de Arruda
+
+O Teste 2 calcula soma, média e desvio padrão por (RazaoSocial, UF) sobre
+todas as despesas. Como chega um trimestre novo por vez, quase toda essa
+conta se repete a cada execução.
+
+Aqui guardamos, para cada grupo, um "estado" que pode ser somado:
+    n     → quantidade de registros
+    soma  → soma dos valores
+    m2    → soma dos quadrados dos desvios em relação à média (Welford)
+
+Dois estados se juntam com a fórmula de Chan:
+    m2 = m2_a + m2_b + (media_b - media_a)² * n_a * n_b / n
+
+Arquivos em dados/estado_agregado/:
+    trimestre_<ano>_<t>.csv → estado de cada trimestre
+    totais.csv              → estado somado de todos os trimestres
+
+Atualizar (ou remover) um trimestre lê só as despesas dele e refaz os
+totais juntando os estados dos trimestres (uma linha por grupo em cada),
+nunca o histórico inteiro. Os totais não são corrigidos por subtração:
+a fórmula de Chan ao contrário perde precisão a cada trimestre retirado.
+"""
+
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+PASTA_ESTADO = "dados/estado_agregado"
+CHAVES = ["RazaoSocial", "UF"]
+COLUNAS_ESTADO = CHAVES + ["n", "soma", "m2"]
+
+
+def calcular_estado(df):
+    """
+    Estado (n, soma, m2) de cada grupo de um DataFrame de despesas
+    """
+    grupos = df.groupby(CHAVES, observed=True)["ValorDespesas"]
+
+    # m2 = Σ (x - média do grupo)²
+    desvio2 = (df["ValorDespesas"] - grupos.transform("mean")) ** 2
+
+    estado = pd.DataFrame({
+        "n": grupos.count(),
+        "soma": grupos.sum(),
+        "m2": desvio2.groupby([df[c] for c in CHAVES], observed=True).sum(),
+    }).reset_index()
+    return estado[COLUNAS_ESTADO]
+
+
+def _alinhar(a, b):
+    juntos = a.merge(b, on=CHAVES, how="outer", suffixes=("_a", "_b"))
+    for coluna in ("n", "soma", "m2"):
+        juntos[f"{coluna}_a"] = juntos[f"{coluna}_a"].fillna(0)
+        juntos[f"{coluna}_b"] = juntos[f"{coluna}_b"].fillna(0)
+    # O merge deixa n como float quando falta o grupo de um dos lados
+    for coluna in ("n_a", "n_b"):
+        juntos[coluna] = juntos[coluna].astype("int64")
+    return juntos
+
+
+def _media(soma, n):
+    return np.divide(soma, n, out=np.zeros(len(n)), where=n > 0)
+
+
+def combinar(a, b):
+    """
+    Junta dois estados (fórmula de Chan)
+    """
+    j = _alinhar(a, b)
+    na, nb = j["n_a"].to_numpy(), j["n_b"].to_numpy()
+    n = na + nb
+    delta = _media(j["soma_b"].to_numpy(), nb) - _media(j["soma_a"].to_numpy(), na)
+    ajuste = np.divide(delta ** 2 * na * nb, n, out=np.zeros(len(n)), where=n > 0)
+
+    j["n"] = n
+    j["soma"] = j["soma_a"] + j["soma_b"]
+    j["m2"] = j["m2_a"] + j["m2_b"] + ajuste
+    return j[COLUNAS_ESTADO]
+
+
+def _arquivo_trimestre(ano, trimestre, pasta):
+    return os.path.join(pasta, f"trimestre_{int(ano)}_{int(trimestre)}.csv")
+
+
+TIPOS_ESTADO = {"n": "int64", "soma": "float64", "m2": "float64"}
+
+
+def _estado_vazio():
+    return pd.DataFrame(columns=COLUNAS_ESTADO).astype(TIPOS_ESTADO)
+
+
+def _ler_estado(caminho):
+    if not os.path.exists(caminho):
+        return _estado_vazio()
+    # dtype explícito: um trimestre sem nenhum grupo vira um CSV só com o cabeçalho
+    return pd.read_csv(caminho, keep_default_na=False, na_values=[""], dtype=TIPOS_ESTADO)
+
+
+def _salvar_estado(estado, caminho):
+    estado.to_csv(caminho, index=False, encoding="utf-8")
+
+
+def refazer_totais(pasta=PASTA_ESTADO):
+    """
+    Junta os estados de todos os trimestres e grava os totais
+    """
+    totais = _estado_vazio()
+    for caminho in sorted(glob.glob(os.path.join(pasta, "trimestre_*.csv"))):
+        totais = combinar(totais, _ler_estado(caminho))
+    _salvar_estado(totais, os.path.join(pasta, "totais.csv"))
+    return totais
+
+
+def atualizar_trimestre(df_trimestre, ano, trimestre, pasta=PASTA_ESTADO):
+    """
+    Coloca (ou substitui, se a ANS republicou) um trimestre no estado
+    Retorna os totais atualizados
+    """
+    os.makedirs(pasta, exist_ok=True)
+    _salvar_estado(calcular_estado(df_trimestre), _arquivo_trimestre(ano, trimestre, pasta))
+    return refazer_totais(pasta)
+
+
+def remover_trimestre(ano, trimestre, pasta=PASTA_ESTADO):
+    """
+    Tira um trimestre do estado. Retorna os totais atualizados
+    """
+    caminho_trimestre = _arquivo_trimestre(ano, trimestre, pasta)
+    if os.path.exists(caminho_trimestre):
+        os.remove(caminho_trimestre)
+        return refazer_totais(pasta)
+    return _ler_estado(os.path.join(pasta, "totais.csv"))
+
+
+def gerar_agregado(totais=None, pasta=PASTA_ESTADO):
+    """
+    Converte os totais no formato do despesas_agregadas.csv
+    (mesmas colunas e ordem do cálculo completo do Teste 2)
+    """
+    if totais is None:
+        totais = _ler_estado(os.path.join(pasta, "totais.csv"))
+
+    n = totais["n"].to_numpy(dtype=float)
+    agregado = pd.DataFrame({
+        "RazaoSocial": totais["RazaoSocial"],
+        "UF": totais["UF"],
+        "TotalDespesas": totais["soma"],
+        "MediaTrimestral": totais["soma"] / n,
+        # Desvio padrão amostral (igual ao pandas .std(), ddof=1)
+        "DesvioPadrao": np.sqrt(np.divide(totais["m2"], n - 1,
+                                          out=np.full(len(n), np.nan), where=n > 1)),
+    })
+    return agregado.sort_values("TotalDespesas", ascending=False).reset_index(drop=True)
@@ -0,0 +1,169 @@
+"""
+ANÁLISES POR TRIMESTRE: as 3 queries do Teste 3 a partir de resumos
+Autora: Mileide Silva de Arruda
+
+As queries analíticas do teste3_banco.sql (crescimento, top estados e
+operadoras acima da média) varrem todas as despesas a cada execução.
+Aqui elas leem resumos com uma linha por trimestre e uma por
+(operadora, trimestre), os mesmos do PASSO 5 do SQL:
+
+    resumo_trimestre            → total e quantidade de despesas do trimestre
+    resumo_operadora_trimestre  → total, quantidade e quantas despesas
+                                  ficaram acima da média do trimestre
+
+No modo banco os resumos são tabelas (teste3_carga.py recalcula só os
+trimestres carregados). No modo memória da API eles são montados junto
+com o snapshot por resumir().
+"""
+
+import numpy as np
+import pandas as pd
+
+import tipos_compactos
+
+COLUNAS_OPERADORA = ["cnpj", "ano", "trimestre", "total_despesas", "qtd_despesas", "vezes_acima"]
+
+
+def ler_trimestre(texto):
+    """
+    "2024-3" → (2024, 3)
+    """
+    try:
+        ano, trimestre = (int(x) for x in texto.split("-"))
+    except ValueError:
+        raise ValueError(f"Trimestre inválido: {texto!r} (use ANO-T, ex.: 2024-3)")
+    if not 1 <= trimestre <= 4:
+        raise ValueError(f"Trimestre inválido: {texto!r} (T vai de 1 a 4)")
+    return ano, trimestre
+
+
+def resumir(df_despesas):
+    """
+    Resumos a partir das despesas (CNPJ, Ano, Trimestre, ValorDespesas)
+    Retorna (resumo_trimestre, resumo_operadora_trimestre)
+    """
+    chave_trimestre = [df_despesas["Ano"], df_despesas["Trimestre"]]
+    # Em centavos (tipos_compactos.py) as somas são exatas; divide só no fim
+    centavos = "ValorDespesas" + tipos_compactos.SUFIXO_CENTAVOS
+    if centavos in df_despesas.columns:
+        valor, escala = df_despesas[centavos], 100
+    else:
+        valor, escala = df_despesas["ValorDespesas"], 1
+    media_trimestre = valor.groupby(chave_trimestre).transform("mean")
+
+    por_trimestre = valor.groupby(chave_trimestre).agg(["sum", "count"])
+    resumo_trimestre = pd.DataFrame({
+        "ano": por_trimestre.index.get_level_values(0),
+        "trimestre": por_trimestre.index.get_level_values(1),
+        "total_despesas": por_trimestre["sum"].to_numpy() / escala,
+        "qtd_despesas": por_trimestre["count"].to_numpy(),
+    })
+
+    base = pd.DataFrame({
+        "cnpj": tipos_compactos.cnpjs_texto(df_despesas["CNPJ"]),
+        "ano": df_despesas["Ano"],
+        "trimestre": df_despesas["Trimestre"],
+        "valor": valor,
+        "acima": (valor > media_trimestre).fillna(False).astype(np.int64),
+    })
+    resumo_operadora = base.groupby(["cnpj", "ano", "trimestre"], sort=False).agg(
+        total_despesas=("valor", "sum"),
+        qtd_despesas=("valor", "count"),
+        vezes_acima=("acima", "sum"),
+    ).reset_index()
+    resumo_operadora["total_despesas"] = resumo_operadora["total_despesas"] / escala
+    return resumo_trimestre, resumo_operadora[COLUNAS_OPERADORA]
+
+
+def operadoras_com_uf(df_operadoras, df_agregado):
+    """
+    Uma linha por CNPJ com razão social e UF
+    (o consolidado não tem UF: vem do agregado, pela razão social)
+    """
+    operadoras = pd.DataFrame({
+        "cnpj": tipos_compactos.cnpjs_texto(df_operadoras["CNPJ"]),
+        "razao_social": df_operadoras["RazaoSocial"].astype(object),
+    }).drop_duplicates("cnpj")
+    if "UF" in df_operadoras.columns:
+        uf = df_operadoras.drop_duplicates("CNPJ")["UF"].to_numpy()
+    elif "UF" in df_agregado.columns:
+        uf_por_nome = df_agregado.drop_duplicates("RazaoSocial").set_index("RazaoSocial")["UF"]
+        uf = operadoras["razao_social"].map(uf_por_nome).to_numpy()
+    else:
+        uf = None
+    operadoras["uf"] = uf
+    return operadoras.reset_index(drop=True)
+
+
+def trimestres_disponiveis(resumo_trimestre):
+    return sorted(zip(resumo_trimestre["ano"].astype(int), resumo_trimestre["trimestre"].astype(int)))
+
+
+def _registros(df):
+    # NaN (ex.: operadora sem UF) vira null no JSON
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _media(resumo):
+    return resumo["total_despesas"] / resumo["qtd_despesas"]
+
+
+def crescimento(resumo_operadora, operadoras, inicio, fim, limite=5):
+    """
+    QUERY 1: maior crescimento da despesa média entre dois trimestres
+    Mesmo critério do SQL: sem dado (ou média zero) no início → 0%;
+    sem dado no fim → -100%
+    """
+    def media_no(trimestre):
+        r = resumo_operadora[(resumo_operadora["ano"] == trimestre[0]) &
+                             (resumo_operadora["trimestre"] == trimestre[1])]
+        return pd.Series(_media(r).to_numpy(), index=r["cnpj"].to_numpy())
+
+    inicial = operadoras["cnpj"].map(media_no(inicio))
+    final = operadoras["cnpj"].map(media_no(fim)).fillna(0)
+    taxa = ((final - inicial) / inicial * 100).where(inicial.notna() & (inicial != 0), 0)
+
+    resultado = pd.DataFrame({
+        "cnpj": operadoras["cnpj"],
+        "razao_social": operadoras["razao_social"],
+        "uf": operadoras["uf"],
+        "valor_inicial": inicial.fillna(0).round(2),
+        "valor_final": final.round(2),
+        "crescimento_percentual": taxa.round(2),
+    })
+    resultado = resultado.sort_values(["crescimento_percentual", "razao_social"], ascending=[False, True])
+    return _registros(resultado.head(limite))
+
+
+def top_ufs(resumo_operadora, operadoras, trimestre=None, limite=5):
+    """
+    QUERY 2: estados com mais despesas (todos os trimestres ou só um)
+    """
+    r = resumo_operadora
+    if trimestre is not None:
+        r = r[(r["ano"] == trimestre[0]) & (r["trimestre"] == trimestre[1])]
+    r = r.merge(operadoras[["cnpj", "uf"]], on="cnpj", how="inner")
+    por_uf = r.groupby("uf", dropna=False).agg(
+        total_despesas=("total_despesas", "sum"),
+        qtd_operadoras=("cnpj", "nunique"),
+        qtd_despesas=("qtd_despesas", "sum"),
+    ).reset_index()
+    por_uf["media_por_operadora"] = (por_uf["total_despesas"] / por_uf["qtd_despesas"]).round(2)
+    por_uf = por_uf.sort_values(["total_despesas", "uf"], ascending=[False, True]).head(limite)
+    return _registros(por_uf[["uf", "total_despesas", "qtd_operadoras", "media_por_operadora"]])
+
+
+def acima_da_media(resumo_operadora, operadoras, minimo=2, limite=100):
+    """
+    QUERY 3: operadoras com pelo menos `minimo` despesas acima da média
+    do trimestre
+    """
+    por_operadora = resumo_operadora.groupby("cnpj").agg(
+        trimestres_com_dados=("trimestre", "size"),
+        vezes_acima_da_media=("vezes_acima", "sum"),
+    ).reset_index()
+    por_operadora = por_operadora[por_operadora["vezes_acima_da_media"] >= minimo]
+    por_operadora = por_operadora.merge(operadoras[["cnpj", "razao_social"]], on="cnpj", how="inner")
+    por_operadora = por_operadora.sort_values(["vezes_acima_da_media", "razao_social"], ascending=[False, True])
+    return _registros(por_operadora[["cnpj", "razao_social", "trimestres_com_dados",
+                                     "vezes_acima_da_media"]].head(limite))
@@ -0,0 +1,86 @@
+"""
+BENCHMARK: Busca por CNPJ na API (índice vs varredura)
+Mede p50/p99 da rota /api/operadoras/<cnpj> com bases de tamanhos
+diferentes. Com o índice a latência deve ficar estável; a varredura
+antiga (df[df['CNPJ'] == cnpj]) cresce junto com a base.
+
+Para executar (na raiz do projeto):
+    python benchmarks/bench_api_indices.py --tamanhos 1000 100000 1000000 10000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import teste4_api
+
+
+def gerar_base(linhas, semente=42):
+    """
+    Base sintética: ~4 trimestres por operadora
+    """
+    rng = np.random.default_rng(semente)
+    operadoras = max(linhas // 4, 1)
+    ids = rng.integers(0, operadoras, linhas)
+    cnpjs = pd.Series(ids).map("{:014d}".format)
+    nomes = pd.Series(ids).map("OPERADORA {}".format)
+    ufs = np.array(["SP", "RJ", "MG", "RS", "PR", "BA", "PE", "DF"])[ids % 8]
+    df_operadoras = pd.DataFrame({
+        "CNPJ": cnpjs,
+        "RazaoSocial": nomes,
+        "UF": ufs,
+        "Trimestre": rng.integers(1, 5, linhas),
+        "Ano": 2024,
+        "ValorDespesas": rng.uniform(1_000, 1_000_000, linhas).round(2),
+    })
+    df_agregado = (df_operadoras.groupby(["RazaoSocial", "UF"], as_index=False)["ValorDespesas"].sum()
+                   .rename(columns={"ValorDespesas": "TotalDespesas"}))
+    return df_operadoras, df_agregado
+
+
+def percentis(tempos):
+    tempos_ms = np.array(tempos) * 1000
+    return np.percentile(tempos_ms, 50), np.percentile(tempos_ms, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos índices da API")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--requisicoes", type=int, default=1_000)
+    args = parser.parse_args()
+
+    cliente = teste4_api.app.test_client()
+    rng = np.random.default_rng(7)
+
+    print(f"{'linhas':>12} | {'índice p50':>10} | {'índice p99':>10} | {'varredura p50':>13}")
+    for linhas in args.tamanhos:
+        df_operadoras, df_agregado = gerar_base(linhas)
+        teste4_api.usar_dados(df_operadoras, df_agregado)
+        amostra = df_operadoras["CNPJ"].iloc[rng.integers(0, linhas, args.requisicoes)].tolist()
+
+        tempos = []
+        for cnpj in amostra:
+            inicio = time.perf_counter()
+            resposta = cliente.get(f"/api/operadoras/{cnpj}")
+            tempos.append(time.perf_counter() - inicio)
+            assert resposta.status_code == 200
+        p50, p99 = percentis(tempos)
+
+        # Caminho antigo, só a filtragem (sem HTTP), com poucas amostras
+        varredura = []
+        for cnpj in amostra[:20]:
+            inicio = time.perf_counter()
+            df_operadoras[df_operadoras["CNPJ"] == cnpj]
+            varredura.append(time.perf_counter() - inicio)
+        v50, _ = percentis(varredura)
+
+        print(f"{linhas:>12,} | {p50:>8.3f}ms | {p99:>8.3f}ms | {v50:>11.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
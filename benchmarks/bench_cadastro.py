@@ -0,0 +1,83 @@
+"""
+BENCHMARK: JOIN das despesas com o cadastro de operadoras
+Compara o caminho antigo (pd.merge com o CNPJ em texto) com o índice do
+cadastro_operadoras.py (CNPJ int64 ordenado + busca binária), em tempo
+e pico de memória alocada.
+
+Para executar (na raiz do projeto):
+    python benchmarks/bench_cadastro.py --linhas 1000000 --operadoras 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import cadastro_operadoras
+import gerar_dados
+
+
+def medir(funcao, repeticoes=5):
+    funcao()  # aquecimento
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    ms = (time.perf_counter() - inicio) / repeticoes * 1000
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ms, pico / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do JOIN com o cadastro")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--operadoras", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        gerado = gerar_dados.gerar(args.linhas, pasta, trimestres=((2024, 1),), operadoras=args.operadoras)
+        despesas = pd.read_csv(gerado["fontes"][0], sep=";", dtype={"CNPJ": "string"})
+        cadastro = pd.read_csv(gerado["cadastro"], sep=";", dtype=str)
+
+        inicio = time.perf_counter()
+        cadastro_operadoras.carregar_indice(gerado["cadastro"], os.path.join(pasta, "indice"))
+        montagem = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        indice = cadastro_operadoras.carregar_indice(gerado["cadastro"], os.path.join(pasta, "indice"))
+        abertura = time.perf_counter() - inicio
+
+        print(f"Despesas: {len(despesas):,} linhas | cadastro: {len(cadastro):,} operadoras")
+        print(f"Índice: montado em {montagem * 1000:.1f} ms, reaberto (memmap) em {abertura * 1000:.2f} ms\n")
+
+        def merge_texto():
+            return pd.merge(despesas, cadastro[["CNPJ", "RegistroANS", "Modalidade", "UF"]],
+                            on="CNPJ", how="left")
+
+        def indice_texto():
+            return cadastro_operadoras.juntar(despesas, indice)
+
+        chaves = despesas.assign(CNPJ=cadastro_operadoras.cnpjs_para_inteiros(despesas["CNPJ"]))
+
+        def indice_inteiro():
+            return cadastro_operadoras.juntar(chaves, indice)
+
+        print(f"{'Caminho':<32}{'ms':>10}{'MB pico':>10}{'MB resultado':>14}")
+        for nome, funcao in (("pd.merge (CNPJ texto)", merge_texto),
+                             ("índice (CNPJ texto)", indice_texto),
+                             ("índice (CNPJ int64)", indice_inteiro)):
+            ms, pico = medir(funcao)
+            resultado = funcao().memory_usage(deep=True).sum() / 2**20
+            print(f"{nome:<32}{ms:>10.1f}{pico:>10.1f}{resultado:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+BENCHMARK: Validação de CNPJ
+Compara o caminho antigo (df['CNPJ'].apply(validar_cnpj), linha por linha)
+com o vetorizado (validar_cnpjs, matriz de dígitos no NumPy)
+
+Para executar (na raiz do projeto):
+    python benchmarks/bench_cnpj.py --linhas 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from teste2_validacao import PESOS_DV1, PESOS_DV2, validar_cnpj, validar_cnpjs
+
+
+def gerar_cnpjs(linhas, semente=42):
+    """
+    Gera CNPJs aleatórios em texto: metade com dígitos verificadores
+    corretos, metade com o último dígito errado
+    """
+    rng = np.random.default_rng(semente)
+    base = rng.integers(0, 10, size=(linhas, 12))
+
+    resto1 = (base @ PESOS_DV1) % 11
+    dv1 = np.where(resto1 < 2, 0, 11 - resto1)
+    com_dv1 = np.column_stack([base, dv1])
+    resto2 = (com_dv1 @ PESOS_DV2) % 11
+    dv2 = np.where(resto2 < 2, 0, 11 - resto2)
+
+    # Metade inválida: soma 1 no segundo dígito verificador
+    dv2 = np.where(np.arange(linhas) % 2 == 0, dv2, (dv2 + 1) % 10)
+    digitos = np.column_stack([com_dv1, dv2]).astype(np.uint8) + ord('0')
+    return pd.Series(digitos.view('S14').ravel().astype(str))
+
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da validação de CNPJ")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    serie = gerar_cnpjs(args.linhas)
+    print(f"📊 {args.linhas} CNPJs gerados")
+
+    antigo, tempo_antigo = medir(serie.apply, validar_cnpj)
+    novo, tempo_novo = medir(validar_cnpjs, serie)
+
+    # Os dois caminhos precisam dar exatamente o mesmo resultado
+    assert (antigo == novo).all(), "validar_cnpjs diverge de validar_cnpj"
+
+    print(f"   apply(validar_cnpj): {tempo_antigo:8.3f} s ({args.linhas / tempo_antigo:,.0f} linhas/s)")
+    print(f"   validar_cnpjs:       {tempo_novo:8.3f} s ({args.linhas / tempo_novo:,.0f} linhas/s)")
+    print(f"   🚀 {tempo_antigo / tempo_novo:.1f}x mais rápido | válidos: {novo.sum()}")
+
+
+if __name__ == "__main__":
+    main()
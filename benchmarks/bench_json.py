@@ -0,0 +1,94 @@
+"""
+BENCHMARK: Serialização das respostas da API
+Compara o caminho antigo (to_dict('records') + jsonify do Flask) com o
+novo (serializacao_json.registros + orjson), para páginas de tamanhos
+diferentes. Mostra o tempo por resposta e o pico de memória alocada.
+
+Para executar (na raiz do projeto):
+    python benchmarks/bench_json.py --linhas 1000000 --paginas 10 100 500 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import serializacao_json
+
+
+def gerar_base(linhas, semente=42):
+    """
+    Mesmas colunas do consolidado (com a UF, como nas listagens da API)
+    """
+    rng = np.random.default_rng(semente)
+    ids = rng.integers(0, max(linhas // 4, 1), linhas)
+    return pd.DataFrame({
+        "CNPJ": pd.Series(ids).map("{:014d}".format),
+        "RazaoSocial": pd.Series(ids).map("OPERADORA SAÚDE {}".format),
+        "UF": np.array(["SP", "RJ", "MG", "RS", "PR", "BA", "PE", "DF"])[ids % 8],
+        "Trimestre": rng.integers(1, 5, linhas),
+        "Ano": 2024,
+        "ValorDespesas": rng.uniform(1_000, 1_000_000, linhas).round(2),
+    })
+
+
+def medir(funcao, repeticoes):
+    funcao()  # aquecimento
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    ms = (time.perf_counter() - inicio) / repeticoes * 1000
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ms, pico / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialização JSON")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--paginas", type=int, nargs="+", default=[10, 100, 500, 5000])
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+
+    antigo = Flask("antigo")
+    antigo.json = DefaultJSONProvider(antigo)
+    novo = Flask("novo")
+    novo.json = serializacao_json.ProvedorJSON(novo)
+
+    df = gerar_base(args.linhas)
+    print(f"Base: {len(df):,} linhas | orjson: {'sim' if serializacao_json.ORJSON_DISPONIVEL else 'não'}\n")
+    print(f"{'Linhas':>8} | {'to_dict + jsonify':>22} | {'registros + orjson':>22} | {'ganho':>6}")
+    print(f"{'':>8} | {'ms':>10} {'KB pico':>11} | {'ms':>10} {'KB pico':>11} |")
+
+    for tamanho in args.paginas:
+        inicio = len(df) // 2
+        pagina = df.iloc[inicio:inicio + tamanho]
+        envelope = {"success": True, "pagination": {"page": 1, "limit": tamanho, "total": len(df)}}
+        repeticoes = max(args.repeticoes * 100 // tamanho, 3)
+
+        def caminho_antigo():
+            with antigo.app_context():
+                antigo.json.response({**envelope, "data": pagina.to_dict("records")}).get_data()
+
+        def caminho_novo():
+            with novo.app_context():
+                novo.json.response({**envelope, "data": serializacao_json.registros(pagina)}).get_data()
+
+        ms_antigo, kb_antigo = medir(caminho_antigo, repeticoes)
+        ms_novo, kb_novo = medir(caminho_novo, repeticoes)
+        print(f"{tamanho:>8} | {ms_antigo:>10.3f} {kb_antigo:>11.0f} | {ms_novo:>10.3f} {kb_novo:>11.0f} | "
+              f"{ms_antigo / ms_novo:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+BENCHMARK: Memória do consolidado na API (tipos_compactos.py)
+Gera um histórico sintético (várias linhas por operadora, como a série
+completa da ANS) e mede a memória de cada coluna em três formatos:
+
+    object    → textos como objetos Python (padrão do pandas < 3)
+    str       → textos no tipo string do pandas (Arrow)
+    compacto  → tipos_compactos.compactar (CNPJ int64, categorias, centavos)
+
+Para executar (na raiz do projeto):
+    python benchmarks/bench_memoria.py --linhas 1M
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import formato_colunar
+import gerar_dados
+import tipos_compactos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória do consolidado em tipos compactos")
+    parser.add_argument("--linhas", default="1M", help="total de linhas (ex.: 100k, 1M, 10M)")
+    parser.add_argument("--trimestres", type=int, default=12, help="trimestres do histórico")
+    args = parser.parse_args()
+
+    linhas = gerar_dados.ler_quantidade(args.linhas)
+    trimestres = [(2022 + i // 4, i % 4 + 1) for i in range(args.trimestres)]
+    with tempfile.TemporaryDirectory() as pasta:
+        gerado = gerar_dados.gerar(linhas, pasta, trimestres=trimestres)
+        historico = pd.concat([pd.read_csv(f, sep=";", dtype={"CNPJ": str}) for f in gerado["fontes"]],
+                              ignore_index=True)
+
+    tipado = formato_colunar._tipar_consolidado(historico[historico["Trimestre"].between(1, 4)])
+    textos = [c for c in tipado.columns if pd.api.types.is_string_dtype(tipado[c].dtype)]
+    formatos = {
+        "object": tipado.astype({c: object for c in textos}).astype({"Trimestre": "int64", "Ano": "int64"}),
+        "str": tipado,
+        "compacto": tipos_compactos.compactar(tipado),
+    }
+
+    print(f"Histórico: {len(tipado):,} linhas, {tipado['CNPJ'].nunique():,} operadoras, "
+          f"{args.trimestres} trimestres\n")
+    print(f"{'Coluna':<16}" + "".join(f"{nome:>14}" for nome in formatos) + "   (MB)")
+    for coluna in tipado.columns:
+        valores = []
+        for df in formatos.values():
+            nome = coluna if coluna in df.columns else coluna + tipos_compactos.SUFIXO_CENTAVOS
+            valores.append(df[nome].memory_usage(deep=True, index=False) / 2**20)
+        print(f"{coluna:<16}" + "".join(f"{v:>14.1f}" for v in valores))
+    totais = {nome: tipos_compactos.memoria_bytes(df) / 2**20 for nome, df in formatos.items()}
+    print(f"{'TOTAL':<16}" + "".join(f"{v:>14.1f}" for v in totais.values()))
+    print(f"\nRedução: {totais['object'] / totais['compacto']:.1f}x sobre object, "
+          f"{totais['str'] / totais['compacto']:.1f}x sobre str")
+
+
+if __name__ == "__main__":
+    main()
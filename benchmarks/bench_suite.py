@@ -0,0 +1,214 @@
+"""
+BENCHMARK: Pipeline inteiro com dados sintéticos (Teste 1, Teste 2, Teste 4)
+Para cada tamanho, numa pasta temporária:
+
+    1. gera os trimestres sintéticos (benchmarks/gerar_dados.py)
+    2. Teste 1: processar_dados (ou o modo --streaming)
+    3. Teste 2: validação, join e agregação (main do teste2_validacao)
+    4. Teste 4: carrega a API e mede p50/p95/p99 de cada rota
+
+Os tempos por etapa vêm dos relatórios de execução (metricas.py). O
+resultado vai para um JSON em benchmarks/resultados/, com o commit do
+git, para comparar versões:
+
+    python benchmarks/bench_suite.py --linhas 10k 1M
+    python benchmarks/bench_suite.py --linhas 10k 1M --comparar benchmarks/resultados/<anterior>.json
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+import gerar_dados
+import metricas
+import teste1_api
+import teste2_validacao
+
+PASTA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+ROTAS = [
+    "/api/operadoras?page=1&limit=100",
+    "/api/operadoras?page=50&limit=100",
+    "/api/operadoras?cursor=&limit=100",
+    "/api/operadoras?uf=SP&limit=100",
+    "/api/operadoras/search?q=unimed%20sao&limit=10",
+    "/api/estatisticas",
+    "/api/analises/crescimento",
+    "/api/analises/ufs",
+    "/api/analises/acima-da-media",
+]
+
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def etapas_do_relatorio(caminho):
+    with open(caminho, encoding="utf-8") as f:
+        relatorio = json.load(f)
+    etapas = {e["etapa"]: {"segundos": e["segundos"], "linhas_por_s": e.get("linhas_por_s")}
+              for e in relatorio["etapas"]}
+    return {"segundos": relatorio["segundos_total"], "rss_pico_mb": relatorio["rss_pico_mb"],
+            "etapas": etapas}
+
+
+def medir_pipeline(fontes, cadastro, streaming):
+    metricas.iniciar_execucao("bench_teste1")
+    with contextlib.redirect_stdout(io.StringIO()):
+        if streaming:
+            teste1_api.processar_dados_streaming(fontes)
+        else:
+            teste1_api.processar_dados(fontes)
+    teste1 = etapas_do_relatorio(metricas.salvar_relatorio())
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        teste2_validacao.main(["--cadastro", cadastro])
+    teste2 = etapas_do_relatorio(max(glob.glob("dados/relatorios/teste2_*.json"), key=os.path.getmtime))
+    return teste1, teste2
+
+
+def medir_api(requisicoes, rng):
+    # Importada só aqui: na importação a API já carrega os dados da pasta atual
+    with contextlib.redirect_stdout(io.StringIO()):
+        import teste4_api
+        inicio = time.perf_counter()
+        teste4_api.recarregar_dados(forcar=True)
+        carga = time.perf_counter() - inicio
+
+    cliente = teste4_api.app.test_client()
+    cnpjs = np.array(list(teste4_api.snapshot["indices"]["cnpj"]))
+    sorteados = cnpjs[rng.integers(0, len(cnpjs), requisicoes)]
+    rotas = {rota: [rota] * requisicoes for rota in ROTAS}
+    rotas["/api/operadoras/<cnpj>"] = [f"/api/operadoras/{c}" for c in sorteados]
+    rotas["/api/operadoras/<cnpj>/despesas"] = [f"/api/operadoras/{c}/despesas" for c in sorteados]
+
+    resultado = {"carga_s": round(carga, 4), "rotas": {}}
+    for nome, urls in rotas.items():
+        tempos = []
+        for url in urls:
+            inicio = time.perf_counter()
+            resposta = cliente.get(url)
+            tempos.append(time.perf_counter() - inicio)
+            if resposta.status_code != 200:
+                raise RuntimeError(f"{url} respondeu {resposta.status_code}")
+        resultado["rotas"][nome] = metricas.percentis(tempos)
+    return resultado
+
+
+def medir_tamanho(linhas, args):
+    rng = np.random.default_rng(args.semente)
+    pasta = tempfile.mkdtemp(prefix="bench_ans_")
+    anterior = os.getcwd()
+    os.chdir(pasta)
+    try:
+        inicio = time.perf_counter()
+        gerado = gerar_dados.gerar(linhas, "dados/sinteticos", semente=args.semente, formato=args.formato)
+        geracao = time.perf_counter() - inicio
+        teste1, teste2 = medir_pipeline(gerado["fontes"], gerado["cadastro"], args.streaming)
+        api = medir_api(args.requisicoes, rng)
+        return {"linhas": linhas, "operadoras": gerado["operadoras"], "geracao_s": round(geracao, 4),
+                "teste1": teste1, "teste2": teste2, "teste4": api}
+    finally:
+        os.chdir(anterior)
+        if args.manter:
+            print(f"   📁 Arquivos mantidos em {pasta}")
+        else:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+
+def achatar(resultados):
+    """
+    {"1000000 teste2 validar": segundos, "1000000 teste4 GET ... p95_ms": ms, ...}
+    """
+    medidas = {}
+    for r in resultados:
+        n = r["linhas"]
+        for teste in ("teste1", "teste2"):
+            medidas[f"{n} {teste} total_s"] = r[teste]["segundos"]
+            for etapa, m in r[teste]["etapas"].items():
+                medidas[f"{n} {teste} {etapa}_s"] = m["segundos"]
+        medidas[f"{n} teste4 carga_s"] = r["teste4"]["carga_s"]
+        for rota, m in r["teste4"]["rotas"].items():
+            for p in ("p50_ms", "p95_ms", "p99_ms"):
+                medidas[f"{n} teste4 {rota} {p}"] = m[p]
+    return medidas
+
+
+def comparar(anterior, atual):
+    antes, depois = achatar(anterior["resultados"]), achatar(atual["resultados"])
+    print(f"\nComparação com {anterior.get('commit')} ({anterior.get('data')}):")
+    print(f"{'medida':<70}{'antes':>12}{'agora':>12}{'variação':>10}")
+    for chave in sorted(antes.keys() & depois.keys()):
+        a, d = antes[chave], depois[chave]
+        variacao = f"{(d - a) / a * 100:+.1f}%" if a else "-"
+        print(f"{chave:<70}{a:>12.4f}{d:>12.4f}{variacao:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline com dados sintéticos")
+    parser.add_argument("--linhas", nargs="+", default=["10k", "1M"], help="tamanhos (ex.: 10k 1M 50M)")
+    parser.add_argument("--requisicoes", type=int, default=200, help="requisições por rota da API")
+    parser.add_argument("--streaming", action="store_true", help="Teste 1 em pedaços (para 50M)")
+    parser.add_argument("--formato", choices=["csv", "zip"], default="csv")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="arquivo JSON do resultado (padrão: benchmarks/resultados/)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--manter", action="store_true", help="não apaga a pasta com os dados gerados")
+    args = parser.parse_args()
+
+    execucao = {
+        "commit": commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "resultados": [],
+    }
+    for texto in args.linhas:
+        linhas = gerar_dados.ler_quantidade(texto)
+        print(f"⏱️  {linhas:,} linhas...")
+        r = medir_tamanho(linhas, args)
+        execucao["resultados"].append(r)
+        print(f"   geração {r['geracao_s']:.2f}s | Teste 1 {r['teste1']['segundos']:.2f}s | "
+              f"Teste 2 {r['teste2']['segundos']:.2f}s | API carga {r['teste4']['carga_s']:.2f}s")
+        for rota, m in r["teste4"]["rotas"].items():
+            print(f"   {rota:<52} p50 {m['p50_ms']:>8.3f} ms | p95 {m['p95_ms']:>8.3f} | p99 {m['p99_ms']:>8.3f}")
+
+    saida = args.saida
+    if saida is None:
+        os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+        carimbo = datetime.now().strftime("%Y%m%d_%H%M%S")
+        saida = os.path.join(PASTA_RESULTADOS, f"bench_{execucao['commit'] or 'sem_git'}_{carimbo}.json")
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(execucao, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultado salvo: {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(json.load(f), execucao)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+BENCHMARK: CSV + ZIP do consolidado (zip_paralelo.py)
+Gera um consolidado sintético e compara as formas de gravar o CSV e o ZIP:
+
+    antigo        → df.to_csv e depois zipf.write (lê o CSV de novo, sem compressão)
+    antigo_zlib   → o mesmo com ZIP_DEFLATED (compressão numa thread só)
+    paralelo N    → zip_paralelo.csv_e_zip: CSV e ZIP na mesma passada,
+                    DEFLATE em blocos comprimidos por N threads
+
+Para cada forma: tempo, tamanho do ZIP e bytes lidos/gravados pelo
+processo (/proc/self/io, só no Linux).
+
+Para executar (na raiz do projeto):
+    python benchmarks/bench_zip.py --linhas 1M --nivel 6
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import formato_colunar
+import gerar_dados
+import zip_paralelo
+
+
+def io_processo():
+    # rchar/wchar: bytes lidos/gravados pelo processo (inclusive os que ficam no cache do disco)
+    try:
+        with open("/proc/self/io") as f:
+            campos = dict(linha.split(": ") for linha in f.read().splitlines())
+        return int(campos["rchar"]), int(campos["wchar"])
+    except OSError:
+        return 0, 0
+
+
+def antigo(df, csv, zip_, compressao, nivel):
+    df.to_csv(csv, index=False, encoding="utf-8")
+    with zipfile.ZipFile(zip_, "w", compression=compressao, compresslevel=nivel) as zipf:
+        zipf.write(csv)
+
+
+def paralelo(df, csv, zip_, nivel, threads):
+    with zip_paralelo.csv_e_zip(csv, zip_, nivel=nivel, threads=threads) as escrever:
+        zip_paralelo.escrever_csv(escrever, df)
+
+
+def medir(nome, funcao, csv, zip_, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        lidos, gravados = io_processo()
+        inicio = time.perf_counter()
+        funcao()
+        segundos = time.perf_counter() - inicio
+        lidos2, gravados2 = io_processo()
+        if melhor is None or segundos < melhor[0]:
+            melhor = (segundos, lidos2 - lidos, gravados2 - gravados)
+    segundos, lidos, gravados = melhor
+    print(f"{nome:<16}{segundos:>9.2f}{os.path.getsize(zip_) / 2**20:>11.1f}"
+          f"{lidos / 2**20:>10.1f}{gravados / 2**20:>10.1f}")
+    return segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV + ZIP do consolidado: antigo x paralelo")
+    parser.add_argument("--linhas", default="1M", help="total de linhas (ex.: 100k, 1M, 10M)")
+    parser.add_argument("--nivel", type=int, default=zip_paralelo.NIVEL_ZIP, help="nível de compressão (1-9)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="repetições (vale a mais rápida)")
+    args = parser.parse_args()
+
+    linhas = gerar_dados.ler_quantidade(args.linhas)
+    with tempfile.TemporaryDirectory() as pasta:
+        gerado = gerar_dados.gerar(linhas, pasta)
+        df = pd.concat([pd.read_csv(f, sep=";", dtype={"CNPJ": str}) for f in gerado["fontes"]],
+                       ignore_index=True)
+        df = formato_colunar._tipar_consolidado(df[df["Trimestre"].between(1, 4)])
+        csv, zip_ = os.path.join(pasta, "consolidado.csv"), os.path.join(pasta, "consolidado.zip")
+
+        print(f"Consolidado: {len(df):,} linhas, nível {args.nivel}, {os.cpu_count()} CPUs\n")
+        print(f"{'Forma':<16}{'segundos':>9}{'ZIP (MB)':>11}{'lidos':>10}{'gravados':>10}   (MB)")
+        base = medir("antigo", lambda: antigo(df, csv, zip_, zipfile.ZIP_STORED, None),
+                     csv, zip_, args.repeticoes)
+        print(f"{'':<16}CSV: {os.path.getsize(csv) / 2**20:.1f} MB")
+        zlib = medir("antigo_zlib", lambda: antigo(df, csv, zip_, zipfile.ZIP_DEFLATED, args.nivel),
+                     csv, zip_, args.repeticoes)
+        for threads in sorted({1, zip_paralelo.THREADS_ZIP}):
+            tempo = medir(f"paralelo {threads}", lambda: paralelo(df, csv, zip_, args.nivel, threads),
+                          csv, zip_, args.repeticoes)
+        print(f"\nParalelo ({zip_paralelo.THREADS_ZIP} threads): {zlib / tempo:.2f}x mais rápido que "
+              f"antigo_zlib, {tempo / base:.2f}x o tempo do antigo sem compressão")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+BENCHMARK: Teste de carga da API (servidor de desenvolvimento vs produção)
+Dispara requisições em paralelo contra um ou mais servidores já rodando
+e mostra requisições por segundo, p50/p95/p99 e bytes recebidos.
+
+Para executar (na raiz do projeto, com os servidores no ar):
+    python3 teste4_api.py                                   # porta 5001
+    python3 servidor_producao.py --workers 4 --porta 8000   # porta 8000
+    python benchmarks/carga_api.py --url http://localhost:5001 --url http://localhost:8000 --gzip
+"""
+
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROTAS_PADRAO = [
+    "/api/estatisticas",
+    "/api/operadoras?page=1&limit=100",
+    "/api/operadoras?cursor=&limit=100",
+    "/api/operadoras/search?q=saude&limit=10",
+    "/api/analises/ufs?limit=5",
+]
+
+
+def disparar(url, rotas, concorrencia, duracao, gzip_aceito):
+    """
+    `concorrencia` clientes, cada um com sua conexão, repetindo as rotas
+    em sequência por `duracao` segundos
+    """
+    partes = urlsplit(url)
+    cabecalhos = {"Accept-Encoding": "gzip, br"} if gzip_aceito else {}
+    latencias, erros, recebidos = [], [0], [0]
+    trava = threading.Lock()
+    fim = time.perf_counter() + duracao
+
+    def cliente(deslocamento):
+        conexao = None
+        minhas, meus_erros, meus_bytes = [], 0, 0
+        i = deslocamento
+        while time.perf_counter() < fim:
+            rota = rotas[i % len(rotas)]
+            i += 1
+            inicio = time.perf_counter()
+            try:
+                if conexao is None:
+                    conexao = http.client.HTTPConnection(partes.hostname, partes.port, timeout=30)
+                conexao.request("GET", rota, headers=cabecalhos)
+                resposta = conexao.getresponse()
+                corpo = resposta.read()
+                # HTTP/1.0 (servidores do werkzeug) fecha a conexão a cada resposta
+                if resposta.will_close:
+                    conexao.close()
+                    conexao = None
+                if resposta.status != 200:
+                    meus_erros += 1
+                    continue
+                meus_bytes += len(corpo)
+                minhas.append(time.perf_counter() - inicio)
+            except (OSError, http.client.HTTPException):
+                meus_erros += 1
+                conexao = None
+        with trava:
+            latencias.extend(minhas)
+            erros[0] += meus_erros
+            recebidos[0] += meus_bytes
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=cliente, args=(k,)) for k in range(concorrencia)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    decorrido = time.perf_counter() - inicio
+
+    ms = np.array(latencias) * 1000 if latencias else np.zeros(1)
+    return {
+        "url": url,
+        "requisicoes": len(latencias),
+        "erros": erros[0],
+        "rps": len(latencias) / decorrido,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "kb_por_resposta": recebidos[0] / max(len(latencias), 1) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API")
+    parser.add_argument("--url", action="append", required=True,
+                        help="servidor a testar (pode repetir para comparar)")
+    parser.add_argument("--rota", action="append", help="rota a chamar (padrão: principais rotas)")
+    parser.add_argument("--concorrencia", type=int, default=32)
+    parser.add_argument("--duracao", type=float, default=10.0, help="segundos por servidor")
+    parser.add_argument("--gzip", action="store_true", help="enviar Accept-Encoding: gzip, br")
+    args = parser.parse_args()
+
+    rotas = args.rota or ROTAS_PADRAO
+    print(f"Rotas: {', '.join(rotas)}")
+    print(f"{args.concorrencia} clientes, {args.duracao:.0f}s por servidor\n")
+
+    resultados = [disparar(url, rotas, args.concorrencia, args.duracao, args.gzip) for url in args.url]
+
+    print(f"{'Servidor':<28}{'req/s':>10}{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}{'KB/resp':>10}{'erros':>8}")
+    for r in resultados:
+        print(f"{r['url']:<28}{r['rps']:>10.0f}{r['p50_ms']:>11.2f}{r['p95_ms']:>11.2f}"
+              f"{r['p99_ms']:>11.2f}{r['kb_por_resposta']:>10.1f}{r['erros']:>8}")
+
+    if len(resultados) > 1 and resultados[0]["rps"] > 0:
+        base = resultados[0]["rps"]
+        for r in resultados[1:]:
+            print(f"\n{r['url']}: {r['rps'] / base:.1f}x as requisições por segundo de {resultados[0]['url']}")
+
+
+if __name__ == "__main__":
+    main()
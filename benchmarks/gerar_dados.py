@@ -0,0 +1,188 @@
+"""
+GERADOR: trimestres sintéticos no tamanho dos dados reais da ANS
+Os arquivos de exemplo do repositório têm 5 linhas. Este script gera
+trimestres com o mesmo formato da entrada do Teste 1 (CSV com ";":
+CNPJ;RazaoSocial;Trimestre;Ano;ValorDespesas), em qualquer tamanho, e o
+cadastro de operadoras usado no JOIN do Teste 2.
+
+Os problemas que o pipeline trata aparecem nas proporções abaixo:
+    - CNPJs com dígito verificador errado (por operadora)
+    - CNPJs repetidos com razão social diferente
+    - valores negativos e zerados
+    - trimestres fora de 1..4
+    - operadoras sem cadastro (o LEFT JOIN não encontra)
+
+As linhas são geradas e gravadas em blocos, então 50 milhões de linhas
+não precisam caber na memória. Mesma semente → mesmos arquivos.
+
+Para executar (na raiz do projeto):
+    python benchmarks/gerar_dados.py --linhas 1M --pasta dados/sinteticos
+    python3 teste1_api.py --fontes dados/sinteticos/*T2024.csv
+    python benchmarks/gerar_dados.py --linhas 50M --formato zip
+"""
+
+import argparse
+import io
+import os
+import sys
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from teste2_validacao import PESOS_DV1, PESOS_DV2
+
+PROPORCAO_CNPJ_INVALIDO = 0.03   # das operadoras
+PROPORCAO_SEM_CADASTRO = 0.05    # das operadoras
+PROPORCAO_NOME_DIFERENTE = 0.01  # das linhas
+PROPORCAO_NEGATIVO = 0.01
+PROPORCAO_ZERADO = 0.005
+PROPORCAO_TRIMESTRE_INVALIDO = 0.005
+TAMANHO_BLOCO = 1_000_000
+
+UFS = np.array(["SP", "RJ", "MG", "RS", "PR", "BA", "SC", "PE", "GO", "DF", "CE", "ES", "PA", "MT", "MS",
+                "AM", "PB", "RN", "AL", "PI", "MA", "SE", "RO", "TO", "AC", "AP", "RR"])
+# Mais operadoras nos estados mais populosos
+PESOS_UF = np.array([22, 8, 10, 5, 5, 6, 3, 4, 3, 2, 4, 2, 3, 2, 1, 2, 2, 1, 1, 1, 2, 1, 1, 1, 0.5, 0.5, 0.5])
+MODALIDADES = np.array(["Medicina de Grupo", "Cooperativa Médica", "Autogestão", "Seguradora Especializada em Saúde",
+                        "Odontologia de Grupo", "Cooperativa Odontológica", "Filantropia"])
+PREFIXOS = np.array(["UNIMED", "SAÚDE", "ASSISTÊNCIA MÉDICA", "ODONTO", "CLÍNICA", "HOSPITAL", "PLANO",
+                     "AMIL", "CAIXA DE ASSISTÊNCIA", "SOCIEDADE BENEFICENTE"])
+CIDADES = np.array(["SÃO PAULO", "RIO DE JANEIRO", "BELO HORIZONTE", "PORTO ALEGRE", "CURITIBA", "SALVADOR",
+                    "RECIFE", "FORTALEZA", "GOIÂNIA", "BRASÍLIA", "CAMPINAS", "SANTOS", "JOINVILLE", "NATAL"])
+
+
+def ler_quantidade(texto):
+    """
+    "10k" → 10_000, "1M" → 1_000_000, "50M" → 50_000_000
+    """
+    texto = str(texto).strip().lower().replace("_", "")
+    multiplicador = {"k": 1_000, "m": 1_000_000}.get(texto[-1:], 1)
+    if multiplicador > 1:
+        texto = texto[:-1]
+    return int(float(texto) * multiplicador)
+
+
+def gerar_operadoras(quantidade, semente=42):
+    """
+    Tabela de operadoras: CNPJ (alguns com DV errado), nome, UF, modalidade
+    """
+    rng = np.random.default_rng(semente)
+    base = rng.integers(0, 10, size=(quantidade, 12))
+    resto1 = (base @ PESOS_DV1) % 11
+    dv1 = np.where(resto1 < 2, 0, 11 - resto1)
+    com_dv1 = np.column_stack([base, dv1])
+    resto2 = (com_dv1 @ PESOS_DV2) % 11
+    dv2 = np.where(resto2 < 2, 0, 11 - resto2)
+    invalido = rng.random(quantidade) < PROPORCAO_CNPJ_INVALIDO
+    dv2 = np.where(invalido, (dv2 + 1) % 10, dv2)
+    digitos = np.column_stack([com_dv1, dv2]).astype(np.uint8) + ord("0")
+
+    ids = np.arange(quantidade)
+    nomes = (pd.Series(PREFIXOS[rng.integers(0, len(PREFIXOS), quantidade)]) + " " +
+             pd.Series(CIDADES[rng.integers(0, len(CIDADES), quantidade)]) + " " +
+             pd.Series(ids).astype(str))
+    return pd.DataFrame({
+        "CNPJ": digitos.view("S14").ravel().astype(str),
+        "RazaoSocial": nomes,
+        "UF": UFS[rng.choice(len(UFS), quantidade, p=PESOS_UF / PESOS_UF.sum())],
+        "Modalidade": MODALIDADES[rng.integers(0, len(MODALIDADES), quantidade)],
+        "RegistroANS": pd.Series(300000 + ids).astype(str),
+        # Poucas operadoras grandes, muitas pequenas (como na ANS)
+        "peso": rng.lognormal(0, 1.5, quantidade),
+        "tem_cadastro": rng.random(quantidade) >= PROPORCAO_SEM_CADASTRO,
+    })
+
+
+def gerar_bloco(operadoras, probabilidades, linhas, ano, trimestre, rng):
+    ids = rng.choice(len(operadoras), linhas, p=probabilidades)
+    nomes = operadoras["RazaoSocial"].to_numpy()[ids].astype(object)
+    nome_diferente = rng.random(linhas) < PROPORCAO_NOME_DIFERENTE
+    nomes[nome_diferente] = nomes[nome_diferente] + " LTDA"
+
+    valores = rng.lognormal(10, 1.2, linhas).round(2)
+    sorteio = rng.random(linhas)
+    valores = np.where(sorteio < PROPORCAO_NEGATIVO, -valores, valores)
+    valores = np.where((sorteio >= PROPORCAO_NEGATIVO) &
+                       (sorteio < PROPORCAO_NEGATIVO + PROPORCAO_ZERADO), 0.0, valores)
+
+    trimestres = np.full(linhas, trimestre, dtype=np.int64)
+    invalido = rng.random(linhas) < PROPORCAO_TRIMESTRE_INVALIDO
+    trimestres[invalido] = rng.choice([0, 5, 9], int(invalido.sum()))
+
+    return pd.DataFrame({
+        "CNPJ": operadoras["CNPJ"].to_numpy()[ids],
+        "RazaoSocial": nomes,
+        "Trimestre": trimestres,
+        "Ano": ano,
+        "ValorDespesas": valores,
+    })
+
+
+def gerar(linhas, pasta="dados/sinteticos", trimestres=((2024, 1), (2024, 2), (2024, 3)),
+          operadoras=None, formato="csv", semente=42, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera um arquivo por trimestre (linhas divididas entre eles) e o cadastro
+    Retorna {"fontes": [...], "cadastro": caminho, "operadoras": n}
+    """
+    os.makedirs(pasta, exist_ok=True)
+    operadoras = operadoras or min(max(linhas // 50, 10), 200_000)
+    tabela = gerar_operadoras(operadoras, semente)
+    probabilidades = (tabela["peso"] / tabela["peso"].sum()).to_numpy()
+
+    fontes = []
+    por_trimestre = np.array_split(np.arange(linhas), len(trimestres))
+    for i, ((ano, trimestre), faixa) in enumerate(zip(trimestres, por_trimestre)):
+        rng = np.random.default_rng([semente, i])
+        nome = f"{trimestre}T{ano}"
+        caminho = os.path.join(pasta, f"{nome}.{formato}")
+        with open(caminho, "wb") as bruto:
+            if formato == "zip":
+                zipf = zipfile.ZipFile(bruto, "w", compression=zipfile.ZIP_DEFLATED)
+                destino = zipf.open(f"{nome}.csv", "w", force_zip64=True)
+            else:
+                zipf, destino = None, bruto
+            texto = io.TextIOWrapper(destino, encoding="utf-8", newline="")
+            restantes, primeiro = len(faixa), True
+            while restantes > 0:
+                tamanho = min(tamanho_bloco, restantes)
+                gerar_bloco(tabela, probabilidades, tamanho, ano, trimestre, rng) \
+                    .to_csv(texto, sep=";", index=False, header=primeiro)
+                restantes -= tamanho
+                primeiro = False
+            if primeiro:
+                texto.write("CNPJ;RazaoSocial;Trimestre;Ano;ValorDespesas\n")
+            texto.close()
+            if zipf is not None:
+                zipf.close()
+        fontes.append(caminho)
+
+    cadastro = os.path.join(pasta, "cadastro_operadoras.csv")
+    tabela.loc[tabela["tem_cadastro"], ["CNPJ", "RegistroANS", "RazaoSocial", "Modalidade", "UF"]] \
+        .to_csv(cadastro, sep=";", index=False, encoding="utf-8")
+    return {"fontes": fontes, "cadastro": cadastro, "operadoras": operadoras}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera trimestres sintéticos no formato do Teste 1")
+    parser.add_argument("--linhas", default="1M", help="total de linhas (ex.: 10k, 1M, 50M)")
+    parser.add_argument("--trimestres", nargs="+", default=["2024-1", "2024-2", "2024-3"], metavar="ANO-T")
+    parser.add_argument("--operadoras", type=int, help="quantidade de operadoras (padrão: linhas/50)")
+    parser.add_argument("--formato", choices=["csv", "zip"], default="csv")
+    parser.add_argument("--pasta", default="dados/sinteticos")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    linhas = ler_quantidade(args.linhas)
+    trimestres = [tuple(int(x) for x in t.split("-")) for t in args.trimestres]
+    resultado = gerar(linhas, args.pasta, trimestres, args.operadoras, args.formato, args.semente)
+    print(f"✅ {linhas:,} linhas de {resultado['operadoras']:,} operadoras:")
+    for fonte in resultado["fontes"]:
+        print(f"   • {fonte} ({os.path.getsize(fonte) / 2**20:.1f} MB)")
+    print(f"   • {resultado['cadastro']}")
+    print(f"\nPara processar: python3 teste1_api.py --fontes {' '.join(resultado['fontes'])}")
+
+
+if __name__ == "__main__":
+    main()
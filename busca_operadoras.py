@@ -0,0 +1,160 @@
+"""
+BUSCA DE OPERADORAS: índice de prefixos para /api/operadoras/search
+Autora: Mileide Silva de Arruda
+
+O site filtrava a lista no navegador (toLowerCase().includes(...)) sobre
+as 100 primeiras operadoras. Aqui a busca acontece no servidor, sobre
+todas as operadoras, usando listas ordenadas:
+
+    tokens  → cada palavra do nome normalizado ("saude", "total"...)
+    nomes   → o nome normalizado inteiro
+    cnpjs   → o CNPJ (só dígitos)
+
+Numa lista ordenada, todas as entradas que começam com um prefixo ficam
+juntas. Duas buscas binárias (bisect) acham o começo e o fim desse bloco,
+igual a descer numa árvore de prefixos (trie), mas gastando bem menos
+memória.
+
+Normalização: minúsculas, sem acentos e sem pontuação, então
+"saude" encontra "Saúde" e "sao paulo" encontra "SÃO PAULO".
+
+Ordem dos resultados:
+    1º nome que começa com o texto buscado (ou CNPJ que começa com os dígitos)
+    2º nomes em que cada palavra buscada é começo de alguma palavra
+    dentro de cada grupo: nomes mais curtos primeiro, depois ordem alfabética
+"""
+
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+import tipos_compactos
+
+FIM_PREFIXO = "\uffff"  # maior que qualquer caractere de um texto normalizado
+
+
+def normalizar_texto(texto):
+    """
+    "Clínica Saúde-Total" → "clinica saude total"
+    """
+    sem_acento = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", " ", sem_acento.lower()).strip()
+
+
+def _normalizar_serie(serie):
+    return (serie.astype(str)
+            .str.normalize("NFKD")
+            .str.encode("ascii", "ignore")
+            .str.decode("ascii")
+            .str.lower()
+            .str.replace(r"[^a-z0-9]+", " ", regex=True)
+            .str.strip())
+
+
+def _lista_ordenada(valores, ids):
+    """
+    Ordena (valor, id) pelo valor; devolve a lista de valores (para o
+    bisect) e o array de ids na mesma ordem
+    """
+    ordem = np.argsort(valores, kind="stable")
+    return valores[ordem].tolist(), ids[ordem]
+
+
+def construir_indice_busca(df_operadoras):
+    """
+    Monta o índice a partir do consolidado (uma entrada por CNPJ)
+    """
+    cnpjs = tipos_compactos.cnpjs_texto(df_operadoras["CNPJ"]).str.replace(r"\D", "", regex=True)
+    colunas = {"CNPJ": cnpjs, "RazaoSocial": df_operadoras["RazaoSocial"].astype(str)}
+    if "UF" in df_operadoras.columns:
+        colunas["UF"] = df_operadoras["UF"]
+    colunas["ValorDespesas"] = tipos_compactos.reais(df_operadoras, "ValorDespesas")
+    base = pd.DataFrame(colunas)
+
+    operadoras = base.groupby("CNPJ", sort=False).agg(
+        {**{c: "first" for c in base.columns if c not in ("CNPJ", "ValorDespesas")},
+         "ValorDespesas": "sum"}
+    ).reset_index()
+
+    nomes = _normalizar_serie(operadoras["RazaoSocial"])
+    ids = np.arange(len(operadoras), dtype=np.int64)
+
+    # Uma linha por palavra de cada nome
+    palavras = nomes.str.split().explode().dropna()
+    palavras = palavras[palavras != ""]
+
+    # Posição de cada operadora na ordem (tamanho do nome, nome):
+    # é o desempate entre resultados do mesmo grupo
+    posicao_nome = np.empty(len(operadoras), dtype=np.int64)
+    posicao_nome[np.lexsort((nomes.to_numpy(dtype=object).astype(str), nomes.str.len().to_numpy()))] = ids
+
+    indice = {"operadoras": operadoras, "posicao_nome": posicao_nome}
+    indice["tokens"], indice["ids_tokens"] = _lista_ordenada(
+        palavras.to_numpy(dtype=object).astype(str), palavras.index.to_numpy(dtype=np.int64))
+    indice["nomes"], indice["ids_nomes"] = _lista_ordenada(
+        nomes.to_numpy(dtype=object).astype(str), ids)
+    indice["cnpjs"], indice["ids_cnpjs"] = _lista_ordenada(
+        operadoras["CNPJ"].to_numpy(dtype=object).astype(str), ids)
+    return indice
+
+
+def _faixa(valores, ids, prefixo):
+    """
+    ids de todas as entradas que começam com o prefixo (duas buscas binárias)
+    """
+    inicio = bisect.bisect_left(valores, prefixo)
+    fim = bisect.bisect_left(valores, prefixo + FIM_PREFIXO, lo=inicio)
+    return ids[inicio:fim]
+
+
+def buscar(indice, consulta, limite=10, pagina=1):
+    """
+    Retorna (DataFrame com a página de resultados, total de resultados)
+    """
+    texto = normalizar_texto(consulta)
+    vazio = indice["operadoras"].iloc[0:0]
+    if not texto:
+        return vazio, 0
+
+    # Grupo 1: nome começa com o texto, ou CNPJ começa com os dígitos
+    primeiros = [_faixa(indice["nomes"], indice["ids_nomes"], texto)]
+    if re.fullmatch(r"[\d.\-/\s]+", consulta.strip()):
+        digitos = re.sub(r"\D", "", consulta)
+        primeiros.append(_faixa(indice["cnpjs"], indice["ids_cnpjs"], digitos))
+
+    # Grupo 2: cada palavra buscada é começo de alguma palavra do nome
+    # Cada conjunto é um vetor de True/False do tamanho do índice: juntar,
+    # cruzar e tirar repetidos fica sem ordenar nada
+    n = len(indice["posicao_nome"])
+    segundos = None
+    for termo in texto.split():
+        tem_termo = np.zeros(n, dtype=bool)
+        tem_termo[_faixa(indice["tokens"], indice["ids_tokens"], termo)] = True
+        segundos = tem_termo if segundos is None else segundos & tem_termo
+
+    no_primeiro = np.zeros(n, dtype=bool)
+    for ids in primeiros:
+        no_primeiro[ids] = True
+    encontrados = no_primeiro | segundos
+
+    unicos = np.flatnonzero(encontrados)
+    total = len(unicos)
+    if total == 0:
+        return vazio, 0
+
+    # Nota: grupo * N + posição do nome (menor nota = melhor resultado)
+    nota = indice["posicao_nome"][unicos] + n * (~no_primeiro[unicos])
+
+    # Só ordena o que a página precisa (argpartition)
+    fim = min(pagina * limite, total)
+    inicio = min((pagina - 1) * limite, fim)
+    if fim < total:
+        corte = np.argpartition(nota, fim - 1)[:fim]
+    else:
+        corte = np.arange(total)
+    corte = corte[np.argsort(nota[corte], kind="stable")][inicio:fim]
+
+    return indice["operadoras"].iloc[unicos[corte]], total
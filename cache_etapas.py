@@ -0,0 +1,260 @@
+"""
+CACHE DAS ETAPAS: não refazer o Teste 1 e o Teste 2 quando nada mudou
+Autora: Mileide Silva de Arruda
+
+Cada execução do Teste 1 e do Teste 2 regravava o consolidado, o agregado
+e os ZIPs, mesmo com as mesmas entradas. Aqui cada etapa calcula uma
+impressão digital (SHA-256) de tudo o que decide o resultado:
+
+    - o conteúdo dos arquivos de entrada (trimestres, consolidado, cadastro)
+    - o código da etapa: o próprio .py e todos os módulos do projeto que
+      ele importa, direta ou indiretamente (modulos_do_projeto)
+    - as versões do pandas, numpy e pyarrow (mudam a formatação das saídas)
+    - os parâmetros que mudam a saída (--parquet, --nivel-zip...)
+
+As saídas ficam guardadas em dados/cache/<impressão digital>/. Na próxima
+execução com a mesma impressão digital, a etapa não roda: as saídas são
+copiadas de volta (ou nem isso, se as que estão em dados/ já são iguais).
+
+O hash de cada arquivo fica anotado em dados/cache/hashes.json junto com
+o tamanho e a data de modificação. Arquivo que não mudou não é lido de
+novo, então conferir 1 GB de trimestres custa alguns milissegundos.
+
+O cache tem tamanho máximo (ANS_CACHE_MB, padrão 1024 MB). Passou disso,
+as entradas usadas há mais tempo são apagadas primeiro.
+"""
+
+import hashlib
+import importlib.metadata
+import json
+import os
+import shutil
+import types
+
+PASTA_CACHE = "dados/cache"
+LIMITE_CACHE_BYTES = int(os.environ.get("ANS_CACHE_MB", "1024")) * 2**20
+VERSAO_CACHE = 2  # 2: saídas guardadas com a data original (copy2)
+TAMANHO_BLOCO_HASH = 1024 * 1024
+ARQUIVO_HASHES = "hashes.json"
+ARQUIVO_MANIFESTO = "manifesto.json"
+BIBLIOTECAS = ("pandas", "numpy", "pyarrow")
+
+_hashes = None  # caminho → [tamanho, modificado_ns, sha256]
+_hashes_alterados = False
+
+
+def _caminho_hashes(pasta):
+    return os.path.join(pasta, ARQUIVO_HASHES)
+
+
+def _carregar_hashes(pasta):
+    global _hashes
+    if _hashes is None:
+        try:
+            with open(_caminho_hashes(pasta), encoding="utf-8") as f:
+                _hashes = json.load(f)
+        except (OSError, ValueError):
+            _hashes = {}
+    return _hashes
+
+
+def _salvar_hashes(pasta):
+    global _hashes_alterados
+    if not _hashes_alterados:
+        return
+    os.makedirs(pasta, exist_ok=True)
+    temporario = _caminho_hashes(pasta) + f".{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(_hashes, f)
+    os.replace(temporario, _caminho_hashes(pasta))
+    _hashes_alterados = False
+
+
+def _anotar(caminho, conteudo, pasta):
+    global _hashes_alterados
+    info = os.stat(caminho)
+    _carregar_hashes(pasta)[os.path.abspath(caminho)] = [info.st_size, info.st_mtime_ns, conteudo]
+    _hashes_alterados = True
+
+
+def hash_arquivo(caminho, pasta=PASTA_CACHE):
+    """
+    SHA-256 do conteúdo (reaproveita o anotado se tamanho e data não mudaram)
+    Pasta (ex.: Parquet particionado) → hash dos nomes e hashes dos arquivos dela
+    """
+    if os.path.isdir(caminho):
+        resumo = hashlib.sha256()
+        for raiz, pastas, arquivos in os.walk(caminho):
+            pastas.sort()
+            for nome in sorted(arquivos):
+                completo = os.path.join(raiz, nome)
+                resumo.update(os.path.relpath(completo, caminho).encode("utf-8"))
+                resumo.update(hash_arquivo(completo, pasta).encode("ascii"))
+        return resumo.hexdigest()
+
+    info = os.stat(caminho)
+    anotado = _carregar_hashes(pasta).get(os.path.abspath(caminho))
+    if anotado and anotado[0] == info.st_size and anotado[1] == info.st_mtime_ns:
+        return anotado[2]
+
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        while bloco := f.read(TAMANHO_BLOCO_HASH):
+            resumo.update(bloco)
+    _anotar(caminho, resumo.hexdigest(), pasta)
+    return resumo.hexdigest()
+
+
+def modulos_do_projeto(*modulos):
+    """
+    .py dos módulos e de todos os módulos do projeto (mesma pasta deste
+    arquivo) que eles importam, direta ou indiretamente
+    """
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    arquivos = set()
+    pendentes = list(modulos)
+    while pendentes:
+        modulo = pendentes.pop()
+        arquivo = getattr(modulo, "__file__", None)
+        if not arquivo or arquivo in arquivos or os.path.dirname(os.path.abspath(arquivo)) != pasta:
+            continue
+        arquivos.add(arquivo)
+        pendentes.extend(v for v in vars(modulo).values() if isinstance(v, types.ModuleType))
+    return sorted(arquivos, key=os.path.basename)
+
+
+def _versoes_bibliotecas():
+    versoes = {}
+    for nome in BIBLIOTECAS:
+        try:
+            versoes[nome] = importlib.metadata.version(nome)
+        except importlib.metadata.PackageNotFoundError:
+            versoes[nome] = None
+    return versoes
+
+
+def impressao_digital(etapa, entradas, parametros=None, codigo=(), pasta=PASTA_CACHE):
+    """
+    Hash de (etapa, parâmetros, conteúdo de cada entrada e do código)
+    Entrada que não existe entra como ausente (criá-la muda a impressão)
+    codigo: .py da etapa (pelo nome, sem a pasta: mover o projeto não invalida)
+    """
+    partes = {"etapa": etapa, "versao": VERSAO_CACHE, "parametros": parametros or {},
+              "bibliotecas": _versoes_bibliotecas(), "entradas": [], "codigo": []}
+    for caminho in entradas:
+        conteudo = hash_arquivo(caminho, pasta) if os.path.exists(caminho) else None
+        partes["entradas"].append([os.path.normpath(caminho), conteudo])
+    for caminho in codigo:
+        partes["codigo"].append([os.path.basename(caminho), hash_arquivo(caminho, pasta)])
+    _salvar_hashes(pasta)
+    texto = json.dumps(partes, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def _copiar(origem, destino):
+    # Copia para um nome temporário e troca de uma vez (quem estiver
+    # lendo o destino nunca vê um arquivo pela metade)
+    pasta_destino = os.path.dirname(destino)
+    if pasta_destino:
+        os.makedirs(pasta_destino, exist_ok=True)
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    if os.path.isdir(origem):
+        shutil.rmtree(temporario, ignore_errors=True)
+        shutil.copytree(origem, temporario)
+        shutil.rmtree(destino, ignore_errors=True)
+    else:
+        # copy2 mantém a data: o Parquet compara a do CSV com a que guardou
+        shutil.copy2(origem, temporario)
+    os.replace(temporario, destino)
+
+
+def _tamanho(caminho):
+    if os.path.isdir(caminho):
+        return sum(os.path.getsize(os.path.join(raiz, nome))
+                   for raiz, _, arquivos in os.walk(caminho) for nome in arquivos)
+    return os.path.getsize(caminho)
+
+
+def restaurar(chave, saidas, pasta=PASTA_CACHE):
+    """
+    Se a impressão digital já está no cache, deixa as saídas iguais às
+    guardadas e retorna True. Saída que já é igual não é copiada.
+    """
+    entrada = os.path.join(pasta, chave)
+    try:
+        with open(os.path.join(entrada, ARQUIVO_MANIFESTO), encoding="utf-8") as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError):
+        return False
+    guardadas = {item["saida"]: item for item in manifesto["saidas"]}
+    if any(os.path.normpath(saida) not in guardadas for saida in saidas):
+        return False
+
+    copiadas = 0
+    for saida in saidas:
+        item = guardadas[os.path.normpath(saida)]
+        if os.path.exists(saida) and hash_arquivo(saida, pasta) == item["hash"]:
+            continue
+        _copiar(os.path.join(entrada, item["arquivo"]), saida)
+        copiadas += 1
+    if copiadas:
+        for saida in saidas:
+            if not os.path.isdir(saida):
+                _anotar(saida, guardadas[os.path.normpath(saida)]["hash"], pasta)
+    _salvar_hashes(pasta)
+
+    os.utime(entrada)  # usada agora: vai para o fim da fila de remoção
+    return True
+
+
+def guardar(chave, saidas, pasta=PASTA_CACHE, limite=LIMITE_CACHE_BYTES):
+    """
+    Guarda as saídas (que existirem) com esta impressão digital e
+    depois apaga as entradas antigas que passarem do limite
+    """
+    entrada = os.path.join(pasta, chave)
+    temporaria = f"{entrada}.{os.getpid()}.tmp"
+    shutil.rmtree(temporaria, ignore_errors=True)
+    os.makedirs(temporaria)
+
+    itens = []
+    for i, saida in enumerate(saidas):
+        if not os.path.exists(saida):
+            continue
+        arquivo = f"{i:02d}_{os.path.basename(os.path.normpath(saida))}"
+        _copiar(saida, os.path.join(temporaria, arquivo))
+        itens.append({"saida": os.path.normpath(saida), "arquivo": arquivo,
+                      "hash": hash_arquivo(saida, pasta)})
+    with open(os.path.join(temporaria, ARQUIVO_MANIFESTO), "w", encoding="utf-8") as f:
+        json.dump({"saidas": itens}, f, ensure_ascii=False, indent=2)
+    _salvar_hashes(pasta)
+
+    shutil.rmtree(entrada, ignore_errors=True)
+    os.replace(temporaria, entrada)
+    return limpar(pasta, limite, manter=chave)
+
+
+def limpar(pasta=PASTA_CACHE, limite=LIMITE_CACHE_BYTES, manter=None):
+    """
+    Apaga as entradas usadas há mais tempo até o cache caber no limite
+    Retorna quantas foram apagadas
+    """
+    if not os.path.isdir(pasta):
+        return 0
+    entradas = []
+    for nome in os.listdir(pasta):
+        caminho = os.path.join(pasta, nome)
+        if os.path.isdir(caminho) and not nome.endswith(".tmp"):
+            entradas.append((os.path.getmtime(caminho), _tamanho(caminho), nome, caminho))
+    total = sum(tamanho for _, tamanho, _, _ in entradas)
+
+    apagadas = 0
+    for _, tamanho, nome, caminho in sorted(entradas):
+        if total <= limite:
+            break
+        if nome == manter:
+            continue
+        shutil.rmtree(caminho, ignore_errors=True)
+        total -= tamanho
+        apagadas += 1
+    return apagadas
@@ -0,0 +1,192 @@
+"""
+CADASTRO DE OPERADORAS: índice persistente para o JOIN do Teste 2
+Autora: Mileide Silva de Arruda
+
+O PASSO 5 do Teste 2 fazia pd.merge com o CNPJ em texto: a cada execução
+o pandas calcula o hash de cada CNPJ (string) das despesas e do cadastro.
+
+Aqui o cadastro (Relatorio_cadop.csv da ANS) vira um índice guardado em
+dados/indice_cadastro/, em arquivos .npy abertos com memmap:
+
+    cnpjs.npy       → CNPJ como int64, ORDENADO (busca binária)
+    registro.npy    → Registro ANS de cada CNPJ (int64, -1 = sem registro)
+    modalidade.npy  → código da modalidade (dicionário em meta.json)
+    uf.npy          → código da UF (dicionário em meta.json)
+
+O JOIN converte os CNPJs distintos das despesas para int64 e procura
+todos de uma vez com np.searchsorted. Modalidade e UF saem como
+Categorical (código pequeno + dicionário), sem uma string por linha.
+
+O índice é refeito sozinho quando o arquivo do cadastro muda
+(tamanho ou data de modificação diferentes).
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+CADASTRO_CSV = "dados/Relatorio_cadop.csv"
+PASTA_INDICE = "dados/indice_cadastro"
+VERSAO_INDICE = 1
+
+# Nomes das colunas no arquivo da ANS → nomes usados no pipeline
+COLUNAS_CADOP = {
+    "Registro_ANS": "RegistroANS",
+    "REGISTRO_OPERADORA": "RegistroANS",
+    "Razao_Social": "RazaoSocial",
+}
+POTENCIAS_10 = 10 ** np.arange(13, -1, -1, dtype=np.int64)
+
+
+def _fatorar_cnpjs(serie):
+    """
+    CNPJs distintos como int64 e, para cada linha, qual deles ela tem
+    (cada operadora aparece em muitas linhas: converte e procura uma vez só)
+    Retorna (codigos, chaves); código -1 = CNPJ vazio
+    """
+    codigos, distintos = pd.factorize(serie, use_na_sentinel=True)
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        chaves = np.asarray(distintos, dtype=np.int64)
+        return codigos, np.where((chaves >= 0) & (chaves < 10 ** 14), chaves, -1)
+
+    texto = pd.Series(distintos, dtype=object).astype(str)
+    texto = texto.str.replace(r"\D", "", regex=True)
+    chaves = np.full(len(texto), -1, dtype=np.int64)
+    ok = (texto.str.len() == 14).to_numpy()
+    if ok.any():
+        matriz = np.asarray(texto[ok].to_numpy(dtype=object), dtype="U14").view(np.uint32)
+        chaves[ok] = (matriz.reshape(-1, 14).astype(np.int64) - ord("0")) @ POTENCIAS_10
+    return codigos, chaves
+
+
+def cnpjs_para_inteiros(serie):
+    """
+    CNPJ em texto ("11222333000181" ou "11.222.333/0001-81") → int64
+    O que não tiver 14 dígitos vira -1 (nunca encontra no cadastro)
+    """
+    codigos, chaves = _fatorar_cnpjs(serie)
+    return np.where(codigos >= 0, chaves[codigos], -1)
+
+
+def _codificar(serie, tipo):
+    # Dicionário: cada valor distinto vira um código pequeno (-1 = vazio)
+    codigos, categorias = pd.factorize(serie, use_na_sentinel=True)
+    return codigos.astype(tipo), [str(c) for c in categorias]
+
+
+def construir_indice(df_cadastro):
+    """
+    Índice em memória a partir de um DataFrame com CNPJ, RegistroANS,
+    Modalidade e UF (CNPJ repetido: vale o primeiro)
+    """
+    chaves = cnpjs_para_inteiros(df_cadastro["CNPJ"])
+    validos = pd.Series(chaves)
+    manter = ((validos >= 0) & ~validos.duplicated(keep="first")).to_numpy()
+    ordem = np.argsort(chaves[manter], kind="stable")
+    cadastro = df_cadastro[manter].iloc[ordem]
+
+    modalidade, modalidades = _codificar(cadastro["Modalidade"], np.int16)
+    uf, ufs = _codificar(cadastro["UF"], np.int16)
+    registro = pd.to_numeric(cadastro["RegistroANS"], errors="coerce")
+    return {
+        "cnpjs": chaves[manter][ordem],
+        "registro": registro.fillna(-1).to_numpy(dtype=np.int64),
+        "modalidade": modalidade,
+        "modalidades": modalidades,
+        "uf": uf,
+        "ufs": ufs,
+    }
+
+
+def _ler_cadastro(caminho):
+    opcoes = {"sep": ";", "dtype": str}
+    try:
+        df = pd.read_csv(caminho, encoding="utf-8", **opcoes)
+    except UnicodeDecodeError:
+        # Versões antigas do arquivo da ANS vêm em Latin-1
+        df = pd.read_csv(caminho, encoding="latin-1", **opcoes)
+    return df.rename(columns=COLUNAS_CADOP)
+
+
+def _assinatura(caminho):
+    info = os.stat(caminho)
+    return {"fonte": os.path.abspath(caminho), "tamanho": info.st_size,
+            "modificado_ns": info.st_mtime_ns, "versao": VERSAO_INDICE}
+
+
+def salvar_indice(indice, assinatura, pasta=PASTA_INDICE):
+    # Grava numa pasta nova e troca de uma vez (quem estiver lendo o
+    # índice antigo não vê arquivos pela metade)
+    temporaria = pasta + ".tmp"
+    shutil.rmtree(temporaria, ignore_errors=True)
+    os.makedirs(temporaria)
+    for nome in ("cnpjs", "registro", "modalidade", "uf"):
+        np.save(os.path.join(temporaria, f"{nome}.npy"), indice[nome])
+    meta = {**assinatura, "modalidades": indice["modalidades"], "ufs": indice["ufs"]}
+    with open(os.path.join(temporaria, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.replace(temporaria, pasta)
+
+
+def abrir_indice(pasta=PASTA_INDICE):
+    """
+    Abre o índice gravado (memmap: o sistema lê do disco só o que a busca usar)
+    """
+    with open(os.path.join(pasta, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    indice = {nome: np.load(os.path.join(pasta, f"{nome}.npy"), mmap_mode="r")
+              for nome in ("cnpjs", "registro", "modalidade", "uf")}
+    return {**indice, "modalidades": meta["modalidades"], "ufs": meta["ufs"], "meta": meta}
+
+
+def carregar_indice(caminho=CADASTRO_CSV, pasta=PASTA_INDICE):
+    """
+    Índice do cadastro: abre o gravado se ainda corresponde ao arquivo,
+    senão lê o CSV, monta e grava de novo
+    """
+    assinatura = _assinatura(caminho)
+    try:
+        indice = abrir_indice(pasta)
+        if {k: indice["meta"].get(k) for k in assinatura} == assinatura:
+            return indice
+    except (OSError, ValueError, KeyError):
+        pass
+    indice = construir_indice(_ler_cadastro(caminho))
+    salvar_indice(indice, assinatura, pasta)
+    return abrir_indice(pasta)
+
+
+def juntar(df, indice, coluna="CNPJ"):
+    """
+    LEFT JOIN das despesas com o cadastro: acrescenta RegistroANS,
+    Modalidade e UF (vazios quando o CNPJ não está no cadastro)
+    """
+    cnpjs = np.asarray(indice["cnpjs"])
+    codigos, chaves = _fatorar_cnpjs(df[coluna])
+
+    # Busca binária só dos CNPJs distintos; cada linha herda pelo código
+    posicao = np.minimum(np.searchsorted(cnpjs, chaves), max(len(cnpjs) - 1, 0))
+    encontrado = (cnpjs[posicao] == chaves) & (chaves >= 0) if len(cnpjs) else np.zeros(len(chaves), bool)
+    linha_no_cadastro = np.where(encontrado, posicao, -1)
+    linha_no_cadastro = np.where(codigos >= 0, linha_no_cadastro[codigos], -1)
+    achou = linha_no_cadastro >= 0
+    posicao = linha_no_cadastro[achou]
+
+    registro = np.zeros(len(df), dtype=np.int64)
+    registro[achou] = indice["registro"][posicao]
+    sem_registro = ~achou | (registro < 0)
+
+    def categorias(codigos_cadastro, nomes):
+        resultado = np.full(len(df), -1, dtype=np.int16)
+        resultado[achou] = codigos_cadastro[posicao]
+        return pd.Categorical.from_codes(resultado, categories=nomes)
+
+    return df.assign(
+        RegistroANS=pd.arrays.IntegerArray(registro, sem_registro),
+        Modalidade=categorias(indice["modalidade"], indice["modalidades"]),
+        UF=categorias(indice["uf"], indice["ufs"]),
+    )
@@ -0,0 +1,200 @@
+"""
+FORMATO COLUNAR: Parquet entre as etapas do pipeline
+Autora: Mileide Silva de Arruda
+
+O Teste 1 grava o consolidado, o Teste 2 lê e grava o agregado, e o
+Teste 4 lê os dois. Em CSV cada etapa precisa reler o texto e adivinhar
+os tipos de novo (o CNPJ virava número e perdia os zeros à esquerda).
+
+Em Parquet os tipos ficam salvos no arquivo, e o consolidado é dividido
+em pastas por Ano/Trimestre (Ano=2024/Trimestre=1/...). Assim quem lê pode
+pedir só as colunas e os trimestres de que precisa.
+
+Cada Parquet guarda o tamanho e a data do CSV que foi gravado junto com
+ele. Quem lê só usa o Parquet se o CSV ainda for aquele (senão, alguém
+gravou o CSV depois e o Parquet ficou velho).
+
+Os CSVs e ZIPs continuam sendo gerados como resultado final.
+Se o pyarrow não estiver instalado, tudo continua funcionando em CSV.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PARQUET_DISPONIVEL = True
+except ImportError:
+    PARQUET_DISPONIVEL = False
+
+CONSOLIDADO_CSV = "dados/consolidado_despesas.csv"
+CONSOLIDADO_PARQUET = "dados/consolidado_despesas.parquet"  # pasta particionada
+AGREGADO_CSV = "dados/despesas_agregadas.csv"
+AGREGADO_PARQUET = "dados/despesas_agregadas.parquet"
+
+# Posição da linha no CSV: a leitura particionada devolve as linhas na
+# ordem das pastas, e é por ela que a ordem do CSV volta
+COLUNA_ORDEM = "_linha"
+# Origem do consolidado (começa com "_": o pyarrow não lê como dados)
+ARQUIVO_ORIGEM = "_origem.json"
+CHAVE_ORIGEM = b"origem_csv"
+
+# Tipos fixos do consolidado (não dependem do que o CSV "parece")
+TIPOS_CONSOLIDADO = {
+    "CNPJ": "string",
+    "RazaoSocial": "string",
+    "Trimestre": "int8",
+    "Ano": "int16",
+    "ValorDespesas": "float64",
+}
+
+
+def _particionamento():
+    return ds.partitioning(
+        pa.schema([("Ano", pa.int16()), ("Trimestre", pa.int8())]),
+        flavor="hive",
+    )
+
+
+def _tipar_consolidado(df):
+    tipos = {coluna: tipo for coluna, tipo in TIPOS_CONSOLIDADO.items() if coluna in df.columns}
+    return df.astype(tipos)
+
+
+def _origem(caminho_csv):
+    """
+    Tamanho e data do CSV: o que o Parquet guarda para saber se ainda vale
+    """
+    if not os.path.exists(caminho_csv):
+        return None
+    info = os.stat(caminho_csv)
+    return {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+
+def salvar_consolidado_parquet(df, pasta=CONSOLIDADO_PARQUET, caminho_csv=CONSOLIDADO_CSV):
+    """
+    Grava o consolidado inteiro em Parquet, particionado por Ano/Trimestre
+    (apaga a versão anterior da pasta). O CSV já deve estar gravado.
+    """
+    shutil.rmtree(pasta, ignore_errors=True)
+    acrescentar_consolidado_parquet(df, pasta, parte=0)
+    concluir_consolidado_parquet(pasta, caminho_csv)
+
+
+def acrescentar_consolidado_parquet(df, pasta=CONSOLIDADO_PARQUET, parte=0, inicio=0):
+    """
+    Acrescenta um pedaço ao consolidado em Parquet (usado no modo streaming).
+    Cada pedaço vira um arquivo novo dentro da partição do seu trimestre.
+    inicio: quantas linhas os pedaços anteriores já gravaram no CSV
+    """
+    df = _tipar_consolidado(df).assign(**{COLUNA_ORDEM: np.arange(inicio, inicio + len(df), dtype="int64")})
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(
+        tabela,
+        pasta,
+        format="parquet",
+        partitioning=_particionamento(),
+        basename_template=f"parte-{parte:05d}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def concluir_consolidado_parquet(pasta=CONSOLIDADO_PARQUET, caminho_csv=CONSOLIDADO_CSV):
+    """
+    Depois do último pedaço (com o CSV já fechado): guarda na pasta a
+    origem do CSV gravado junto
+    """
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, ARQUIVO_ORIGEM), "w", encoding="utf-8") as f:
+        json.dump(_origem(caminho_csv), f)
+
+
+def salvar_agregado_parquet(df, caminho=AGREGADO_PARQUET, caminho_csv=AGREGADO_CSV):
+    """
+    O agregado já é pequeno (uma linha por operadora/UF): um arquivo só,
+    com a origem do CSV nos metadados. O CSV já deve estar gravado.
+    """
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    metadados = {**(tabela.schema.metadata or {}), CHAVE_ORIGEM: json.dumps(_origem(caminho_csv)).encode()}
+    pq.write_table(tabela.replace_schema_metadata(metadados), caminho)
+
+
+def _origem_gravada(caminho_parquet):
+    try:
+        if os.path.isdir(caminho_parquet):
+            with open(os.path.join(caminho_parquet, ARQUIVO_ORIGEM), encoding="utf-8") as f:
+                return json.load(f)
+        return json.loads((pq.read_schema(caminho_parquet).metadata or {})[CHAVE_ORIGEM])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _parquet_atualizado(caminho_parquet, caminho_csv):
+    """
+    Só usa o Parquet se ele existir e tiver sido gravado junto com o CSV
+    que está lá agora (mesmo tamanho e mesma data). A data sozinha não
+    basta: cópias, checkouts e relógios diferentes mudam a ordem das datas.
+    """
+    if not PARQUET_DISPONIVEL or not os.path.exists(caminho_parquet):
+        return False
+    if not os.path.exists(caminho_csv):
+        return True
+    return _origem_gravada(caminho_parquet) == _origem(caminho_csv)
+
+
+def fonte_consolidado(caminho_csv=CONSOLIDADO_CSV, caminho_parquet=CONSOLIDADO_PARQUET):
+    """
+    Arquivo que o carregar_consolidado vai ler: o Parquet se ainda vale, senão o CSV
+    """
+    return caminho_parquet if _parquet_atualizado(caminho_parquet, caminho_csv) else caminho_csv
+
+
+def carregar_consolidado(colunas=None, trimestres=None,
+                         caminho_csv=CONSOLIDADO_CSV, caminho_parquet=CONSOLIDADO_PARQUET):
+    """
+    Carrega o consolidado, do Parquet se possível, senão do CSV
+
+    colunas: lista de colunas para ler (None = todas)
+    trimestres: lista de (ano, trimestre) para ler (None = todos).
+    No Parquet, só as pastas desses trimestres são abertas.
+    """
+    if fonte_consolidado(caminho_csv, caminho_parquet) == caminho_parquet:
+        dataset = ds.dataset(caminho_parquet, format="parquet", partitioning=_particionamento())
+        filtro = None
+        for ano, trimestre in trimestres or []:
+            condicao = (ds.field("Ano") == ano) & (ds.field("Trimestre") == trimestre)
+            filtro = condicao if filtro is None else filtro | condicao
+        tem_ordem = COLUNA_ORDEM in dataset.schema.names
+        lidas = colunas + [COLUNA_ORDEM] if colunas and tem_ordem else colunas
+        df = dataset.to_table(columns=lidas, filter=filtro).to_pandas()
+        # As linhas vêm na ordem das pastas: volta a ordem do CSV
+        if tem_ordem:
+            df = df.sort_values(COLUNA_ORDEM, kind="stable", ignore_index=True)
+        # Ano/Trimestre vêm das pastas e ficam no fim: volta a ordem das colunas
+        ordem = colunas or [c for c in TIPOS_CONSOLIDADO if c in df.columns]
+        return _tipar_consolidado(df[ordem])
+
+    # Fallback: CSV (lê tudo e filtra depois)
+    df = pd.read_csv(caminho_csv, dtype={"CNPJ": str})
+    if trimestres:
+        pares = pd.MultiIndex.from_frame(df[["Ano", "Trimestre"]])
+        df = df[pares.isin(list(trimestres))]
+    if colunas:
+        df = df[colunas]
+    return _tipar_consolidado(df.reset_index(drop=True))
+
+
+def carregar_agregado(caminho_csv=AGREGADO_CSV, caminho_parquet=AGREGADO_PARQUET):
+    """
+    Carrega o agregado, do Parquet se possível, senão do CSV
+    """
+    if _parquet_atualizado(caminho_parquet, caminho_csv):
+        return pd.read_parquet(caminho_parquet)
+    return pd.read_csv(caminho_csv)
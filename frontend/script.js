@@ -14,8 +14,16 @@ console.log("🤔 TRADE-OFF TÉCNICO: Onde fazer a busca?");
 console.log("   Opção A: No servidor → Mais lento, precisa de internet");
 console.log("   Opção B: No cliente → Mais rápido, funciona offline");
 console.log("   Opção C: Híbrido → Complexo");
-console.log("   ✅ ESCOLHI: Busca no cliente");
-console.log("   POR QUÊ: Dados pequenos, melhor experiência do usuário");
+console.log("   ✅ ESCOLHI: Busca no servidor (/api/operadoras/search)");
+console.log("   POR QUÊ: Os dados reais não cabem no navegador; o servidor busca");
+console.log("   em todas as operadoras com um índice, sem acentos (saude = Saúde)");
+console.log("   Sem API, a busca local nos dados de exemplo continua funcionando");
+
+const URL_BUSCA = 'http://localhost:5001/api/operadoras/search';
+const ESPERA_BUSCA_MS = 250;   // espera o usuário parar de digitar
+const LIMITE_BUSCA = 100;
+let temporizadorBusca = null;
+let ultimaBusca = 0;
 
 // ============================================
 // 1. CARREGAR DADOS DA API
@@ -64,25 +72,58 @@ async function carregarDados() {
 }
 
 // ============================================
-// 2. FILTRAR TABELA (busca local)
+// 2. FILTRAR TABELA (busca no servidor)
 // ============================================
 function filtrarTabela() {
-    const termo = document.getElementById('searchInput').value.toLowerCase();
+    clearTimeout(temporizadorBusca);
+    temporizadorBusca = setTimeout(buscarNoServidor, ESPERA_BUSCA_MS);
+}
+
+async function buscarNoServidor() {
+    const termo = document.getElementById('searchInput').value.trim();
+    const numeroBusca = ++ultimaBusca;
 
     if (!termo) {
         operadorasFiltradas = [...todasOperadoras];
-    } else {
-        operadorasFiltradas = todasOperadoras.filter(op =>
-            op.RazaoSocial.toLowerCase().includes(termo) ||
-            op.CNPJ.includes(termo) ||
-            op.UF.toLowerCase().includes(termo)
-        );
+        paginaAtual = 1;
+        atualizarTabela();
+        return;
+    }
+
+    try {
+        const resposta = await fetch(`${URL_BUSCA}?q=${encodeURIComponent(termo)}&limit=${LIMITE_BUSCA}`);
+        const dados = await resposta.json();
+
+        // Uma resposta antiga que chegou atrasada não sobrescreve a nova
+        if (numeroBusca !== ultimaBusca) return;
+
+        if (!dados.success) {
+            throw new Error(dados.error || 'Erro na busca');
+        }
+        operadorasFiltradas = dados.data;
+        console.log(`🔍 "${termo}": ${dados.pagination.total} operadoras encontradas`);
+
+    } catch (erro) {
+        if (numeroBusca !== ultimaBusca) return;
+        console.log("⚠️  Busca no servidor indisponível, filtrando localmente...");
+        operadorasFiltradas = filtrarLocalmente(termo);
     }
 
     paginaAtual = 1;
     atualizarTabela();
 }
 
+function filtrarLocalmente(termo) {
+    const normalizar = texto => String(texto).normalize('NFD').replace(/[\u0300-\u036f]/g, '').toLowerCase();
+    const busca = normalizar(termo);
+
+    return todasOperadoras.filter(op =>
+        normalizar(op.RazaoSocial).includes(busca) ||
+        op.CNPJ.includes(termo) ||
+        normalizar(op.UF).includes(busca)
+    );
+}
+
 // ============================================
 // 3. ATUALIZAR TABELA
 // ============================================
@@ -0,0 +1,275 @@
+"""
+MÉTRICAS: tempo de cada etapa do pipeline e de cada rota da API
+Autora: Mileide Silva de Arruda
+
+Antes, a única forma de acompanhar uma execução eram os prints. Aqui
+ficam as medidas, todas em memória e no próprio processo:
+
+    etapa("validar")      → tempo, linhas e linhas/s de uma etapa do
+                            pipeline (Teste 1, Teste 2, carga da API)
+    registrar_requisicao  → latência de cada rota da API
+    texto_prometheus()    → tudo no formato texto do Prometheus (/metrics)
+    salvar_relatorio()    → relatório JSON de uma execução do pipeline
+    perfilar()            → cProfile de uma execução inteira (ou, na API,
+                            de uma requisição com ?perfil=1), só quando a
+                            variável ANS_PERFIL está definida
+
+As latências guardam as últimas AMOSTRAS_METRICAS medidas de cada série
+(janela deslizante) para o p50/p95/p99; contagem e soma são do processo
+inteiro, como num "summary" do Prometheus.
+"""
+
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import resource  # não existe no Windows
+except ImportError:
+    resource = None
+
+AMOSTRAS_METRICAS = 2048
+PASTA_RELATORIOS = "dados/relatorios"
+PASTA_PERFIS = "dados/perfis"
+PERFIL_ATIVO = bool(os.environ.get("ANS_PERFIL"))
+
+_trava = threading.Lock()
+_series = {}        # (nome da métrica, rótulos) → contagem, soma, amostras
+_contadores = {}    # (nome da métrica, rótulos) → valor
+_execucao = None    # execução do pipeline em andamento (para o relatório)
+
+AJUDA = {
+    "ans_etapa_segundos": "Tempo de cada etapa do pipeline",
+    "ans_etapa_linhas_total": "Linhas processadas por etapa",
+    "ans_http_requisicao_segundos": "Latência das rotas da API",
+    "ans_http_requisicoes_total": "Requisições atendidas por rota e código HTTP",
+}
+
+
+def memoria_pico_bytes(filhos=False):
+    """
+    Pico de memória residente (RSS) do processo (ou dos processos filhos)
+    """
+    if resource is None:
+        return None
+    uso = resource.getrusage(resource.RUSAGE_CHILDREN if filhos else resource.RUSAGE_SELF)
+    # Linux informa em KB, macOS em bytes
+    return uso.ru_maxrss if sys.platform == "darwin" else uso.ru_maxrss * 1024
+
+
+def _observar(nome, rotulos, segundos):
+    chave = (nome, tuple(sorted(rotulos.items())))
+    with _trava:
+        serie = _series.get(chave)
+        if serie is None:
+            serie = _series[chave] = {"n": 0, "soma": 0.0, "amostras": deque(maxlen=AMOSTRAS_METRICAS)}
+        serie["n"] += 1
+        serie["soma"] += segundos
+        serie["amostras"].append(segundos)
+
+
+def _somar(nome, rotulos, valor=1):
+    chave = (nome, tuple(sorted(rotulos.items())))
+    with _trava:
+        _contadores[chave] = _contadores.get(chave, 0) + valor
+
+
+def percentis(amostras):
+    if not amostras:
+        return {"n": 0}
+    ms = np.fromiter(amostras, float) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99]).tolist()
+    return {"n": len(ms), "p50_ms": round(p50, 3), "p95_ms": round(p95, 3),
+            "p99_ms": round(p99, 3), "max_ms": round(float(ms.max()), 3)}
+
+# -----------------------------------------------------------------
+# PIPELINE: etapas e relatório da execução
+# -----------------------------------------------------------------
+def iniciar_execucao(nome):
+    """
+    Começa o relatório de uma execução (Teste 1, Teste 2...)
+    """
+    global _execucao
+    _execucao = {
+        "execucao": nome,
+        "inicio": datetime.now().isoformat(timespec="seconds"),
+        "argumentos": sys.argv[1:],
+        "python": platform.python_version(),
+        "etapas": [],
+        "_relogio": time.perf_counter(),
+    }
+
+
+@contextmanager
+def etapa(nome, linhas=None):
+    """
+    Mede uma etapa. As linhas podem ser informadas depois:
+
+        with metricas.etapa("validar") as e:
+            df = aplicar_regras(df)
+            e["linhas"] = len(df)
+    """
+    medida = {"etapa": nome, "linhas": linhas}
+    inicio = time.perf_counter()
+    try:
+        yield medida
+    finally:
+        segundos = time.perf_counter() - inicio
+        medida["segundos"] = round(segundos, 4)
+        if medida["linhas"] is not None:
+            medida["linhas_por_s"] = round(medida["linhas"] / segundos) if segundos > 0 else None
+            _somar("ans_etapa_linhas_total", {"etapa": nome}, medida["linhas"])
+        pico = memoria_pico_bytes()
+        medida["rss_pico_mb"] = round(pico / 2**20, 1) if pico else None
+        _observar("ans_etapa_segundos", {"etapa": nome}, segundos)
+        if _execucao is not None:
+            _execucao["etapas"].append(medida)
+
+
+def salvar_relatorio(pasta=PASTA_RELATORIOS):
+    """
+    Grava o relatório JSON da execução atual e retorna o caminho
+    """
+    if _execucao is None:
+        return None
+    relatorio = {k: v for k, v in _execucao.items() if not k.startswith("_")}
+    relatorio["segundos_total"] = round(time.perf_counter() - _execucao["_relogio"], 4)
+    pico, pico_filhos = memoria_pico_bytes(), memoria_pico_bytes(filhos=True)
+    relatorio["rss_pico_mb"] = round(pico / 2**20, 1) if pico else None
+    relatorio["rss_pico_filhos_mb"] = round(pico_filhos / 2**20, 1) if pico_filhos else None
+
+    os.makedirs(pasta, exist_ok=True)
+    carimbo = datetime.now().strftime("%Y%m%d_%H%M%S")
+    caminho = os.path.join(pasta, f"{relatorio['execucao']}_{carimbo}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    return caminho
+
+# -----------------------------------------------------------------
+# API: latência por rota
+# -----------------------------------------------------------------
+def registrar_requisicao(rota, metodo, codigo, segundos):
+    rotulos = {"rota": rota, "metodo": metodo}
+    _observar("ans_http_requisicao_segundos", rotulos, segundos)
+    _somar("ans_http_requisicoes_total", {**rotulos, "codigo": str(codigo)})
+
+
+def resumo_rotas():
+    """
+    p50/p95/p99 de cada rota (para o /api/status)
+    """
+    with _trava:
+        series = [(dict(r), list(s["amostras"])) for (nome, r), s in _series.items()
+                  if nome == "ans_http_requisicao_segundos"]
+    return {f"{r['metodo']} {r['rota']}": percentis(amostras) for r, amostras in series}
+
+# -----------------------------------------------------------------
+# FORMATO PROMETHEUS
+# -----------------------------------------------------------------
+def _rotulos(rotulos):
+    if not rotulos:
+        return ""
+    partes = []
+    for chave, valor in rotulos:
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        partes.append(f'{chave}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+
+def texto_prometheus(extras=None):
+    """
+    Todas as métricas no formato texto do Prometheus (versão 0.0.4)
+    extras: {nome: valor} de medidas instantâneas (gauges) do chamador
+    """
+    with _trava:
+        series = [(nome, rotulos, s["n"], s["soma"], list(s["amostras"]))
+                  for (nome, rotulos), s in _series.items()]
+        contadores = list(_contadores.items())
+
+    linhas = []
+    vistos = set()
+
+    def cabecalho(nome, tipo):
+        if nome not in vistos:
+            vistos.add(nome)
+            if nome in AJUDA:
+                linhas.append(f"# HELP {nome} {AJUDA[nome]}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+
+    for nome, rotulos, n, soma, amostras in sorted(series, key=lambda s: (s[0], s[1])):
+        cabecalho(nome, "summary")
+        if amostras:
+            quantis = np.percentile(np.fromiter(amostras, float), [50, 95, 99]).tolist()
+            for q, valor in zip(("0.5", "0.95", "0.99"), quantis):
+                linhas.append(f"{nome}{_rotulos(rotulos + (('quantile', q),))} {valor:.6g}")
+        linhas.append(f"{nome}_sum{_rotulos(rotulos)} {soma:.6g}")
+        linhas.append(f"{nome}_count{_rotulos(rotulos)} {n}")
+
+    for (nome, rotulos), valor in sorted(contadores):
+        cabecalho(nome, "counter")
+        linhas.append(f"{nome}{_rotulos(rotulos)} {valor}")
+
+    medidas = {"ans_processo_memoria_pico_bytes": memoria_pico_bytes(), **(extras or {})}
+    for nome, valor in medidas.items():
+        if valor is not None:
+            cabecalho(nome, "gauge")
+            linhas.append(f"{nome} {valor}")
+
+    return "\n".join(linhas) + "\n"
+
+# -----------------------------------------------------------------
+# PERFIL (cProfile), só quando pedido
+# -----------------------------------------------------------------
+def _gravar_perfil(perfil, nome, pasta):
+    os.makedirs(pasta, exist_ok=True)
+    carimbo = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    base = os.path.join(pasta, f"{nome}_{carimbo}")
+    perfil.dump_stats(base + ".prof")  # abre no snakeviz / pstats
+    texto = io.StringIO()
+    pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(30)
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(texto.getvalue())
+    return base + ".prof"
+
+
+def iniciar_perfil():
+    perfil = cProfile.Profile()
+    perfil.enable()
+    return perfil
+
+
+def concluir_perfil(perfil, nome, pasta=PASTA_PERFIS):
+    """
+    Para o cProfile e grava .prof e .txt (top 30 por tempo acumulado)
+    Retorna o caminho do .prof
+    """
+    perfil.disable()
+    return _gravar_perfil(perfil, nome, pasta)
+
+
+@contextmanager
+def perfilar(nome, ativo=None, pasta=PASTA_PERFIS):
+    """
+    Roda o bloco com cProfile. Sem ANS_PERFIL (ou ativo=False) não faz nada.
+    """
+    if not (PERFIL_ATIVO if ativo is None else ativo):
+        yield None
+        return
+    perfil = iniciar_perfil()
+    resultado = {}
+    try:
+        yield resultado
+    finally:
+        resultado["arquivo"] = concluir_perfil(perfil, nome, pasta)
+        print(f"   🔬 Perfil salvo: {resultado['arquivo']}")
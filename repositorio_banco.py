@@ -0,0 +1,462 @@
+"""
+REPOSITÓRIO NO BANCO: as rotas do Teste 4 consultando o teste3_banco.sql
+Autora: Mileide Silva de Arruda
+
+No modo padrão a API guarda tudo em DataFrames na memória. Com a
+variável ANS_BANCO definida, as rotas consultam o banco (carregado pelo
+teste3_carga.py) e só a lista de operadoras para a busca fica na memória.
+Assim a tabela de despesas pode ser maior que a RAM.
+
+Pool de conexões:
+    no máximo POOL_TAMANHO conexões abertas; quem chega com todas em uso
+    espera até POOL_ESPERA_S segundos e, se nenhuma voltar, recebe erro
+    (a API responde 503 em vez de abrir conexões sem limite)
+
+Consultas:
+    sempre com parâmetros (%s), nunca juntando texto do usuário no SQL.
+    No PostgreSQL (psycopg) cada conexão prepara a consulta na primeira
+    vez (prepare_threshold=0) e reaproveita o plano nas seguintes; no
+    SQLite o cache de statements do sqlite3 faz o mesmo papel.
+
+Medidas (em /api/status): tempo de espera por conexão e tempo de cada
+consulta, em p50/p95/p99.
+"""
+
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+import busca_operadoras
+import metricas
+import serializacao_json
+
+POOL_TAMANHO = int(os.environ.get("ANS_POOL_TAMANHO", 5))
+POOL_ESPERA_S = float(os.environ.get("ANS_POOL_ESPERA_S", 5))
+# Tudo o que o repositório guarda (estatísticas, contagens, análises,
+# trimestres, índice da busca) vale no máximo 1 minuto: uma carga nova
+# do teste3_carga.py aparece em todas as rotas ao mesmo tempo
+CACHE_BANCO_S = 60
+AMOSTRAS_MEDIDAS = 2048    # últimas medidas usadas nos percentis
+
+
+class PoolEsgotado(Exception):
+    """Nenhuma conexão livre dentro do tempo de espera"""
+
+# -----------------------------------------------------------------
+# POOL DE CONEXÕES
+# -----------------------------------------------------------------
+def _abrir_conexao(destino):
+    if destino.startswith(("postgres://", "postgresql://")):
+        import psycopg
+        conexao = psycopg.connect(destino, autocommit=True)
+        conexao.prepare_threshold = 0  # prepara já na primeira execução
+        return conexao
+    # Cada conexão é usada por uma thread por vez (o pool garante)
+    conexao = sqlite3.connect(destino, check_same_thread=False, cached_statements=256)
+    conexao.isolation_level = None
+    return conexao
+
+
+def criar_pool(destino, tamanho=POOL_TAMANHO, espera_maxima=POOL_ESPERA_S):
+    """
+    As conexões são abertas sob demanda, até o limite
+    """
+    return {
+        "destino": destino,
+        "tipo": "postgres" if destino.startswith(("postgres://", "postgresql://")) else "sqlite",
+        "tamanho": tamanho,
+        "espera_maxima": espera_maxima,
+        "livres": queue.LifoQueue(),  # LIFO: reusa a conexão mais "quente"
+        "abertas": 0,
+        "trava": threading.Lock(),
+        "esperas": deque(maxlen=AMOSTRAS_MEDIDAS),
+        "consultas": {},
+        "esgotado": 0,
+    }
+
+
+@contextmanager
+def conexao_do_pool(pool):
+    """
+    Pega uma conexão livre (ou abre uma, se ainda couber) e devolve no fim
+    """
+    inicio = time.perf_counter()
+    try:
+        conexao = pool["livres"].get_nowait()
+    except queue.Empty:
+        conexao = None
+        with pool["trava"]:
+            if pool["abertas"] < pool["tamanho"]:
+                pool["abertas"] += 1
+                abrir = True
+            else:
+                abrir = False
+        if abrir:
+            try:
+                conexao = _abrir_conexao(pool["destino"])
+            except Exception:
+                with pool["trava"]:
+                    pool["abertas"] -= 1
+                raise
+        else:
+            try:
+                conexao = pool["livres"].get(timeout=pool["espera_maxima"])
+            except queue.Empty:
+                with pool["trava"]:
+                    pool["esgotado"] += 1
+                raise PoolEsgotado(f"Nenhuma conexão livre em {pool['espera_maxima']}s "
+                                   f"(pool com {pool['tamanho']})")
+    pool["esperas"].append(time.perf_counter() - inicio)
+
+    try:
+        yield conexao
+    except Exception:
+        # Conexão com erro não volta para o pool
+        try:
+            conexao.close()
+        finally:
+            with pool["trava"]:
+                pool["abertas"] -= 1
+        raise
+    else:
+        pool["livres"].put(conexao)
+
+
+def consultar(pool, nome, sql, parametros=()):
+    """
+    Executa uma consulta parametrizada e retorna uma lista de dicionários
+    nome: identifica a consulta nas medidas
+    """
+    if pool["tipo"] == "sqlite":
+        sql = sql.replace("%s", "?")
+    with conexao_do_pool(pool) as conexao:
+        inicio = time.perf_counter()
+        cursor = conexao.cursor()
+        cursor.execute(sql, parametros)
+        colunas = [c[0] for c in cursor.description]
+        linhas = [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+        cursor.close()
+    pool["consultas"].setdefault(nome, deque(maxlen=AMOSTRAS_MEDIDAS)).append(time.perf_counter() - inicio)
+    return linhas
+
+
+def medidas_pool(pool):
+    return {
+        "tamanho": pool["tamanho"],
+        "abertas": pool["abertas"],
+        "livres": pool["livres"].qsize(),
+        "espera_maxima_s": pool["espera_maxima"],
+        "esgotado": pool["esgotado"],
+        "espera_conexao": metricas.percentis(list(pool["esperas"])),
+        "consultas": {nome: metricas.percentis(list(amostras)) for nome, amostras in pool["consultas"].items()},
+    }
+
+# -----------------------------------------------------------------
+# CONSULTAS (mesmos nomes de campo do modo em memória)
+# -----------------------------------------------------------------
+# CAST(... AS DOUBLE PRECISION): DECIMAL vira número no JSON
+# (no SQLite "DOUBLE" também vira REAL)
+CAMPOS_DESPESA = """
+    d.cnpj AS "CNPJ", o.razao_social AS "RazaoSocial",
+    d.trimestre AS "Trimestre", d.ano AS "Ano",
+    CAST(d.valor_despesas AS DOUBLE PRECISION) AS "ValorDespesas", o.uf AS "UF"
+"""
+
+SQL_LISTAR = f"""
+    SELECT {CAMPOS_DESPESA} FROM despesas d JOIN operadoras o ON o.cnpj = d.cnpj
+    ORDER BY d.id LIMIT %s OFFSET %s"""
+
+SQL_LISTAR_UF = f"""
+    SELECT {CAMPOS_DESPESA} FROM despesas d JOIN operadoras o ON o.cnpj = d.cnpj
+    WHERE o.uf = %s ORDER BY d.id LIMIT %s OFFSET %s"""
+
+SQL_CONTAR = "SELECT COUNT(*) AS total FROM despesas"
+
+SQL_CONTAR_UF = """
+    SELECT COUNT(*) AS total FROM despesas d JOIN operadoras o ON o.cnpj = d.cnpj
+    WHERE o.uf = %s"""
+
+# Keyset: a próxima página começa depois da chave (cnpj, ano, trimestre, id)
+# da última linha entregue (usa idx_despesas_chave)
+SQL_CURSOR_INICIO = f"""
+    SELECT {CAMPOS_DESPESA}, d.id AS id FROM despesas d JOIN operadoras o ON o.cnpj = d.cnpj
+    ORDER BY d.cnpj, d.ano, d.trimestre, d.id LIMIT %s"""
+
+SQL_CURSOR = f"""
+    SELECT {CAMPOS_DESPESA}, d.id AS id FROM despesas d JOIN operadoras o ON o.cnpj = d.cnpj
+    WHERE (d.cnpj, d.ano, d.trimestre, d.id) > (%s, %s, %s, %s)
+    ORDER BY d.cnpj, d.ano, d.trimestre, d.id LIMIT %s"""
+
+SQL_OPERADORA = """
+    SELECT o.cnpj AS "CNPJ", o.razao_social AS "RazaoSocial", o.uf AS "UF",
+           CAST(COALESCE(SUM(d.valor_despesas), 0) AS DOUBLE PRECISION) AS despesas
+    FROM operadoras o LEFT JOIN despesas d ON d.cnpj = o.cnpj
+    WHERE o.cnpj = %s
+    GROUP BY o.cnpj, o.razao_social, o.uf"""
+
+SQL_AGREGADO_OPERADORA = """
+    SELECT o.razao_social AS "RazaoSocial", a.uf AS "UF",
+           CAST(a.total_despesas AS DOUBLE PRECISION) AS "TotalDespesas",
+           CAST(a.media_trimestral AS DOUBLE PRECISION) AS "MediaTrimestral",
+           CAST(a.desvio_padrao AS DOUBLE PRECISION) AS "DesvioPadrao"
+    FROM despesas_agregadas a JOIN operadoras o ON o.cnpj = a.cnpj
+    WHERE a.cnpj = %s"""
+
+SQL_HISTORICO = f"""
+    SELECT {CAMPOS_DESPESA} FROM despesas d JOIN operadoras o ON o.cnpj = d.cnpj
+    WHERE d.cnpj = %s ORDER BY d.ano, d.trimestre, d.id"""
+
+SQL_TOTAIS = """
+    SELECT COUNT(*) AS total_operadoras,
+           CAST(COALESCE(SUM(valor_despesas), 0) AS DOUBLE PRECISION) AS total_despesas,
+           CAST(AVG(valor_despesas) AS DOUBLE PRECISION) AS media_despesas
+    FROM despesas"""
+
+SQL_TOP_5 = """
+    SELECT o.razao_social AS "RazaoSocial", a.uf AS "UF",
+           CAST(a.total_despesas AS DOUBLE PRECISION) AS "TotalDespesas",
+           CAST(a.media_trimestral AS DOUBLE PRECISION) AS "MediaTrimestral",
+           CAST(a.desvio_padrao AS DOUBLE PRECISION) AS "DesvioPadrao"
+    FROM despesas_agregadas a JOIN operadoras o ON o.cnpj = a.cnpj
+    ORDER BY a.total_despesas DESC LIMIT 5"""
+
+SQL_POR_UF = """
+    SELECT uf, CAST(SUM(total_despesas) AS DOUBLE PRECISION) AS total
+    FROM despesas_agregadas GROUP BY uf"""
+
+SQL_OPERADORAS_BUSCA = """
+    SELECT o.cnpj AS "CNPJ", o.razao_social AS "RazaoSocial", o.uf AS "UF",
+           CAST(COALESCE(SUM(a.total_despesas), 0) AS DOUBLE PRECISION) AS "ValorDespesas"
+    FROM operadoras o LEFT JOIN despesas_agregadas a ON a.cnpj = o.cnpj
+    GROUP BY o.cnpj, o.razao_social, o.uf"""
+
+
+# Análises (PASSO 5 do teste3_banco.sql): leem só as tabelas de resumo
+SQL_TRIMESTRES = "SELECT ano, trimestre FROM resumo_trimestre ORDER BY ano, trimestre"
+
+SQL_CRESCIMENTO = """
+    SELECT o.cnpj, o.razao_social, o.uf,
+           CAST(COALESCE(p.total_despesas * 1.0 / p.qtd_despesas, 0) AS DOUBLE PRECISION) AS valor_inicial,
+           CAST(COALESCE(u.total_despesas * 1.0 / u.qtd_despesas, 0) AS DOUBLE PRECISION) AS valor_final,
+           CAST(CASE WHEN COALESCE(p.total_despesas, 0) = 0 THEN 0
+                     ELSE (COALESCE(u.total_despesas * 1.0 / u.qtd_despesas, 0) - p.total_despesas * 1.0 / p.qtd_despesas)
+                          / (p.total_despesas * 1.0 / p.qtd_despesas) * 100
+                END AS DOUBLE PRECISION) AS crescimento_percentual
+    FROM operadoras o
+    LEFT JOIN resumo_operadora_trimestre p ON p.cnpj = o.cnpj AND p.ano = %s AND p.trimestre = %s
+    LEFT JOIN resumo_operadora_trimestre u ON u.cnpj = o.cnpj AND u.ano = %s AND u.trimestre = %s
+    ORDER BY crescimento_percentual DESC, o.razao_social
+    LIMIT %s"""
+
+_SQL_TOP_UFS = """
+    SELECT o.uf,
+           CAST(SUM(r.total_despesas) AS DOUBLE PRECISION) AS total_despesas,
+           COUNT(DISTINCT r.cnpj) AS qtd_operadoras,
+           CAST(SUM(r.total_despesas) * 1.0 / SUM(r.qtd_despesas) AS DOUBLE PRECISION) AS media_por_operadora
+    FROM resumo_operadora_trimestre r JOIN operadoras o ON o.cnpj = r.cnpj
+    {filtro}
+    GROUP BY o.uf
+    ORDER BY total_despesas DESC, o.uf
+    LIMIT %s"""
+SQL_TOP_UFS = _SQL_TOP_UFS.format(filtro="")
+SQL_TOP_UFS_TRIMESTRE = _SQL_TOP_UFS.format(filtro="WHERE r.ano = %s AND r.trimestre = %s")
+
+SQL_ACIMA_DA_MEDIA = """
+    SELECT o.cnpj, o.razao_social,
+           COUNT(*) AS trimestres_com_dados,
+           SUM(r.vezes_acima) AS vezes_acima_da_media
+    FROM resumo_operadora_trimestre r JOIN operadoras o ON o.cnpj = r.cnpj
+    GROUP BY o.cnpj, o.razao_social
+    HAVING SUM(r.vezes_acima) >= %s
+    ORDER BY vezes_acima_da_media DESC, o.razao_social
+    LIMIT %s"""
+
+MAXIMO_ANALISES_GUARDADAS = 256  # combinações de parâmetros guardadas
+
+
+def _arredondar(linhas, colunas):
+    for linha in linhas:
+        for coluna in colunas:
+            if linha[coluna] is not None:
+                linha[coluna] = round(linha[coluna], 2)
+    return linhas
+
+def criar_repositorio(pool, serializar):
+    """
+    Mesma interface do repositório em memória do teste4_api.py
+    (dicionário de funções). serializar: função que gera o JSON das
+    estatísticas (a do Flask, para sair igual ao modo em memória)
+    """
+    estado = {"cache": None}
+    trava = threading.Lock()
+
+    def cache_atual(descartar=False):
+        """
+        Geração atual do que foi guardado. Cada consulta pega a geração uma
+        vez e grava nela: se ela venceu no meio do cálculo, o resultado vai
+        para a geração velha, não para a nova
+        """
+        with trava:
+            cache = estado["cache"]
+            if descartar or cache is None or time.monotonic() - cache["desde"] > CACHE_BANCO_S:
+                cache = estado["cache"] = {"desde": time.monotonic(), "busca": None, "estatisticas": None,
+                                           "analises": {}, "contagens": {}, "trava": threading.Lock()}
+            return cache
+
+    def guardar(guardados, chave, valor):
+        with trava:
+            if len(guardados) >= MAXIMO_ANALISES_GUARDADAS:
+                guardados.clear()
+            guardados[chave] = valor
+        return valor
+
+    def contar(uf=None):
+        # COUNT(*) varre despesas inteira: uma vez por filtro em cada geração
+        contagens = cache_atual()["contagens"]
+        if uf in contagens:
+            return contagens[uf]
+        if uf:
+            total = consultar(pool, "contar_uf", SQL_CONTAR_UF, (uf,))[0]["total"]
+        else:
+            total = consultar(pool, "contar", SQL_CONTAR)[0]["total"]
+        return guardar(contagens, uf, total)
+
+    def listar(page, limit, uf=None):
+        offset = (page - 1) * limit
+        if uf:
+            dados = consultar(pool, "listar_uf", SQL_LISTAR_UF, (uf.upper(), limit, offset))
+        else:
+            dados = consultar(pool, "listar", SQL_LISTAR, (limit, offset))
+        return dados, contar(uf.upper() if uf else None)
+
+    def cursor(ultima, limit):
+        # Pede uma linha a mais só para saber se existe próxima página
+        if ultima is None:
+            linhas = consultar(pool, "cursor", SQL_CURSOR_INICIO, (limit + 1,))
+        else:
+            linhas = consultar(pool, "cursor", SQL_CURSOR, (*ultima, limit + 1))
+        proxima = None
+        if len(linhas) > limit:
+            linhas = linhas[:limit]
+            u = linhas[-1]
+            proxima = (u["CNPJ"], int(u["Ano"]), int(u["Trimestre"]), int(u["id"]))
+        for linha in linhas:
+            del linha["id"]
+        return linhas, proxima, None
+
+    def detalhes(cnpj):
+        operadora = consultar(pool, "operadora", SQL_OPERADORA, (cnpj,))
+        if not operadora:
+            return None
+        o = operadora[0]
+        return {
+            "cnpj": o["CNPJ"],
+            "razao_social": o["RazaoSocial"],
+            "uf": o["UF"],
+            "despesas": o["despesas"],
+            "agregado": consultar(pool, "agregado_operadora", SQL_AGREGADO_OPERADORA, (cnpj,)),
+        }
+
+    def despesas(cnpj):
+        return consultar(pool, "historico", SQL_HISTORICO, (cnpj,)) or None
+
+    def estatisticas():
+        # Varre a tabela de despesas: uma vez por geração (a trava da
+        # geração evita várias requisições calculando ao mesmo tempo)
+        cache = cache_atual()
+        with cache["trava"]:
+            if cache["estatisticas"] is None:
+                # Total em centavos exatos, igual ao modo em memória
+                totais = _arredondar(consultar(pool, "totais", SQL_TOTAIS), ["total_despesas"])[0]
+                dados = {
+                    **totais,
+                    "top_5_operadoras": consultar(pool, "top_5", SQL_TOP_5),
+                    "distribuicao_uf": {l["uf"]: l["total"] for l in consultar(pool, "por_uf", SQL_POR_UF)},
+                }
+                corpo = serializar({"success": True, "data": dados})
+                cache["estatisticas"] = {"corpo": corpo,
+                                         "etag": hashlib.sha1(corpo.encode("utf-8")).hexdigest()[:16]}
+            return cache["estatisticas"]
+
+    def indice_busca():
+        # A lista de operadoras é pequena (uma linha por CNPJ): fica na memória
+        cache = cache_atual()
+        with cache["trava"]:
+            if cache["busca"] is None:
+                operadoras = pd.DataFrame(consultar(pool, "operadoras_busca", SQL_OPERADORAS_BUSCA),
+                                          columns=["CNPJ", "RazaoSocial", "UF", "ValorDespesas"])
+                cache["busca"] = busca_operadoras.construir_indice_busca(operadoras)
+            return cache["busca"]
+
+    def buscar(q, page, limit):
+        resultados, total = busca_operadoras.buscar(indice_busca(), q, limite=limit, pagina=page)
+        return serializacao_json.registros(resultados), total
+
+    def analise(chave, calcular):
+        # Os resumos só mudam numa carga: mesma validade das estatísticas
+        analises = cache_atual()["analises"]
+        if chave in analises:
+            return analises[chave]
+        return guardar(analises, chave, calcular())
+
+    def trimestres():
+        return analise(("trimestres",), lambda: [
+            (int(l["ano"]), int(l["trimestre"])) for l in consultar(pool, "trimestres", SQL_TRIMESTRES)])
+
+    def crescimento(inicio, fim, limite):
+        return analise(("crescimento", inicio, fim, limite), lambda: _arredondar(
+            consultar(pool, "crescimento", SQL_CRESCIMENTO, (*inicio, *fim, limite)),
+            ["valor_inicial", "valor_final", "crescimento_percentual"]))
+
+    def top_ufs(trimestre, limite):
+        if trimestre is None:
+            calcular = lambda: consultar(pool, "top_ufs", SQL_TOP_UFS, (limite,))
+        else:
+            calcular = lambda: consultar(pool, "top_ufs", SQL_TOP_UFS_TRIMESTRE, (*trimestre, limite))
+        return analise(("top_ufs", trimestre, limite),
+                       lambda: _arredondar(calcular(), ["media_por_operadora"]))
+
+    def acima_da_media(minimo, limite):
+        return analise(("acima_da_media", minimo, limite), lambda: consultar(
+            pool, "acima_da_media", SQL_ACIMA_DA_MEDIA, (minimo, limite)))
+
+    def status():
+        agregados = consultar(pool, "contar_agregado", "SELECT COUNT(*) AS total FROM despesas_agregadas")[0]
+        guardadas = cache_atual()["estatisticas"]
+        return {
+            "modo": "banco",
+            "banco": pool["tipo"],
+            "versao": guardadas["etag"] if guardadas else None,
+            "registros": contar(),
+            "registros_agregados": agregados["total"],
+            "pool": medidas_pool(pool),
+        }
+
+    def recarregar():
+        # Os dados já estão no banco: só começa uma geração nova
+        cache_atual(descartar=True)
+        indice_busca()
+        estatisticas()
+        return status()
+
+    return {
+        "listar": listar,
+        "cursor": cursor,
+        "detalhes": detalhes,
+        "despesas": despesas,
+        "estatisticas": estatisticas,
+        "buscar": buscar,
+        "status": status,
+        "recarregar": recarregar,
+        "trimestres": trimestres,
+        "crescimento": crescimento,
+        "top_ufs": top_ufs,
+        "acima_da_media": acima_da_media,
+    }
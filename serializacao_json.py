@@ -0,0 +1,121 @@
+"""
+SERIALIZAÇÃO JSON: respostas da API sem to_dict('records') + jsonify
+Autora: Mileide Silva de Arruda
+
+O caminho antigo de cada listagem era:
+
+    df.iloc[...].to_dict('records')  → um dict por linha, valores NumPy
+    jsonify(...)                     → json da biblioteca padrão, em Python
+
+Aqui:
+
+    registros(df)  → lê cada coluna de uma vez (tolist() devolve tipos
+                     nativos do Python) e monta as linhas com zip
+    ProvedorJSON   → o JSON do Flask passa a ser gerado pelo orjson (em C),
+                     que entende tipos do NumPy e escreve NaN como null
+
+Sem o orjson instalado, continua usando o json da biblioteca padrão,
+trocando NaN por null antes (NaN não é JSON válido).
+"""
+
+import json
+import math
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_DISPONIVEL = True
+    # Datas passam pelo default: mesmo formato do Flask (e do caminho sem orjson)
+    OPCOES_ORJSON = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+except ImportError:
+    ORJSON_DISPONIVEL = False
+
+
+def registros(df):
+    """
+    Mesmo resultado de df.to_dict('records'), montado coluna a coluna
+    """
+    colunas = [str(c) for c in df.columns]
+    valores = [df[c].tolist() for c in df.columns]
+    return [dict(zip(colunas, linha)) for linha in zip(*valores)]
+
+
+def _converter(valor):
+    """
+    Tipos que nem o orjson nem o json conhecem
+    """
+    if valor is pd.NA or valor is pd.NaT:
+        return None
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    if isinstance(valor, pd.Timestamp):
+        return valor.isoformat()
+    # datas, Decimal (PostgreSQL), dataclasses: como o Flask já fazia
+    return DefaultJSONProvider.default(valor)
+
+
+def _sem_nan(valor):
+    # Só para o caminho sem orjson: NaN/infinito viram null
+    if isinstance(valor, dict):
+        return {k: _sem_nan(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_sem_nan(v) for v in valor]
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+def codificar(dados, sort_keys=False, indent=None, default=_converter):
+    """
+    Objeto Python → bytes JSON (UTF-8, compacto)
+    indent: só None ou 2 (o orjson não tem outros recuos)
+    """
+    if indent not in (None, 2):
+        raise ValueError("indent só pode ser None ou 2")
+    if ORJSON_DISPONIVEL:
+        opcoes = OPCOES_ORJSON
+        if sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        if indent:
+            opcoes |= orjson.OPT_INDENT_2
+        return orjson.dumps(dados, default=default, option=opcoes)
+    return json.dumps(_sem_nan(dados), default=default, ensure_ascii=False, sort_keys=sort_keys,
+                      indent=indent, separators=None if indent else (",", ":")).encode("utf-8")
+
+
+class ProvedorJSON(DefaultJSONProvider):
+    """
+    JSON do Flask (jsonify, app.json.dumps) gerado por codificar()
+    """
+    sort_keys = False  # chaves na ordem em que as rotas montam as respostas
+
+    def default(self, o):
+        return _converter(o)
+
+    def dumps(self, obj, **kwargs):
+        # sort_keys e indent (None ou 2) passam adiante; o resto não tem
+        # equivalente no orjson e é recusado em vez de ignorado
+        opcoes = {"sort_keys": kwargs.pop("sort_keys", self.sort_keys), "indent": kwargs.pop("indent", None)}
+        if kwargs:
+            raise TypeError(f"Opções de JSON não suportadas: {', '.join(sorted(kwargs))}")
+        return codificar(obj, default=self.default, **opcoes).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if ORJSON_DISPONIVEL:
+            return orjson.loads(s)
+        return json.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Mesmas regras do jsonify: um argumento, vários (lista) ou só nomeados
+        if args and kwargs:
+            raise TypeError("jsonify() aceita argumentos posicionais ou nomeados, não os dois")
+        dados = kwargs if not args else args[0] if len(args) == 1 else list(args)
+        return current_app.response_class(self.dumps(dados), mimetype="application/json")
@@ -0,0 +1,284 @@
+"""
+SERVIDOR DE PRODUÇÃO: as mesmas rotas do Teste 4 sem o servidor de desenvolvimento
+Autora: Mileide Silva de Arruda
+
+O teste4_api.py roda com app.run(debug=True): servidor de desenvolvimento
+do Flask, com debugger, reloader e uma linha de log por requisição.
+Aqui a mesma aplicação roda assim:
+
+    1. Os dados são carregados UMA vez, antes de criar os workers
+    2. Os workers são processos filhos (fork) que herdam os dados já
+       carregados (o sistema só copia a memória que alguém alterar)
+    3. Só o processo principal recarrega: monta o snapshot novo, cria
+       workers novos com ele e encerra os antigos (todos servem a mesma
+       versão, e a memória continua compartilhada)
+    4. Cada worker atende as requisições num pool fixo de threads:
+       leitura de arquivo, consulta ao banco e compressão rodam nessas
+       threads, sem travar quem está aceitando conexões
+    5. Respostas grandes (JSON, texto) vão comprimidas quando o cliente
+       aceita: brotli se o pacote estiver instalado, senão gzip
+
+Uso:
+    python3 servidor_producao.py --workers 4 --threads 8 --porta 8000
+
+Sem fork (Windows), roda um processo só, ainda com o pool de threads.
+"""
+
+import argparse
+import contextlib
+import gzip
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import request
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+try:
+    import brotli
+    BROTLI_DISPONIVEL = True
+except ImportError:
+    BROTLI_DISPONIVEL = False
+
+import teste4_api
+
+app = teste4_api.app
+
+NIVEL_COMPRESSAO = 6        # gzip: 1 (rápido) a 9 (menor)
+TAMANHO_MINIMO_COMPRESSAO = 1024  # abaixo disso não compensa comprimir
+TIPOS_COMPRIMIVEIS = {"application/json", "text/html", "text/plain", "text/css", "application/javascript"}
+INTERVALO_SUPERVISAO = 1    # segundos entre as verificações do processo principal
+
+# -----------------------------------------------------------------
+# COMPRESSÃO
+# -----------------------------------------------------------------
+def ativar_compressao(app, nivel=NIVEL_COMPRESSAO, minimo=TAMANHO_MINIMO_COMPRESSAO):
+    """
+    Comprime as respostas conforme o Accept-Encoding do cliente
+    """
+    @app.after_request
+    def comprimir(resposta):
+        resposta.vary.add("Accept-Encoding")
+        if (resposta.status_code != 200 or resposta.direct_passthrough
+                or "Content-Encoding" in resposta.headers
+                or resposta.mimetype not in TIPOS_COMPRIMIVEIS):
+            return resposta
+
+        corpo = resposta.get_data()
+        if len(corpo) < minimo:
+            return resposta
+
+        aceitas = request.accept_encodings
+        if BROTLI_DISPONIVEL and aceitas["br"]:
+            corpo, codificacao = brotli.compress(corpo, quality=min(nivel, 11)), "br"
+        elif aceitas["gzip"]:
+            corpo, codificacao = gzip.compress(corpo, compresslevel=nivel, mtime=0), "gzip"
+        else:
+            return resposta
+
+        resposta.set_data(corpo)
+        resposta.headers["Content-Encoding"] = codificacao
+        # Os bytes mudaram, o conteúdo não: ETag fraco continua valendo
+        # para o 304 (o If-None-Match compara de forma fraca)
+        etag, _ = resposta.get_etag()
+        if etag:
+            resposta.set_etag(etag, weak=True)
+        return resposta
+
+# -----------------------------------------------------------------
+# SERVIDOR COM POOL DE THREADS
+# -----------------------------------------------------------------
+class AtendenteSilencioso(WSGIRequestHandler):
+    """
+    Sem uma linha no terminal por requisição (erros continuam aparecendo)
+    """
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class ServidorComPool(BaseWSGIServer):
+    """
+    Servidor WSGI do werkzeug, mas cada conexão é atendida por uma
+    thread de um pool fixo (em vez de uma thread nova sem limite)
+    """
+    def __init__(self, host, porta, app, threads):
+        super().__init__(host, porta, app, handler=AtendenteSilencioso)
+        self.threads = threads
+        self.executor = None
+
+    def serve_forever(self, poll_interval=0.5):
+        # O pool é criado aqui, já dentro do worker (threads não
+        # atravessam o fork)
+        self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="atendimento")
+        super().serve_forever(poll_interval)
+
+    def process_request(self, requisicao, endereco):
+        self.executor.submit(self._atender, requisicao, endereco)
+
+    def _atender(self, requisicao, endereco):
+        try:
+            self.finish_request(requisicao, endereco)
+        except Exception:
+            self.handle_error(requisicao, endereco)
+        finally:
+            self.shutdown_request(requisicao)
+
+
+def pedir_recarga():
+    """
+    POST /api/recarregar num worker: quem recarrega é o processo principal,
+    que troca todos os workers de uma vez (nenhum fica com dados antigos)
+    """
+    os.kill(os.getppid(), signal.SIGHUP)
+    situacao = teste4_api.repositorio["status"]()
+    situacao["recarga"] = "agendada"
+    return situacao
+
+
+def rodar_worker(servidor):
+    """
+    Corpo de cada worker (processo filho). SIGTERM termina as requisições
+    em andamento e sai; Ctrl+C e SIGHUP ficam com o processo principal
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    # shutdown() espera o serve_forever sair: precisa ser chamado de outra thread
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=servidor.shutdown).start())
+    teste4_api.repositorio = {**teste4_api.repositorio, "recarregar": pedir_recarga}
+    codigo = 0
+    try:
+        servidor.serve_forever()
+        servidor.executor.shutdown(wait=True)
+    except Exception as e:
+        print(f"   ❌ Worker {os.getpid()} parou com erro: {e}")
+        codigo = 1
+    finally:
+        sys.stdout.flush()
+        os._exit(codigo)
+
+
+def servir(host, porta, workers, threads, monitorar=True):
+    """
+    Abre a porta uma vez e cria os workers (todos aceitam na mesma porta)
+
+    Com vários workers, o processo principal é o único que olha os
+    arquivos e recarrega: monta o snapshot novo uma vez, cria uma geração
+    nova de workers (que herdam o snapshot pelo fork, sem cópia) e encerra
+    a antiga. Assim todos servem a mesma versão e a memória não é
+    duplicada em cada worker. Worker que morre é substituído.
+    """
+    servidor = ServidorComPool(host, porta, app, threads)
+    memoria = not teste4_api.ANS_BANCO
+
+    if workers <= 1 or not hasattr(os, "fork"):
+        if monitorar and memoria:
+            teste4_api.iniciar_monitor()
+        servidor.serve_forever()
+        return
+
+    supervisao = {"recarregar": False, "encerrar": False}
+    atuais = set()   # geração em uso
+    saindo = set()   # geração anterior, terminando as requisições
+
+    def criar_worker():
+        pid = os.fork()
+        if pid == 0:
+            rodar_worker(servidor)
+        atuais.add(pid)
+
+    def trocar_workers():
+        # Modo banco: os dados já estão no banco, workers novos começam sem cache
+        if memoria and not teste4_api.recarregar_dados(forcar=True):
+            return
+        antigos = set(atuais)
+        atuais.clear()
+        for _ in range(workers):
+            criar_worker()
+        for pid in antigos:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+        saindo.update(antigos)
+        print(f"🔄 Workers trocados: {workers} novos, versão {teste4_api.repositorio['status']()['versao']}")
+
+    def recolher_filhos():
+        # Workers que já terminaram (sem bloquear)
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            saindo.discard(pid)
+            if pid in atuais:
+                atuais.discard(pid)
+                if not supervisao["encerrar"]:
+                    print(f"   ⚠️  Worker {pid} parou sozinho; criando outro")
+                    criar_worker()
+
+    signal.signal(signal.SIGHUP, lambda *_: supervisao.update(recarregar=True))
+    signal.signal(signal.SIGTERM, lambda *_: supervisao.update(encerrar=True))
+    for _ in range(workers):
+        criar_worker()
+
+    ultima_vista = teste4_api.snapshot["assinatura"] if memoria else None
+    try:
+        while not supervisao["encerrar"]:
+            time.sleep(INTERVALO_SUPERVISAO)
+            recolher_filhos()
+            if monitorar and memoria:
+                # Mesma regra do iniciar_monitor: assinatura igual em duas verificações seguidas
+                atual = teste4_api.assinatura_arquivos()
+                if atual != teste4_api.snapshot["assinatura"] and atual == ultima_vista:
+                    supervisao["recarregar"] = True
+                ultima_vista = atual
+            if supervisao["recarregar"]:
+                supervisao["recarregar"] = False
+                try:
+                    trocar_workers()
+                except Exception as e:
+                    print(f"   ❌ Erro ao recarregar dados: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisao["encerrar"] = True
+        for pid in atuais | saindo:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+        for pid in atuais | saindo:
+            with contextlib.suppress(ChildProcessError):
+                os.waitpid(pid, 0)
+        servidor.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste 4 - API em modo produção")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processos atendendo (padrão: um por CPU)")
+    parser.add_argument("--threads", type=int, default=8,
+                        help="threads por worker")
+    parser.add_argument("--compressao", type=int, default=NIVEL_COMPRESSAO,
+                        help="nível de compressão (0 desliga)")
+    parser.add_argument("--sem-monitor", action="store_true",
+                        help="não recarregar sozinho quando os arquivos mudam")
+    args = parser.parse_args(argv)
+
+    if args.compressao > 0:
+        ativar_compressao(app, nivel=args.compressao)
+
+    print(f"\n🚀 Servindo em http://{args.host}:{args.porta} "
+          f"({args.workers} workers x {args.threads} threads, "
+          f"compressão: {'brotli/gzip' if BROTLI_DISPONIVEL else 'gzip'} "
+          f"{'nível ' + str(args.compressao) if args.compressao > 0 else 'desligada'})")
+    sys.stdout.flush()
+
+    servir(args.host, args.porta, args.workers, args.threads, monitorar=not args.sem_monitor)
+
+
+if __name__ == "__main__":
+    main()
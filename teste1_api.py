@@ -3,21 +3,37 @@ TESTE 1: Baixar e processar dados da ANS
 Autora: Mileide Silva de Arruda
 """
 
+import argparse
+import contextlib
+import json
 import requests
 import zipfile
 import os
+import shutil
+import sys
+import tempfile
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 
-print("=" * 50)
-print("INICIANDO TESTE 1 - API DA ANS")
-print("=" * 50)
+import cache_etapas
+import formato_colunar
+import metricas
+import zip_paralelo
+
+# Endereço público dos demonstrativos contábeis da ANS
+# (pode ser trocado por um servidor local para testes: --url-base)
+URL_BASE_ANS = "https://dadosabertos.ans.gov.br/FTP/PDA/demonstracoes_contabeis/"
+PASTA_DOWNLOADS = "dados/brutos"
+EXEMPLO_CSV = "dados/exemplo_despesas.csv"
+CONSOLIDADO_ZIP = "consolidado_despesas.zip"
+TAMANHO_BLOCO_DOWNLOAD = 1024 * 1024  # 1 MB por vez no disco
 
 # -----------------------------------------------------------------
 # PASSO 1: Descobrir quais trimestres baixar
 # -----------------------------------------------------------------
-print("\n📅 PASSO 1: Descobrindo os últimos 3 trimestres...")
-
 def descobrir_trimestres():
     """
     Explicação: Os dados são organizados por ano e trimestre.
@@ -51,70 +67,283 @@ def descobrir_trimestres():
 # -----------------------------------------------------------------
 # PASSO 2: Baixar os arquivos
 # -----------------------------------------------------------------
-print("\n⬇️ PASSO 2: Baixando arquivos da ANS...")
+def montar_url(trimestre, url_base=URL_BASE_ANS):
+    """
+    Converte "2024/01/" no endereço do ZIP do trimestre.
+    Exemplo: https://.../demonstracoes_contabeis/2024/1T2024.zip
+    """
+    ano, q = trimestre.strip("/").split("/")
+    return f"{url_base.rstrip('/')}/{ano}/{int(q)}T{ano}.zip"
+
+def criar_sessao(tamanho_pool=4):
+    """
+    Cria uma sessão HTTP compartilhada entre os downloads.
+    A sessão reaproveita as conexões (keep-alive) em vez de abrir
+    uma conexão nova para cada arquivo.
+    """
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=tamanho_pool,
+                            pool_maxsize=tamanho_pool,
+                            max_retries=3)
+    sessao.mount("http://", adaptador)
+    sessao.mount("https://", adaptador)
+    return sessao
 
-def baixar_arquivo(url, nome_arquivo):
+def ler_metadados(nome_arquivo):
+    """
+    Lê o ETag/Last-Modified salvo no último download (arquivo .meta.json)
+    Para um ".part", são os validadores da versão que está sendo baixada
+    """
+    try:
+        with open(nome_arquivo + ".meta.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def salvar_metadados(nome_arquivo, resposta):
+    metadados = {
+        "etag": resposta.headers.get("ETag"),
+        "last_modified": resposta.headers.get("Last-Modified"),
+    }
+    with open(nome_arquivo + ".meta.json", "w", encoding="utf-8") as f:
+        json.dump(metadados, f)
+
+def baixar_arquivo(url, nome_arquivo, sessao=None, tamanho_bloco=TAMANHO_BLOCO_DOWNLOAD):
     """
     Baixa um arquivo da internet e salva no computador
+
+    - Grava em blocos (stream), sem guardar o arquivo inteiro na memória
+    - Se existir um ".part" de uma tentativa anterior, continua de onde
+      parou usando o cabeçalho HTTP Range
+    - Se o arquivo já foi baixado e não mudou no servidor (ETag ou
+      Last-Modified iguais), não baixa de novo
     """
+    sessao = sessao or requests
+    parcial = nome_arquivo + ".part"
+    cabecalhos = {}
+    inicio = 0
+
     try:
         print(f"   Baixando: {nome_arquivo}")
-        resposta = requests.get(url, timeout=10)
-        
-        # Salva o arquivo
-        with open(nome_arquivo, 'wb') as f:
-            f.write(resposta.content)
-        
+
+        if os.path.exists(nome_arquivo):
+            # Já temos o arquivo: só baixa se mudou no servidor
+            metadados = ler_metadados(nome_arquivo)
+            if metadados.get("etag"):
+                cabecalhos["If-None-Match"] = metadados["etag"]
+            if metadados.get("last_modified"):
+                cabecalhos["If-Modified-Since"] = metadados["last_modified"]
+        elif os.path.exists(parcial):
+            # Download interrompido: pede só o que falta
+            inicio = os.path.getsize(parcial)
+            if inicio > 0:
+                cabecalhos["Range"] = f"bytes={inicio}-"
+                # If-Range: se o arquivo mudou, o servidor manda tudo de novo
+                metadados = ler_metadados(parcial)
+                validador = metadados.get("etag") or metadados.get("last_modified")
+                if validador:
+                    cabecalhos["If-Range"] = validador
+
+        with sessao.get(url, headers=cabecalhos, stream=True, timeout=10) as resposta:
+            if resposta.status_code == 304:
+                print(f"   ⏭️  Sem alterações, mantendo: {nome_arquivo}")
+                return True
+
+            if resposta.status_code == 416:
+                # O ".part" não bate com o arquivo do servidor: recomeça
+                for caminho in (parcial, parcial + ".meta.json"):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(caminho)
+                return baixar_arquivo(url, nome_arquivo, sessao, tamanho_bloco)
+
+            resposta.raise_for_status()
+
+            # 206 = servidor aceitou continuar; 200 = arquivo inteiro
+            modo = "ab" if resposta.status_code == 206 else "wb"
+            if modo == "ab":
+                print(f"   ↪️  Retomando a partir de {inicio} bytes")
+
+            # Validadores da versão nova ficam junto do ".part": se o download
+            # cair no meio, o arquivo final antigo continua com os dele
+            # (senão o próximo If-None-Match receberia 304 e o arquivo
+            # desatualizado ficaria para sempre)
+            salvar_metadados(parcial, resposta)
+
+            with open(parcial, modo) as f:
+                for bloco in resposta.iter_content(chunk_size=tamanho_bloco):
+                    f.write(bloco)
+
+        # Só troca o arquivo final (e depois os validadores) quando o download terminou inteiro
+        os.replace(parcial, nome_arquivo)
+        os.replace(parcial + ".meta.json", nome_arquivo + ".meta.json")
+
         print(f"   ✅ Baixado com sucesso!")
         return True
-        
+
     except Exception as e:
         print(f"   ❌ Erro ao baixar: {e}")
         return False
 
-# Na prática, a API da ANS não é tão simples
-# Vou simular com dados de exemplo para o teste
-print("   ⚠️  AVISO: A API real da ANS é complexa.")
-print("   Para este teste, vou criar arquivos de exemplo.")
-print("   Na vida real, você usaria requests.get() na URL da ANS.")
+def baixar_trimestres(trimestres, pasta=PASTA_DOWNLOADS, url_base=URL_BASE_ANS, max_downloads=4):
+    """
+    Baixa todos os trimestres em paralelo (no máximo max_downloads ao mesmo tempo)
+    Retorna a lista de arquivos baixados, na mesma ordem dos trimestres
+    """
+    os.makedirs(pasta, exist_ok=True)
+    sessao = criar_sessao(max_downloads)
+
+    tarefas = []
+    with ThreadPoolExecutor(max_workers=max_downloads) as executor:
+        for trimestre in trimestres:
+            url = montar_url(trimestre, url_base)
+            nome_arquivo = os.path.join(pasta, url.rsplit("/", 1)[-1])
+            futuro = executor.submit(baixar_arquivo, url, nome_arquivo, sessao)
+            tarefas.append((futuro, nome_arquivo))
+
+    sessao.close()
+    return [nome_arquivo for futuro, nome_arquivo in tarefas if futuro.result()]
 
 # -----------------------------------------------------------------
 # PASSO 3: Criar arquivos de exemplo (para teste)
 # -----------------------------------------------------------------
-print("\n📝 PASSO 3: Criando arquivos de exemplo para simulação...")
+def criar_arquivos_exemplo():
+    # Cria pasta para os dados
+    os.makedirs("dados", exist_ok=True)
+
+    # Cria um CSV de exemplo (simulando dados da ANS)
+    dados_exemplo = [
+        ["CNPJ", "RazaoSocial", "Trimestre", "Ano", "ValorDespesas"],
+        ["11222333000144", "HOSPITAL SAO PAULO", "1", "2024", "150000.50"],
+        ["11222333000144", "HOSPITAL SAO PAULO", "2", "2024", "180000.75"],
+        ["22333444000155", "CLINICA SAUDE TOTAL", "1", "2024", "75000.00"],
+        ["22333444000155", "CLINICA SAUDE TOTAL", "2", "2024", "80000.00"],
+        ["33444555000166", "LABORATORIO DIAGNOSTICO", "1", "2024", "50000.25"],
+    ]
 
-# Cria pasta para os dados
-os.makedirs("dados", exist_ok=True)
+    texto = "".join(";".join(linha) + "\n" for linha in dados_exemplo)
 
-# Cria um CSV de exemplo (simulando dados da ANS)
-dados_exemplo = [
-    ["CNPJ", "RazaoSocial", "Trimestre", "Ano", "ValorDespesas"],
-    ["11222333000144", "HOSPITAL SAO PAULO", "1", "2024", "150000.50"],
-    ["11222333000144", "HOSPITAL SAO PAULO", "2", "2024", "180000.75"],
-    ["22333444000155", "CLINICA SAUDE TOTAL", "1", "2024", "75000.00"],
-    ["22333444000155", "CLINICA SAUDE TOTAL", "2", "2024", "80000.00"],
-    ["33444555000166", "LABORATORIO DIAGNOSTICO", "1", "2024", "50000.25"],
-]
+    # Só regrava se mudou: a data do arquivo continua a mesma e o
+    # cache das etapas não precisa ler o conteúdo de novo
+    if os.path.exists(EXEMPLO_CSV):
+        with open(EXEMPLO_CSV, encoding="utf-8") as f:
+            if f.read() == texto:
+                print(f"   ✅ Arquivo de exemplo já existe: {EXEMPLO_CSV}")
+                return
 
-# Salva como CSV
-with open("dados/exemplo_despesas.csv", "w", encoding="utf-8") as f:
-    for linha in dados_exemplo:
-        f.write(";".join(linha) + "\n")
+    # Salva como CSV
+    with open(EXEMPLO_CSV, "w", encoding="utf-8") as f:
+        f.write(texto)
 
-print("   ✅ Arquivo de exemplo criado: dados/exemplo_despesas.csv")
+    print(f"   ✅ Arquivo de exemplo criado: {EXEMPLO_CSV}")
 
 # -----------------------------------------------------------------
 # PASSO 4: Processar os dados
 # -----------------------------------------------------------------
-print("\n🔧 PASSO 4: Processando os dados...")
+TAMANHO_CHUNK = 100_000  # linhas por pedaço no modo streaming
+
+def ler_fonte(caminho, tamanho_chunk=None):
+    """
+    Lê um arquivo de despesas (CSV ou ZIP com CSVs dentro)
+    Sem tamanho_chunk devolve o arquivo inteiro; com tamanho_chunk devolve
+    pedaços de até tamanho_chunk linhas, lidos direto de dentro do ZIP
+    (sem extrair nada para o disco)
+    """
+    # CNPJ como texto para não perder zeros à esquerda
+    opcoes = {"sep": ";", "dtype": {"CNPJ": str}, "chunksize": tamanho_chunk}
 
-def processar_dados():
+    if caminho.lower().endswith(".zip"):
+        with zipfile.ZipFile(caminho) as zipf:
+            for membro in zipf.namelist():
+                if not membro.lower().endswith(".csv"):
+                    continue
+                with zipf.open(membro) as f:
+                    if tamanho_chunk is None:
+                        yield pd.read_csv(f, **opcoes)
+                    else:
+                        with pd.read_csv(f, **opcoes) as leitor:
+                            yield from leitor
+    elif tamanho_chunk is None:
+        yield pd.read_csv(caminho, **opcoes)
+    else:
+        with pd.read_csv(caminho, **opcoes) as leitor:
+            yield from leitor
+
+def aplicar_regras(df, cnpjs_vistos=None, avisar=True, filtrar_trimestres=True):
+    """
+    Aplica as 3 regras de consistência em um DataFrame (ou em um pedaço dele)
+
+    cnpjs_vistos: conjunto com os CNPJs de pedaços anteriores. Com ele a
+    regra "mantém o primeiro" vale para o arquivo todo, não só para o pedaço.
+    filtrar_trimestres: False deixa a regra 3 para depois (modo paralelo)
+    """
+    # 1. CNPJs duplicados com nomes diferentes
+    duplicados = df.duplicated(subset=['CNPJ'], keep='first')
+    if cnpjs_vistos is not None:
+        # Consulta o conjunto só com as linhas do pedaço (custo não cresce
+        # com a quantidade de CNPJs já vistos)
+        cnpjs = df['CNPJ'].to_numpy(dtype=object)
+        duplicados |= np.fromiter((c in cnpjs_vistos for c in cnpjs), bool, len(cnpjs))
+        cnpjs_vistos.update(cnpjs[~duplicados.to_numpy()])
+    if duplicados.any():
+        if avisar:
+            print("   ⚠️  Encontrei CNPJs duplicados")
+        # Mantém o primeiro, marca os demais
+        df = df[~duplicados]
+
+    # 2. Valores negativos ou zerados
+    valores_invalidos = df['ValorDespesas'] <= 0
+    if valores_invalidos.any():
+        if avisar:
+            print("   ⚠️  Encontrei valores inválidos (≤ 0)")
+        # Transforma em 0
+        df = df.assign(ValorDespesas=df['ValorDespesas'].where(~valores_invalidos, 0))
+
+    # 3. Datas inconsistentes
+    # Verifica se trimestre está entre 1 e 4
+    trimestres_invalidos = ~df['Trimestre'].between(1, 4)
+    if filtrar_trimestres and trimestres_invalidos.any():
+        if avisar:
+            print("   ⚠️  Encontrei trimestres inválidos")
+        # Remove os inválidos
+        df = df[~trimestres_invalidos]
+
+    return df
+
+def salvar_parquet(df):
+    """
+    Grava também em Parquet (por Ano/Trimestre) para o Teste 2 e o Teste 4
+    lerem sem precisar interpretar texto de novo
+    """
+    if not formato_colunar.PARQUET_DISPONIVEL:
+        print("   ⚠️  pyarrow não instalado, Parquet não foi gerado")
+        return
+    with metricas.etapa("gravar_parquet", linhas=len(df)):
+        formato_colunar.salvar_consolidado_parquet(df)
+    print(f"   🧱 Parquet salvo: {formato_colunar.CONSOLIDADO_PARQUET}")
+
+def gravar_consolidado(df, nivel_zip=zip_paralelo.NIVEL_ZIP, threads_zip=zip_paralelo.THREADS_ZIP):
+    """
+    Grava o CSV consolidado e o ZIP numa passada só: cada pedaço do CSV
+    vai para o arquivo e para o ZIP, comprimido em paralelo (zip_paralelo.py)
+    """
+    with metricas.etapa("gravar_csv_zip", linhas=len(df)):
+        with zip_paralelo.csv_e_zip(formato_colunar.CONSOLIDADO_CSV, CONSOLIDADO_ZIP,
+                                    nivel=nivel_zip, threads=threads_zip) as escrever:
+            zip_paralelo.escrever_csv(escrever, df)
+    print(f"\n   💾 CSV consolidado salvo: {formato_colunar.CONSOLIDADO_CSV}")
+    print(f"   📦 Arquivo ZIP criado: {CONSOLIDADO_ZIP}")
+
+def processar_dados(fontes=("dados/exemplo_despesas.csv",), parquet=False,
+                    nivel_zip=zip_paralelo.NIVEL_ZIP, threads_zip=zip_paralelo.THREADS_ZIP):
     """
     Lê o arquivo CSV e trata problemas
     """
     try:
-        # Lê o CSV (pode ser ; ou , como separador)
-        df = pd.read_csv("dados/exemplo_despesas.csv", sep=";")
+        # Lê os arquivos inteiros na memória
+        with metricas.etapa("ler") as e:
+            df = pd.concat([pedaco for caminho in fontes for pedaco in ler_fonte(caminho)],
+                           ignore_index=True)
+            e["linhas"] = len(df)
         
         print(f"   📊 Encontrei {len(df)} registros")
         print(f"   📋 Colunas: {list(df.columns)}")
@@ -123,43 +352,18 @@ def processar_dados():
         # TRATAMENTO DE PROBLEMAS (Inconsistências)
         # -----------------------------------------------------------------
         print("\n   🔍 Verificando problemas nos dados...")
-        
-        # 1. CNPJs duplicados com nomes diferentes
-        cnpjs_duplicados = df.duplicated(subset=['CNPJ'], keep=False)
-        if cnpjs_duplicados.any():
-            print("   ⚠️  Encontrei CNPJs duplicados")
-            # Mantém o primeiro, marca os demais
-            df = df.drop_duplicates(subset=['CNPJ'], keep='first')
-        
-        # 2. Valores negativos ou zerados
-        valores_invalidos = df['ValorDespesas'] <= 0
-        if valores_invalidos.any():
-            print("   ⚠️  Encontrei valores inválidos (≤ 0)")
-            # Transforma em 0
-            df.loc[valores_invalidos, 'ValorDespesas'] = 0
-        
-        # 3. Datas inconsistentes
-        # Verifica se trimestre está entre 1 e 4
-        trimestres_invalidos = ~df['Trimestre'].between(1, 4)
-        if trimestres_invalidos.any():
-            print("   ⚠️  Encontrei trimestres inválidos")
-            # Remove os inválidos
-            df = df[~trimestres_invalidos]
+        with metricas.etapa("validar", linhas=len(df)):
+            df = aplicar_regras(df)
         
         # -----------------------------------------------------------------
         # SALVAR RESULTADO FINAL
         # -----------------------------------------------------------------
-        # Salva como CSV consolidado
-        df.to_csv("dados/consolidado_despesas.csv", index=False, encoding="utf-8")
-        print(f"\n   💾 CSV consolidado salvo: dados/consolidado_despesas.csv")
+        # Salva como CSV consolidado (e o ZIP junto)
+        gravar_consolidado(df, nivel_zip, threads_zip)
         print(f"   📊 Total de registros válidos: {len(df)}")
-        
-        # Cria arquivo ZIP
-        import zipfile
-        with zipfile.ZipFile("consolidado_despesas.zip", "w") as zipf:
-            zipf.write("dados/consolidado_despesas.csv")
-        
-        print("   📦 Arquivo ZIP criado: consolidado_despesas.zip")
+
+        if parquet:
+            salvar_parquet(df)
         
         return df
         
@@ -167,9 +371,232 @@ def processar_dados():
         print(f"   ❌ Erro ao processar dados: {e}")
         return None
 
-# Executa o processamento
-df_final = processar_dados()
+def processar_dados_streaming(fontes=("dados/exemplo_despesas.csv",), tamanho_chunk=TAMANHO_CHUNK,
+                              parquet=False, nivel_zip=zip_paralelo.NIVEL_ZIP,
+                              threads_zip=zip_paralelo.THREADS_ZIP):
+    """
+    Mesmo tratamento do processar_dados, mas em pedaços de tamanho fixo.
+    Cada pedaço é tratado e já gravado no CSV consolidado, então a memória
+    usada não cresce com o tamanho dos arquivos (só o conjunto de CNPJs
+    já vistos fica guardado).
+    Retorna o total de registros gravados.
+    """
+    saida = "dados/consolidado_despesas.csv"
+    try:
+        if parquet:
+            shutil.rmtree(formato_colunar.CONSOLIDADO_PARQUET, ignore_errors=True)
+
+        cnpjs_vistos = set()
+        lidos = 0
+        gravados = 0
+        partes = 0
+        primeiro = True
+
+        # Ler, validar e gravar (CSV e ZIP juntos) acontecem pedaço a pedaço: uma etapa só
+        with metricas.etapa("ler_validar_gravar") as e, \
+                zip_paralelo.csv_e_zip(saida, CONSOLIDADO_ZIP, nivel=nivel_zip, threads=threads_zip) as escrever:
+            for caminho in fontes:
+                print(f"   📄 Lendo em pedaços de {tamanho_chunk} linhas: {caminho}")
+                for pedaco in ler_fonte(caminho, tamanho_chunk):
+                    lidos += len(pedaco)
+                    pedaco = aplicar_regras(pedaco, cnpjs_vistos, avisar=False)
+
+                    # Só o primeiro pedaço leva o cabeçalho
+                    zip_paralelo.escrever_csv(escrever, pedaco, cabecalho=primeiro)
+                    if parquet:
+                        formato_colunar.acrescentar_consolidado_parquet(pedaco, parte=partes, inicio=gravados)
+                    primeiro = False
+                    gravados += len(pedaco)
+                    partes += 1
+
+            if primeiro:
+                # Nenhuma linha lida: grava só o cabeçalho
+                zip_paralelo.escrever_csv(escrever, pd.DataFrame(
+                    columns=["CNPJ", "RazaoSocial", "Trimestre", "Ano", "ValorDespesas"]))
+            e["linhas"] = lidos
+
+        print(f"\n   💾 CSV consolidado salvo: {saida}")
+        print(f"   📦 Arquivo ZIP criado: {CONSOLIDADO_ZIP}")
+        print(f"   📊 Registros lidos: {lidos} | válidos: {gravados}")
+
+        if parquet:
+            formato_colunar.concluir_consolidado_parquet()
+            print(f"   🧱 Parquet salvo: {formato_colunar.CONSOLIDADO_PARQUET}")
+
+        return gravados
+
+    except Exception as e:
+        print(f"   ❌ Erro ao processar dados: {e}")
+        return None
+
+def processar_trimestre(caminho, arquivo_parcial, tamanho_chunk=TAMANHO_CHUNK):
+    """
+    Trata UM arquivo de trimestre (roda em um processo separado)
+
+    Aplica só as regras que não dependem dos outros trimestres:
+    - Regra 1 dentro do arquivo (primeira linha de cada CNPJ)
+    - Regra 2 (valores ≤ 0 viram 0)
+    A regra 3 fica para a junção: se a primeira linha de um CNPJ tiver
+    trimestre inválido, o CNPJ inteiro sai do resultado, e isso só dá
+    para saber olhando todos os arquivos na ordem.
+    """
+    cnpjs_vistos = set()
+    partes = []
+    lidos = 0
+    for pedaco in ler_fonte(caminho, tamanho_chunk):
+        lidos += len(pedaco)
+        partes.append(aplicar_regras(pedaco, cnpjs_vistos, avisar=False,
+                                     filtrar_trimestres=False))
+
+    pd.concat(partes, ignore_index=True).to_pickle(arquivo_parcial)
+    return arquivo_parcial, lidos
+
+def processar_dados_paralelo(fontes, workers=os.cpu_count(), tamanho_chunk=TAMANHO_CHUNK,
+                             parquet=False, nivel_zip=zip_paralelo.NIVEL_ZIP,
+                             threads_zip=zip_paralelo.THREADS_ZIP):
+    """
+    Processa cada trimestre em um processo separado e junta os resultados
+
+    Os parciais são juntados na mesma ordem das fontes, então o resultado
+    é igual ao do processar_dados (drop_duplicates keep='first').
+    """
+    try:
+        print(f"   ⚙️  Processando {len(fontes)} arquivos com {workers} processos")
+
+        with tempfile.TemporaryDirectory() as pasta_parcial:
+            with metricas.etapa("ler_validar_trimestres") as e:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futuros = [
+                        executor.submit(processar_trimestre, caminho,
+                                        os.path.join(pasta_parcial, f"parcial_{i:04d}.pkl"),
+                                        tamanho_chunk)
+                        for i, caminho in enumerate(fontes)
+                    ]
+                    resultados = [futuro.result() for futuro in futuros]
+                lidos = e["linhas"] = sum(qtd for _, qtd in resultados)
+
+            df = pd.concat([pd.read_pickle(arquivo) for arquivo, _ in resultados],
+                           ignore_index=True)
+
+        print(f"   📊 Encontrei {lidos} registros")
+
+        # Junção: regra 1 entre trimestres + regra 3
+        print("\n   🔍 Verificando problemas nos dados...")
+        with metricas.etapa("juntar", linhas=len(df)):
+            df = aplicar_regras(df)
+
+        gravar_consolidado(df, nivel_zip, threads_zip)
+        print(f"   📊 Total de registros válidos: {len(df)}")
+
+        if parquet:
+            salvar_parquet(df)
+
+        return df
+
+    except Exception as e:
+        print(f"   ❌ Erro ao processar dados: {e}")
+        return None
+
+# -----------------------------------------------------------------
+# EXECUÇÃO
+# -----------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste 1 - baixar e processar dados da ANS")
+    parser.add_argument("--baixar", action="store_true",
+                        help="baixa os ZIPs reais da ANS em vez de usar o exemplo")
+    parser.add_argument("--fontes", nargs="+", metavar="ARQUIVO",
+                        help="processa estes arquivos (CSV ou ZIP) em vez do exemplo")
+    parser.add_argument("--url-base", default=URL_BASE_ANS,
+                        help="endereço base dos arquivos (ex.: servidor local de testes)")
+    parser.add_argument("--downloads", type=int, default=4,
+                        help="quantos downloads ao mesmo tempo")
+    parser.add_argument("--streaming", action="store_true",
+                        help="processa em pedaços, sem carregar os arquivos inteiros")
+    parser.add_argument("--chunk", type=int, default=TAMANHO_CHUNK,
+                        help="linhas por pedaço no modo --streaming")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processos para tratar os trimestres em paralelo")
+    parser.add_argument("--parquet", action="store_true",
+                        help="grava também o consolidado em Parquet (por Ano/Trimestre)")
+    parser.add_argument("--nivel-zip", type=int, default=zip_paralelo.NIVEL_ZIP, choices=range(1, 10),
+                        metavar="1-9", help="nível de compressão do ZIP (1 = mais rápido, 9 = menor)")
+    parser.add_argument("--threads-zip", type=int, default=zip_paralelo.THREADS_ZIP,
+                        help="threads comprimindo o ZIP ao mesmo tempo")
+    parser.add_argument("--force", action="store_true",
+                        help="processa de novo mesmo com as mesmas entradas (ignora o cache)")
+    args = parser.parse_args(argv)
+    if args.parquet and not formato_colunar.PARQUET_DISPONIVEL:
+        parser.error("--parquet precisa do pyarrow (pip install pyarrow)")
+    metricas.iniciar_execucao("teste1")
+
+    print("=" * 50)
+    print("INICIANDO TESTE 1 - API DA ANS")
+    print("=" * 50)
+
+    print("\n📅 PASSO 1: Descobrindo os últimos 3 trimestres...")
+    trimestres = descobrir_trimestres()
+
+    print("\n⬇️ PASSO 2: Baixando arquivos da ANS...")
+    fontes = [EXEMPLO_CSV]
+    if args.fontes:
+        fontes = args.fontes
+        print(f"   📂 Usando {len(fontes)} arquivos locais")
+    elif args.baixar:
+        with metricas.etapa("download"):
+            fontes = baixar_trimestres(trimestres, url_base=args.url_base,
+                                       max_downloads=args.downloads)
+        print(f"   📦 {len(fontes)} de {len(trimestres)} arquivos disponíveis")
+    else:
+        # Na prática, a API da ANS não é tão simples
+        # Vou simular com dados de exemplo para o teste
+        print("   ⚠️  AVISO: A API real da ANS é complexa.")
+        print("   Para este teste, vou criar arquivos de exemplo.")
+        print("   Para baixar os arquivos reais, use: python teste1_api.py --baixar")
+
+    print("\n📝 PASSO 3: Criando arquivos de exemplo para simulação...")
+    criar_arquivos_exemplo()
+
+    print("\n🔧 PASSO 4: Processando os dados...")
+    # Mesmos arquivos, mesmo código e mesmos parâmetros → mesmas saídas
+    # (cache_etapas.py). O modo (streaming, workers) não entra: o
+    # resultado é o mesmo nos três.
+    saidas = [formato_colunar.CONSOLIDADO_CSV, CONSOLIDADO_ZIP]
+    if args.parquet:
+        saidas.append(formato_colunar.CONSOLIDADO_PARQUET)
+    with metricas.etapa("cache"):
+        chave = cache_etapas.impressao_digital("teste1", fontes,
+                                               {"parquet": args.parquet, "nivel_zip": args.nivel_zip},
+                                               codigo=cache_etapas.modulos_do_projeto(sys.modules[__name__]))
+        reaproveitado = not args.force and cache_etapas.restaurar(chave, saidas)
+
+    if reaproveitado:
+        print(f"   ♻️  Entradas iguais às de uma execução anterior: saídas do cache ({chave[:12]})")
+        print("   Para processar de novo: python teste1_api.py --force")
+        df_final = None
+    else:
+        zip_opcoes = {"nivel_zip": args.nivel_zip, "threads_zip": args.threads_zip}
+        if args.workers > 1 and len(fontes) <= 1:
+            # O paralelo divide por arquivo: com um só, não há o que dividir
+            print(f"   ⚠️  --workers {args.workers} ignorado: só {len(fontes)} arquivo para processar, "
+                  f"seguindo {'em streaming' if args.streaming else 'em memória'}")
+        if args.workers > 1 and len(fontes) > 1:
+            df_final = processar_dados_paralelo(fontes, args.workers, args.chunk, args.parquet, **zip_opcoes)
+        elif args.streaming:
+            df_final = processar_dados_streaming(fontes, args.chunk, args.parquet, **zip_opcoes)
+        else:
+            df_final = processar_dados(fontes, args.parquet, **zip_opcoes)
+        if df_final is not None:
+            with metricas.etapa("cache_guardar"):
+                cache_etapas.guardar(chave, saidas)
+
+    print(f"\n   ⏱️  Relatório da execução: {metricas.salvar_relatorio()}")
+
+    print("\n" + "=" * 50)
+    print("✅ TESTE 1 CONCLUÍDO!")
+    print("=" * 50)
+    return df_final
 
-print("\n" + "=" * 50)
-print("✅ TESTE 1 CONCLUÍDO!")
-print("=" * 50)
\ No newline at end of file
+if __name__ == "__main__":
+    # ANS_PERFIL=1 python3 teste1_api.py → grava o cProfile em dados/perfis/
+    with metricas.perfilar("teste1"):
+        main()
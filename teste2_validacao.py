@@ -3,17 +3,28 @@ TESTE 2: Validar e enriquecer dados
 Autora: Mileide Silva de Arruda
 """
 
+import argparse
+import os
+import numpy as np
 import pandas as pd
 import re
+import sys
 
-print("=" * 50)
-print("INICIANDO TESTE 2 - VALIDAÇÃO DE DADOS")
-print("=" * 50)
+import agregacao_incremental
+import cache_etapas
+import cadastro_operadoras
+import formato_colunar
+import metricas
+import zip_paralelo
+
+ZIP_FINAL = "Teste_SeuNome.zip"
 
 # -----------------------------------------------------------------
 # PASSO 1: Validar CNPJ
 # -----------------------------------------------------------------
-print("\n🔍 PASSO 1: Validando CNPJs...")
+# Pesos do cálculo dos dígitos verificadores (módulo 11)
+PESOS_DV1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+PESOS_DV2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
 
 def validar_cnpj(cnpj):
     """
@@ -21,7 +32,11 @@ def validar_cnpj(cnpj):
     CNPJ válido tem 14 dígitos e dígitos verificadores corretos
     """
     # Converte para string e remove caracteres não numéricos
-    cnpj_str = str(cnpj)
+    # (CNPJ lido como número perde os zeros à esquerda: completa com zeros)
+    if isinstance(cnpj, (int, np.integer)) and not isinstance(cnpj, bool):
+        cnpj_str = f"{cnpj:014d}"
+    else:
+        cnpj_str = str(cnpj)
     cnpj_limpo = re.sub(r'[^0-9]', '', cnpj_str)
     
     # Verifica se tem 14 dígitos
@@ -32,145 +47,310 @@ def validar_cnpj(cnpj):
     if cnpj_limpo == cnpj_limpo[0] * 14:
         return False
     
-    # Aqui viria o cálculo dos dígitos verificadores
-    # Para simplificar, vamos considerar válido se começar com 1, 2 ou 3
-    return cnpj_limpo[0] in ['1', '2', '3']
+    # Cálculo dos dígitos verificadores:
+    # soma ponderada, resto da divisão por 11, resto < 2 vira 0
+    digitos = [int(d) for d in cnpj_limpo]
+    for posicao, pesos in ((12, PESOS_DV1), (13, PESOS_DV2)):
+        resto = sum(d * p for d, p in zip(digitos, pesos)) % 11
+        dv = 0 if resto < 2 else 11 - resto
+        if digitos[posicao] != dv:
+            return False
+    return True
+
+def _matriz_digitos(valores):
+    """
+    Transforma um bloco de CNPJs em uma matriz (linhas x 14) de dígitos
+    Retorna (matriz, tem_14_digitos)
+    """
+    if np.issubdtype(valores.dtype, np.integer):
+        # CNPJ lido como número (perdeu os zeros à esquerda): separa os
+        # dígitos com divisão inteira, sem passar por texto
+        potencias = 10 ** np.arange(13, -1, -1, dtype=np.int64)
+        matriz = (valores[:, None] // potencias) % 10
+        return matriz, (valores >= 0) & (valores < 10 ** 14)
+
+    # Texto: cada caractere vira um número (código Unicode)
+    texto = np.asarray(valores, dtype=str)
+    largura = max(texto.dtype.itemsize // 4, 14)
+    codigos = np.zeros((len(texto), largura), dtype=np.uint32)
+    codigos[:, :texto.dtype.itemsize // 4] = texto.view(np.uint32).reshape(len(texto), -1)
+
+    eh_digito = (codigos >= ord('0')) & (codigos <= ord('9'))
+    tem_14_digitos = eh_digito.sum(axis=1) == 14
+    matriz = codigos[:, :14].astype(np.int64) - ord('0')
+
+    # Caso comum: 14 dígitos seguidos, sem pontuação, já está pronto.
+    # Só as linhas com pontuação ("11.222.333/0001-81") precisam ter os
+    # dígitos puxados para a posição certa (0 a 13) dentro do CNPJ
+    so_digitos = eh_digito[:, :14].all(axis=1) & (codigos[:, 14:] == 0).all(axis=1)
+    outros = np.flatnonzero(tem_14_digitos & ~so_digitos)
+    if len(outros):
+        posicao = np.cumsum(eh_digito[outros], axis=1) - 1
+        linhas, colunas = np.nonzero(eh_digito[outros])
+        matriz[outros[linhas], posicao[linhas, colunas]] = codigos[outros[linhas], colunas] - ord('0')
+
+    return matriz, tem_14_digitos
+
+def validar_cnpjs(serie, tamanho_bloco=1_000_000):
+    """
+    Versão vetorizada do validar_cnpj: valida a coluna inteira de uma vez
+    Faz as mesmas contas, mas em uma matriz de dígitos com NumPy
+    (processada em blocos para não estourar a memória)
+    """
+    valores = serie.to_numpy()
+    if not np.issubdtype(valores.dtype, np.integer):
+        valores = serie.astype(str).to_numpy()
+
+    resultado = np.zeros(len(valores), dtype=bool)
+    for inicio in range(0, len(valores), tamanho_bloco):
+        matriz, tem_14 = _matriz_digitos(valores[inicio:inicio + tamanho_bloco])
+
+        # Sequências de números iguais (00000000000000, 11111111111111...)
+        repetido = (matriz == matriz[:, :1]).all(axis=1)
+
+        resto1 = (matriz[:, :12] @ PESOS_DV1) % 11
+        dv1 = np.where(resto1 < 2, 0, 11 - resto1)
+        resto2 = (matriz[:, :13] @ PESOS_DV2) % 11
+        dv2 = np.where(resto2 < 2, 0, 11 - resto2)
+
+        resultado[inicio:inicio + len(matriz)] = (
+            tem_14 & ~repetido & (matriz[:, 12] == dv1) & (matriz[:, 13] == dv2)
+        )
+
+    return pd.Series(resultado, index=serie.index)
 
 # -----------------------------------------------------------------
-# PASSO 2: Carregar dados do Teste 1
+# EXECUÇÃO
 # -----------------------------------------------------------------
-print("\n📂 PASSO 2: Carregando dados consolidados...")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste 2 - validar e enriquecer dados")
+    parser.add_argument("--parquet", action="store_true",
+                        help="grava também o agregado em Parquet para o Teste 4")
+    parser.add_argument("--incremental", action="store_true",
+                        help="atualiza só os trimestres carregados no estado salvo")
+    parser.add_argument("--trimestre", action="append", default=[], metavar="ANO-T",
+                        help="carrega só este trimestre (ex.: 2024-3); pode repetir")
+    parser.add_argument("--cadastro", default=cadastro_operadoras.CADASTRO_CSV,
+                        help="cadastro de operadoras da ANS (Relatorio_cadop.csv)")
+    parser.add_argument("--remover-trimestre", action="append", default=[], metavar="ANO-T",
+                        help="tira um trimestre do estado incremental; pode repetir")
+    parser.add_argument("--nivel-zip", type=int, default=zip_paralelo.NIVEL_ZIP, choices=range(1, 10),
+                        metavar="1-9", help="nível de compressão do ZIP (1 = mais rápido, 9 = menor)")
+    parser.add_argument("--threads-zip", type=int, default=zip_paralelo.THREADS_ZIP,
+                        help="threads comprimindo o ZIP ao mesmo tempo")
+    parser.add_argument("--force", action="store_true",
+                        help="processa de novo mesmo com as mesmas entradas (ignora o cache)")
+    args = parser.parse_args(argv)
+    if (args.trimestre or args.remover_trimestre) and not args.incremental:
+        # Sem o estado salvo, o despesas_agregadas.csv sairia só com esses trimestres
+        parser.error("--trimestre e --remover-trimestre só valem com --incremental")
+    trimestres = [tuple(int(x) for x in t.split("-")) for t in args.trimestre]
+    remover = [tuple(int(x) for x in t.split("-")) for t in args.remover_trimestre]
+    metricas.iniciar_execucao("teste2")
+
+    print("=" * 50)
+    print("INICIANDO TESTE 2 - VALIDAÇÃO DE DADOS")
+    print("=" * 50)
 
-try:
-    df = pd.read_csv("dados/consolidado_despesas.csv")
-    
-    # ADICIONE ESTA LINHA ABAIXO:
-    df['CNPJ'] = df['CNPJ'].astype(str) # Garante que o CNPJ do CSV seja texto
-    
-    print(f"   ✅ Dados carregados: {len(df)} registros")
-    
-    # -----------------------------------------------------------------
-    # PASSO 3: Aplicar validações
-    # -----------------------------------------------------------------
-    print("\n✅ PASSO 3: Aplicando validações...")
-    
-    # Valida CNPJ
-    df['CNPJ_VALIDO'] = df['CNPJ'].apply(validar_cnpj)
-    
-    # Valida valores positivos
-    df['VALOR_POSITIVO'] = df['ValorDespesas'] > 0
-    
-    # Valida razão social não vazia
-    df['NOME_VALIDO'] = df['RazaoSocial'].notna() & (df['RazaoSocial'].str.strip() != '')
-    
-    # Conta quantos são válidos
-    validos = df['CNPJ_VALIDO'].sum()
-    print(f"   📊 CNPJs válidos: {validos} de {len(df)}")
-    print(f"   📊 Valores positivos: {df['VALOR_POSITIVO'].sum()} de {len(df)}")
-    print(f"   📊 Nomes válidos: {df['NOME_VALIDO'].sum()} de {len(df)}")
-    
-    # -----------------------------------------------------------------
-    # TRADE-OFF: O que fazer com CNPJs inválidos?
-    # -----------------------------------------------------------------
-    print("\n🤔 TRADE-OFF TÉCNICO: O que fazer com CNPJs inválidos?")
-    print("   Opção A: Remover → Perde dados")
-    print("   Opção B: Corrigir → Complexo, pode errar")
-    print("   Opção C: Marcar como suspeito → Melhor para análise")
-    print("   ✅ ESCOLHI: Opção C - Marcar como suspeito")
-    print("   POR QUÊ: Como estagiária, prefiro identificar problemas")
-    print("   do que escondê-los. Um supervisor pode analisar depois.")
-    
-    # Marca registros suspeitos
-    df['SUSPEITO'] = ~df['CNPJ_VALIDO'] | ~df['VALOR_POSITIVO'] | ~df['NOME_VALIDO']
-    
-    # -----------------------------------------------------------------
-    # PASSO 4: Baixar dados cadastrais (simulação)
-    # -----------------------------------------------------------------
-    print("\n📋 PASSO 4: Enriquecendo com dados cadastrais...")
-    
-    # Cria dados cadastrais de exemplo
-    dados_cadastro = [
-        ["11222333000144", "123456", "Hospital Sao Paulo", "Hospitalar", "SP"],
-        ["22333444000155", "234567", "Clinica Saude Total", "Ambulatorial", "RJ"],
-        ["99999888000177", "345678", "Outra Operadora", "Referência", "MG"],
-    ]
-    
-    df_cadastro = pd.DataFrame(dados_cadastro, 
-                               columns=["CNPJ", "RegistroANS", "RazaoSocial", "Modalidade", "UF"])
-    
-    # -----------------------------------------------------------------
-    # PASSO 5: Juntar os dados (JOIN)
-    # -----------------------------------------------------------------
-    print("\n🔗 PASSO 5: Fazendo JOIN entre despesas e cadastro...")
-    
-    # Faz o JOIN usando CNPJ como chave
-    # LEFT JOIN: mantém todas as despesas, mesmo sem cadastro
-    df_completo = pd.merge(
-        df,
-        df_cadastro[["CNPJ", "RegistroANS", "Modalidade", "UF"]],
-        on="CNPJ",
-        how="left"  # LEFT JOIN é o mais seguro
-    )
-    
-    # Verifica quantos não encontraram match
-    sem_cadastro = df_completo['RegistroANS'].isna().sum()
-    print(f"   ⚠️  Registros sem cadastro: {sem_cadastro} de {len(df_completo)}")
-    
     # -----------------------------------------------------------------
-    # PASSO 6: Agregar dados
+    # CACHE: mesmas entradas → mesmas saídas (cache_etapas.py)
     # -----------------------------------------------------------------
-    print("\n📊 PASSO 6: Agregando dados por operadora...")
-    
-    # Agrupa por Razão Social e UF
-    # Calcula: total, média e desvio padrão
-    agregado = df_completo.groupby(['RazaoSocial', 'UF']).agg({
-        'ValorDespesas': ['sum', 'mean', 'std']
-    }).reset_index()
-    
-    # Melhora os nomes das colunas
-    agregado.columns = ['RazaoSocial', 'UF', 'TotalDespesas', 'MediaTrimestral', 'DesvioPadrao']
-    
-    # Ordena do maior para o menor
-    agregado = agregado.sort_values('TotalDespesas', ascending=False)
-    
-    print(f"   📈 Total de grupos: {len(agregado)}")
-    print(f"   🥇 Maior despesa: R$ {agregado['TotalDespesas'].iloc[0]:,.2f}")
-    
+    # No modo incremental o estado salvo já faz esse papel (e muda a cada
+    # execução), então o cache fica de fora
+    saidas = [formato_colunar.AGREGADO_CSV, ZIP_FINAL]
+    if args.parquet and formato_colunar.PARQUET_DISPONIVEL:
+        saidas.append(formato_colunar.AGREGADO_PARQUET)
+    chave = None
+    if not args.incremental:
+        with metricas.etapa("cache"):
+            # O CSV entra sempre (vai inteiro para o ZIP). O Parquet só é lido
+            # quando foi gravado junto com esse mesmo CSV: basta dizer qual
+            # dos dois foi lido, sem conferir o hash da pasta inteira
+            fonte = formato_colunar.fonte_consolidado()
+            entradas = [formato_colunar.CONSOLIDADO_CSV, args.cadastro]
+            parametros = {"parquet": args.parquet, "nivel_zip": args.nivel_zip,
+                          "fonte": "parquet" if fonte == formato_colunar.CONSOLIDADO_PARQUET else "csv"}
+            chave = cache_etapas.impressao_digital(
+                "teste2", entradas, parametros,
+                codigo=cache_etapas.modulos_do_projeto(sys.modules[__name__]))
+            reaproveitado = not args.force and cache_etapas.restaurar(chave, saidas)
+        if reaproveitado:
+            print(f"\n♻️  Entradas iguais às de uma execução anterior: saídas do cache ({chave[:12]})")
+            print("   Para processar de novo: python teste2_validacao.py --force")
+            print(f"\n   ⏱️  Relatório da execução: {metricas.salvar_relatorio()}")
+            print("\n" + "=" * 50)
+            print("✅ TESTE 2 CONCLUÍDO!")
+            print("=" * 50)
+            return
+
+    print("\n🔍 PASSO 1: Validando CNPJs...")
+
     # -----------------------------------------------------------------
-    # PASSO 7: Salvar resultados
+    # PASSO 2: Carregar dados do Teste 1
     # -----------------------------------------------------------------
-    print("\n💾 PASSO 7: Salvando resultados...")
-    
-    # Salva o CSV agregado
-    agregado.to_csv("dados/despesas_agregadas.csv", index=False, encoding="utf-8")
-    print("   ✅ CSV salvo: dados/despesas_agregadas.csv")
-    
-    # Cria ZIP final
-    import zipfile
-    import os
-    
-    # Lista de arquivos para compactar
-    arquivos_zip = [
-        "dados/consolidado_despesas.csv",
-        "dados/despesas_agregadas.csv"
-    ]
-    
-    # Cria o ZIP
-    nome_zip = f"Teste_SeuNome.zip"
-    with zipfile.ZipFile(nome_zip, 'w') as zipf:
-        for arquivo in arquivos_zip:
-            if os.path.exists(arquivo):
-                zipf.write(arquivo)
-    
-    print(f"   📦 ZIP criado: {nome_zip}")
-    print("   📎 Arquivos incluídos:")
-    for arquivo in zipf.namelist():
-        print(f"      • {arquivo}")
-    
-except FileNotFoundError:
-    print("   ❌ ERRO: Arquivo consolidado_despesas.csv não encontrado!")
-    print("   Execute primeiro o Teste 1 (teste1_api.py)")
+    print("\n📂 PASSO 2: Carregando dados consolidados...")
+
+    try:
+        # Lê do Parquet do Teste 1 se existir (tipos já corretos, CNPJ como
+        # texto); senão lê o CSV e força os mesmos tipos
+        with metricas.etapa("ler") as e:
+            df = formato_colunar.carregar_consolidado(trimestres=trimestres or None)
+            e["linhas"] = len(df)
+        
+        print(f"   ✅ Dados carregados: {len(df)} registros")
+        
+        # -----------------------------------------------------------------
+        # PASSO 3: Aplicar validações
+        # -----------------------------------------------------------------
+        print("\n✅ PASSO 3: Aplicando validações...")
+        
+        with metricas.etapa("validar", linhas=len(df)):
+            # Valida CNPJ
+            df['CNPJ_VALIDO'] = validar_cnpjs(df['CNPJ'])
+            
+            # Valida valores positivos
+            df['VALOR_POSITIVO'] = df['ValorDespesas'] > 0
+            
+            # Valida razão social não vazia
+            df['NOME_VALIDO'] = df['RazaoSocial'].notna() & (df['RazaoSocial'].str.strip() != '')
+        
+        # Conta quantos são válidos
+        validos = df['CNPJ_VALIDO'].sum()
+        print(f"   📊 CNPJs válidos: {validos} de {len(df)}")
+        print(f"   📊 Valores positivos: {df['VALOR_POSITIVO'].sum()} de {len(df)}")
+        print(f"   📊 Nomes válidos: {df['NOME_VALIDO'].sum()} de {len(df)}")
+        
+        # -----------------------------------------------------------------
+        # TRADE-OFF: O que fazer com CNPJs inválidos?
+        # -----------------------------------------------------------------
+        print("\n🤔 TRADE-OFF TÉCNICO: O que fazer com CNPJs inválidos?")
+        print("   Opção A: Remover → Perde dados")
+        print("   Opção B: Corrigir → Complexo, pode errar")
+        print("   Opção C: Marcar como suspeito → Melhor para análise")
+        print("   ✅ ESCOLHI: Opção C - Marcar como suspeito")
+        print("   POR QUÊ: Como estagiária, prefiro identificar problemas")
+        print("   do que escondê-los. Um supervisor pode analisar depois.")
+        
+        # Marca registros suspeitos
+        df['SUSPEITO'] = ~df['CNPJ_VALIDO'] | ~df['VALOR_POSITIVO'] | ~df['NOME_VALIDO']
+        
+        # -----------------------------------------------------------------
+        # PASSO 4: Baixar dados cadastrais (simulação)
+        # -----------------------------------------------------------------
+        print("\n📋 PASSO 4: Enriquecendo com dados cadastrais...")
+        
+        with metricas.etapa("cadastro") as e:
+            if os.path.exists(args.cadastro):
+                # Índice gravado em dados/indice_cadastro (refeito só se o arquivo mudar)
+                indice_cadastro = cadastro_operadoras.carregar_indice(args.cadastro)
+                print(f"   📇 Cadastro: {len(indice_cadastro['cnpjs'])} operadoras ({args.cadastro})")
+            else:
+                print(f"   ⚠️  {args.cadastro} não encontrado, usando cadastro de exemplo")
+                # Cria dados cadastrais de exemplo
+                dados_cadastro = [
+                    ["11222333000144", "123456", "Hospital Sao Paulo", "Hospitalar", "SP"],
+                    ["22333444000155", "234567", "Clinica Saude Total", "Ambulatorial", "RJ"],
+                    ["99999888000177", "345678", "Outra Operadora", "Referência", "MG"],
+                ]
+                
+                df_cadastro = pd.DataFrame(dados_cadastro, 
+                                           columns=["CNPJ", "RegistroANS", "RazaoSocial", "Modalidade", "UF"])
+                indice_cadastro = cadastro_operadoras.construir_indice(df_cadastro)
+            e["linhas"] = len(indice_cadastro["cnpjs"])
+        
+        # -----------------------------------------------------------------
+        # PASSO 5: Juntar os dados (JOIN)
+        # -----------------------------------------------------------------
+        print("\n🔗 PASSO 5: Fazendo JOIN entre despesas e cadastro...")
+        
+        # Faz o JOIN usando CNPJ como chave
+        # LEFT JOIN: mantém todas as despesas, mesmo sem cadastro
+        with metricas.etapa("join", linhas=len(df)):
+            df_completo = cadastro_operadoras.juntar(df, indice_cadastro)
+        
+        # Verifica quantos não encontraram match
+        sem_cadastro = df_completo['RegistroANS'].isna().sum()
+        print(f"   ⚠️  Registros sem cadastro: {sem_cadastro} de {len(df_completo)}")
+        
+        # -----------------------------------------------------------------
+        # PASSO 6: Agregar dados
+        # -----------------------------------------------------------------
+        print("\n📊 PASSO 6: Agregando dados por operadora...")
+        
+        with metricas.etapa("agregar", linhas=len(df_completo)):
+            if args.incremental:
+                # Atualiza só os trimestres que foram carregados agora;
+                # os demais continuam no estado salvo (dados/estado_agregado)
+                for (ano, trimestre), parte in df_completo.groupby(['Ano', 'Trimestre']):
+                    agregacao_incremental.atualizar_trimestre(parte, ano, trimestre)
+                    print(f"   🔄 Trimestre {trimestre}/{ano} atualizado no estado")
+                for ano, trimestre in remover:
+                    agregacao_incremental.remover_trimestre(ano, trimestre)
+                    print(f"   🗑️  Trimestre {trimestre}/{ano} retirado do estado")
+                agregado = agregacao_incremental.gerar_agregado()
+            else:
+                # Agrupa por Razão Social e UF
+                # Calcula: total, média e desvio padrão
+                # observed=True: UF é Categorical, só os grupos que existem
+                agregado = df_completo.groupby(['RazaoSocial', 'UF'], observed=True).agg({
+                    'ValorDespesas': ['sum', 'mean', 'std']
+                }).reset_index()
+        
+                # Melhora os nomes das colunas
+                agregado.columns = ['RazaoSocial', 'UF', 'TotalDespesas', 'MediaTrimestral', 'DesvioPadrao']
+        
+                # Ordena do maior para o menor
+                agregado = agregado.sort_values('TotalDespesas', ascending=False)
+            
+            # UF volta a ser texto no arquivo de saída (mesmo formato de antes)
+            agregado['UF'] = agregado['UF'].astype(str)
+        
+        print(f"   📈 Total de grupos: {len(agregado)}")
+        if len(agregado):
+            print(f"   🥇 Maior despesa: R$ {agregado['TotalDespesas'].iloc[0]:,.2f}")
+        
+        # -----------------------------------------------------------------
+        # PASSO 7: Salvar resultados
+        # -----------------------------------------------------------------
+        print("\n💾 PASSO 7: Salvando resultados...")
+        
+        # Salva o CSV agregado e o ZIP final juntos (zip_paralelo.py):
+        # o consolidado entra no ZIP direto do arquivo, e o agregado vai
+        # para o CSV e para o ZIP no mesmo momento em que é gerado
+        nome_zip = ZIP_FINAL
+        with metricas.etapa("gravar_csv_zip", linhas=len(agregado)), \
+                zip_paralelo.ZipParalelo(nome_zip, args.nivel_zip, args.threads_zip) as zipf:
+            if os.path.exists(formato_colunar.CONSOLIDADO_CSV):
+                zipf.adicionar_arquivo(formato_colunar.CONSOLIDADO_CSV)
+            with zip_paralelo.csv_no_zip(zipf, formato_colunar.AGREGADO_CSV) as escrever:
+                zip_paralelo.escrever_csv(escrever, agregado)
+        print(f"   ✅ CSV salvo: {formato_colunar.AGREGADO_CSV}")
+
+        # Parquet depois do CSV: ele guarda o tamanho e a data do CSV gravado agora
+        if args.parquet and formato_colunar.PARQUET_DISPONIVEL:
+            formato_colunar.salvar_agregado_parquet(agregado)
+            print(f"   🧱 Parquet salvo: {formato_colunar.AGREGADO_PARQUET}")
+        
+        print(f"   📦 ZIP criado: {nome_zip}")
+        print("   📎 Arquivos incluídos:")
+        for arquivo in zipf.nomes():
+            print(f"      • {arquivo}")
+
+        if chave is not None:
+            with metricas.etapa("cache_guardar"):
+                cache_etapas.guardar(chave, saidas)
+        
+    except FileNotFoundError:
+        print("   ❌ ERRO: Arquivo consolidado_despesas.csv não encontrado!")
+        print("   Execute primeiro o Teste 1 (teste1_api.py)")
+
+    print(f"\n   ⏱️  Relatório da execução: {metricas.salvar_relatorio()}")
+
+    print("\n" + "=" * 50)
+    print("✅ TESTE 2 CONCLUÍDO!")
+    print("=" * 50)
 
-print("\n" + "=" * 50)
-print("✅ TESTE 2 CONCLUÍDO!")
-print("=" * 50)
\ No newline at end of file
+if __name__ == "__main__":
+    # ANS_PERFIL=1 python3 teste2_validacao.py → grava o cProfile em dados/perfis/
+    with metricas.perfilar("teste2"):
+        main()
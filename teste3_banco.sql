@@ -85,6 +85,10 @@ ON despesas(ano, trimestre);
 CREATE INDEX IF NOT EXISTS idx_despesas_cnpj 
 ON despesas(cnpj);
 
+-- Índice para paginar por cursor na API (CNPJ, Ano, Trimestre)
+CREATE INDEX IF NOT EXISTS idx_despesas_chave 
+ON despesas(cnpj, ano, trimestre, id);
+
 -- Índice para ordenar por valor
 CREATE INDEX IF NOT EXISTS idx_despesas_valor 
 ON despesas(valor_despesas DESC);
@@ -202,6 +206,80 @@ GROUP BY o.cnpj, o.razao_social
 HAVING SUM(oa.vezes_acima) >= 2  -- Acima da média em pelo menos 2 trimestres
 ORDER BY vezes_acima_da_media DESC;
 
+-- ============================================
+-- PASSO 5: RESUMOS POR TRIMESTRE (materializados)
+-- ============================================
+
+-- As 3 queries acima varrem a tabela despesas inteira a cada execução.
+-- Estes resumos guardam uma linha por trimestre e uma por
+-- (operadora, trimestre). Quando chega um trimestre novo, só as linhas
+-- daquele trimestre são recalculadas (teste3_carga.py faz isso sozinho
+-- depois de cada carga; ou: python3 teste3_carga.py --atualizar-resumos 2024-3).
+
+-- Totais de cada trimestre (a média geral sai de total / qtd)
+CREATE TABLE IF NOT EXISTS resumo_trimestre (
+    ano INTEGER NOT NULL,
+    trimestre INTEGER NOT NULL,
+    total_despesas DECIMAL(18,2) NOT NULL,
+    qtd_despesas INTEGER NOT NULL,
+    PRIMARY KEY (ano, trimestre)
+);
+
+-- Totais de cada operadora em cada trimestre
+CREATE TABLE IF NOT EXISTS resumo_operadora_trimestre (
+    cnpj VARCHAR(14) REFERENCES operadoras(cnpj),
+    ano INTEGER NOT NULL,
+    trimestre INTEGER NOT NULL,
+    total_despesas DECIMAL(18,2) NOT NULL,
+    qtd_despesas INTEGER NOT NULL,
+    vezes_acima INTEGER NOT NULL,           -- despesas acima da média do trimestre
+    PRIMARY KEY (cnpj, ano, trimestre)
+);
+
+-- Índice para recalcular/ler um trimestre sem varrer os outros
+CREATE INDEX IF NOT EXISTS idx_resumo_operadora_periodo 
+ON resumo_operadora_trimestre(ano, trimestre);
+
+-- QUERY 1 (pelos resumos): crescimento entre dois trimestres
+SELECT 
+    o.razao_social,
+    o.uf,
+    COALESCE(p.total_despesas * 1.0 / p.qtd_despesas, 0) as valor_inicial,
+    COALESCE(u.total_despesas * 1.0 / u.qtd_despesas, 0) as valor_final,
+    CASE 
+        WHEN COALESCE(p.total_despesas, 0) = 0 THEN 0
+        ELSE (COALESCE(u.total_despesas * 1.0 / u.qtd_despesas, 0) - p.total_despesas * 1.0 / p.qtd_despesas)
+             / (p.total_despesas * 1.0 / p.qtd_despesas) * 100
+    END as crescimento_percentual
+FROM operadoras o
+LEFT JOIN resumo_operadora_trimestre p ON p.cnpj = o.cnpj AND p.ano = 2024 AND p.trimestre = 1
+LEFT JOIN resumo_operadora_trimestre u ON u.cnpj = o.cnpj AND u.ano = 2024 AND u.trimestre = 2
+ORDER BY crescimento_percentual DESC
+LIMIT 5;
+
+-- QUERY 2 (pelos resumos): top 5 estados
+SELECT 
+    o.uf,
+    SUM(r.total_despesas) as total_despesas,
+    COUNT(DISTINCT r.cnpj) as qtd_operadoras,
+    SUM(r.total_despesas) * 1.0 / SUM(r.qtd_despesas) as media_por_operadora
+FROM resumo_operadora_trimestre r
+JOIN operadoras o ON o.cnpj = r.cnpj
+GROUP BY o.uf
+ORDER BY total_despesas DESC
+LIMIT 5;
+
+-- QUERY 3 (pelos resumos): acima da média em pelo menos 2 vezes
+SELECT 
+    o.razao_social,
+    COUNT(*) as trimestres_com_dados,
+    SUM(r.vezes_acima) as vezes_acima_da_media
+FROM resumo_operadora_trimestre r
+JOIN operadoras o ON o.cnpj = r.cnpj
+GROUP BY o.cnpj, o.razao_social
+HAVING SUM(r.vezes_acima) >= 2
+ORDER BY vezes_acima_da_media DESC;
+
 PRINT '
 ============================================
     TESTE 3 CONCLUÍDO!
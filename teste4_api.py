@@ -8,10 +8,29 @@ Para executar:
 3. Abra: http://localhost:5001
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
+import base64
+import bisect
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import weakref
+from datetime import datetime
+import numpy as np
 import pandas as pd
 
+import analises_trimestre
+import busca_operadoras
+import formato_colunar
+import metricas
+import repositorio_banco
+import serializacao_json
+import tipos_compactos
+
 print("=" * 50)
 print("INICIANDO TESTE 4 - API E SITE")
 print("=" * 50)
@@ -27,6 +46,7 @@ print("   POR QUÊ: Como estagiária, prefiro começar com o mais simples")
 print("   e documentado. FastAPI tem conceitos mais avançados.")
 
 app = Flask(__name__)
+app.json = serializacao_json.ProvedorJSON(app)  # orjson no lugar do json padrão
 CORS(app)  # Permite o site acessar a API
 
 # -----------------------------------------------------------------
@@ -34,25 +54,512 @@ CORS(app)  # Permite o site acessar a API
 # -----------------------------------------------------------------
 print("\n📊 Carregando dados de exemplo...")
 
-# Carrega dados dos testes anteriores
-try:
-    df_operadoras = pd.read_csv("dados/consolidado_despesas.csv")
-    df_agregado = pd.read_csv("dados/despesas_agregadas.csv")
-    print(f"   ✅ Dados carregados: {len(df_operadoras)} registros")
-except:
-    print("   ⚠️  Criando dados de exemplo...")
-    # Dados de exemplo se os arquivos não existirem
-    df_operadoras = pd.DataFrame([
-        {"CNPJ": "11222333000144", "RazaoSocial": "Hospital Sao Paulo", "UF": "SP", "ValorDespesas": 150000.50},
-        {"CNPJ": "22333444000155", "RazaoSocial": "Clinica Saude Total", "UF": "RJ", "ValorDespesas": 75000.00},
-        {"CNPJ": "33444555000166", "RazaoSocial": "Laboratorio Diagnostico", "UF": "MG", "ValorDespesas": 50000.25},
-    ])
+def carregar_dados():
+    """
+    Carrega dados dos testes anteriores
+    """
+    try:
+        # Parquet (tipado) se o pipeline gerou, senão os CSVs
+        df_operadoras = formato_colunar.carregar_consolidado()
+        df_agregado = formato_colunar.carregar_agregado()
+        print(f"   ✅ Dados carregados: {len(df_operadoras)} registros")
+    except Exception:
+        print("   ⚠️  Criando dados de exemplo...")
+        # Dados de exemplo se os arquivos não existirem
+        df_operadoras = pd.DataFrame([
+            {"CNPJ": "11222333000144", "RazaoSocial": "Hospital Sao Paulo", "UF": "SP", "ValorDespesas": 150000.50},
+            {"CNPJ": "22333444000155", "RazaoSocial": "Clinica Saude Total", "UF": "RJ", "ValorDespesas": 75000.00},
+            {"CNPJ": "33444555000166", "RazaoSocial": "Laboratorio Diagnostico", "UF": "MG", "ValorDespesas": 50000.25},
+        ])
+    
+        df_agregado = pd.DataFrame([
+            {"RazaoSocial": "Hospital Sao Paulo", "UF": "SP", "TotalDespesas": 330000.25},
+            {"RazaoSocial": "Clinica Saude Total", "UF": "RJ", "TotalDespesas": 155000.00},
+            {"RazaoSocial": "Laboratorio Diagnostico", "UF": "MG", "TotalDespesas": 50000.25},
+        ])
+    return df_operadoras, df_agregado
+
+# -----------------------------------------------------------------
+# ÍNDICES (montados uma vez, na carga dos dados)
+# -----------------------------------------------------------------
+def normalizar_cnpj(cnpj):
+    """
+    Deixa só os dígitos ("11.222.333/0001-81" → "11222333000181")
+    """
+    return "".join(c for c in str(cnpj) if c.isdigit())
+
+def construir_indices(df_operadoras, df_agregado):
+    """
+    Monta dicionários para as rotas acharem as linhas direto,
+    sem varrer a tabela inteira a cada requisição:
+        cnpj         → posições das linhas em df_operadoras
+        razao_social → posições das linhas em df_agregado
+        uf           → posições das linhas em df_operadoras
+    E a ordem fixa (CNPJ, Ano, Trimestre) usada na paginação por cursor,
+    além do índice de prefixos da busca (busca_operadoras.py)
+    """
+    if pd.api.types.is_integer_dtype(df_operadoras['CNPJ'].dtype):
+        # CNPJ compacto (int64): agrupa pelo número, só as chaves viram texto
+        cnpjs = df_operadoras['CNPJ']
+        por_cnpj = {f"{cnpj:014d}": posicoes
+                    for cnpj, posicoes in df_operadoras.groupby('CNPJ', sort=False).indices.items()}
+    else:
+        cnpjs = df_operadoras['CNPJ'].astype(str).map(normalizar_cnpj)
+        por_cnpj = df_operadoras.groupby(cnpjs, sort=False).indices
+    indices = {
+        "cnpj": por_cnpj,
+        "razao_social": df_agregado.groupby('RazaoSocial', sort=False, observed=True).indices,
+        "uf": {},
+    }
+    if 'UF' in df_operadoras.columns:
+        indices["uf"] = df_operadoras.groupby('UF', sort=False, observed=True).indices
+
+    # Chave de ordenação do cursor. A posição da linha desempata
+    # registros repetidos, então a ordem nunca é ambígua. CNPJ inteiro
+    # ordena igual ao texto de 14 dígitos.
+    zeros = np.zeros(len(df_operadoras), dtype=np.int64)
+    chaves = pd.DataFrame({
+        "cnpj": cnpjs.to_numpy(),
+        "ano": df_operadoras['Ano'].to_numpy(dtype=np.int64) if 'Ano' in df_operadoras else zeros,
+        "trimestre": df_operadoras['Trimestre'].to_numpy(dtype=np.int64) if 'Trimestre' in df_operadoras else zeros,
+    })
+    indices["ordem"] = chaves.sort_values(["cnpj", "ano", "trimestre"], kind="mergesort").index.to_numpy()
+    indices["chaves"] = (chaves["cnpj"].to_numpy(), chaves["ano"].to_numpy(), chaves["trimestre"].to_numpy())
+
+    # Contagens calculadas uma vez por versão dos dados
+    indices["total"] = len(df_operadoras)
+    indices["total_uf"] = {uf: len(posicoes) for uf, posicoes in indices["uf"].items()}
+
+    indices["busca"] = busca_operadoras.construir_indice_busca(df_operadoras)
+    return indices
+
+def chave_da_linha(indices, posicao):
+    cnpjs, anos, trimestres = indices["chaves"]
+    cnpj = cnpjs[posicao]
+    if not isinstance(cnpj, str):
+        cnpj = f"{int(cnpj):014d}"
+    return (cnpj, int(anos[posicao]), int(trimestres[posicao]), int(posicao))
+
+def codificar_cursor(chave):
+    return base64.urlsafe_b64encode(json.dumps(chave).encode("utf-8")).decode("ascii")
+
+def decodificar_cursor(cursor):
+    try:
+        cnpj, ano, trimestre, posicao = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (str(cnpj), int(ano), int(trimestre), int(posicao))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+
+def calcular_estatisticas(df_operadoras, df_agregado):
+    """
+    Calcula as estatísticas e já guarda a resposta pronta (JSON + ETag)
+    Uma vez por carga, não a cada requisição: o site consulta as
+    estatísticas o tempo todo, mas os dados só mudam quando chega um
+    trimestre novo (e a recarga monta um snapshot novo)
+    """
+    estatisticas = {
+        "total_operadoras": len(df_operadoras),
+        "total_despesas": tipos_compactos.soma_reais(df_operadoras, 'ValorDespesas'),
+        "media_despesas": tipos_compactos.reais(df_operadoras, 'ValorDespesas').mean(),
+        "top_5_operadoras": registros_resposta(df_agregado.head(5)),
+        "distribuicao_uf": (tipos_compactos.reais(df_agregado, 'TotalDespesas')
+                            .groupby(df_agregado['UF'], observed=True).sum().to_dict()
+                            if 'UF' in df_agregado.columns else {})
+    }
+    corpo = app.json.dumps({"success": True, "data": estatisticas})
+    # ETag = impressão digital do conteúdo: muda só quando os números mudam
+    etag = hashlib.sha1(corpo.encode("utf-8")).hexdigest()[:16]
+    return {"corpo": corpo, "etag": etag}
+
+# -----------------------------------------------------------------
+# SNAPSHOT: uma versão completa dos dados (tabelas + índices + estatísticas)
+# -----------------------------------------------------------------
+# As rotas pegam o snapshot atual UMA vez no começo da requisição e usam
+# só ele até o fim. A recarga monta um snapshot novo fora das requisições
+# e troca a referência de uma vez; quem já estava respondendo continua
+# com o antigo, que é liberado quando a última requisição termina.
+
+ARQUIVOS_MONITORADOS = [
+    formato_colunar.CONSOLIDADO_CSV,
+    formato_colunar.CONSOLIDADO_PARQUET,
+    formato_colunar.AGREGADO_CSV,
+    formato_colunar.AGREGADO_PARQUET,
+]
+INTERVALO_MONITOR = 5  # segundos entre as verificações dos arquivos
+ESPERA_SNAPSHOT_ANTERIOR = 0.5  # segundos esperando o snapshot antigo ser liberado
+
+class Snapshot(dict):
+    """
+    Dicionário comum; a classe existe só para permitir weakref
+    (saber quando o snapshot antigo foi liberado)
+    """
+
+snapshot = None
+_snapshot_anterior = None
+_trava_carga = threading.Lock()
+cargas = 0
+snapshot_anterior_em_uso = 0  # recargas que não esperaram o snapshot antigo ser liberado
+
+def assinatura_arquivos():
+    """
+    Data de modificação e tamanho dos arquivos de dados
+    (se mudar, os dados mudaram)
+    """
+    assinatura = []
+    for caminho in ARQUIVOS_MONITORADOS:
+        if os.path.exists(caminho):
+            info = os.stat(caminho)
+            assinatura.append((caminho, info.st_mtime, info.st_size))
+        else:
+            assinatura.append((caminho, None, None))
+    return tuple(assinatura)
+
+def construir_snapshot(df_operadoras, df_agregado, assinatura=None, inicio=None):
+    """
+    inicio: quando a leitura dos arquivos começou (para o tempo de carga
+    incluir a leitura, não só os índices)
+    """
+    inicio = inicio or time.perf_counter()
+    # Tipos compactos (tipos_compactos.py): CNPJ inteiro, textos repetidos
+    # como categoria, dinheiro em centavos
+    memoria_antes = tipos_compactos.memoria_bytes(df_operadoras) + tipos_compactos.memoria_bytes(df_agregado)
+    df_operadoras = tipos_compactos.compactar(df_operadoras.reset_index(drop=True))
+    df_agregado = tipos_compactos.compactar(df_agregado.reset_index(drop=True))
+    memoria_depois = tipos_compactos.memoria_bytes(df_operadoras) + tipos_compactos.memoria_bytes(df_agregado)
+    novo = Snapshot(
+        df_operadoras=df_operadoras,
+        df_agregado=df_agregado,
+        indices=construir_indices(df_operadoras, df_agregado),
+        estatisticas=calcular_estatisticas(df_operadoras, df_agregado),
+        resumos=construir_resumos(df_operadoras, df_agregado),
+        assinatura=assinatura,
+        carregado_em=datetime.now().isoformat(timespec="seconds"),
+        memoria={"antes_bytes": memoria_antes, "depois_bytes": memoria_depois},
+    )
+    novo["tempo_carga"] = time.perf_counter() - inicio
+    return novo
+
+def construir_resumos(df_operadoras, df_agregado):
+    """
+    Resumos por trimestre das análises (mesmos do PASSO 5 do teste3_banco.sql)
+    e o espaço onde as respostas ficam guardadas até a próxima carga
+    """
+    resumo_trimestre, resumo_operadora = analises_trimestre.resumir(df_operadoras)
+    return {
+        "trimestres": analises_trimestre.trimestres_disponiveis(resumo_trimestre),
+        "operadora": resumo_operadora,
+        "operadoras": analises_trimestre.operadoras_com_uf(df_operadoras, df_agregado),
+        "respostas": {},
+    }
+
+def usar_dados(novo_operadoras, novo_agregado, assinatura=None, inicio=None):
+    """
+    Troca os dados da API: monta o snapshot novo (índices e estatísticas)
+    e só então troca a referência, numa atribuição só
+    """
+    global snapshot, _snapshot_anterior, cargas
+    novo = construir_snapshot(novo_operadoras, novo_agregado, assinatura, inicio)
+    anterior = snapshot
+    snapshot = novo
+    _snapshot_anterior = weakref.ref(anterior) if anterior is not None else None
+    cargas += 1
+
+def aguardar_snapshot_anterior(limite=ESPERA_SNAPSHOT_ANTERIOR):
+    """
+    Espera um pouco as requisições que ainda usam o snapshot antigo
+    terminarem (normalmente só dois snapshots ficam na memória).
+    Roda com a trava da recarga: uma requisição lenta (ou uma referência
+    esquecida) não pode segurar a recarga, então desiste logo, avisa,
+    conta em snapshot_anterior_em_uso e a recarga segue
+    """
+    global snapshot_anterior_em_uso
+    fim = time.monotonic() + limite
+    while _snapshot_anterior is not None and _snapshot_anterior() is not None:
+        if time.monotonic() > fim:
+            snapshot_anterior_em_uso += 1
+            print("   ⚠️  Snapshot antigo ainda em uso, recarregando mesmo assim")
+            return False
+        time.sleep(0.05)
+    return True
+
+def recarregar_dados(forcar=False):
+    """
+    Recarrega se os arquivos mudaram (ou sempre, com forcar=True)
+    Retorna True se trocou o snapshot
+    """
+    with _trava_carga:
+        assinatura = assinatura_arquivos()
+        if not forcar and snapshot is not None and assinatura == snapshot["assinatura"]:
+            return False
+        aguardar_snapshot_anterior()
+        inicio = time.perf_counter()
+        with metricas.etapa("api_ler") as e:
+            df_operadoras, df_agregado = carregar_dados()
+            e["linhas"] = len(df_operadoras)
+        with metricas.etapa("api_snapshot", linhas=len(df_operadoras)):
+            usar_dados(df_operadoras, df_agregado, assinatura=assinatura, inicio=inicio)
+        memoria = snapshot["memoria"]
+        print(f"   💾 Memória dos dados: {memoria['antes_bytes'] / 2**20:.1f} MB → "
+              f"{memoria['depois_bytes'] / 2**20:.1f} MB "
+              f"({memoria['antes_bytes'] / max(memoria['depois_bytes'], 1):.1f}x menor)")
+        return True
+
+def iniciar_monitor(intervalo=INTERVALO_MONITOR):
+    """
+    Thread em segundo plano que olha os arquivos de dados e recarrega
+    quando eles mudam. Só recarrega quando a assinatura fica igual em
+    duas verificações seguidas (o pipeline já terminou de escrever).
+    """
+    def monitorar():
+        ultima_vista = snapshot["assinatura"]
+        while True:
+            time.sleep(intervalo)
+            try:
+                atual = assinatura_arquivos()
+                if atual != snapshot["assinatura"] and atual == ultima_vista:
+                    if recarregar_dados():
+                        print(f"🔄 Dados recarregados: {len(snapshot['df_operadoras'])} registros "
+                              f"em {snapshot['tempo_carga']:.2f}s")
+                ultima_vista = atual
+            except Exception as e:
+                print(f"   ❌ Erro ao recarregar dados: {e}")
+
+    threading.Thread(target=monitorar, name="monitor-dados", daemon=True).start()
+
+# -----------------------------------------------------------------
+# PAGINAÇÃO: page/limit (offset) e cursor
+# -----------------------------------------------------------------
+LIMITE_MAXIMO_CURSOR = 500    # teto de itens por página no modo cursor
+LIMITE_MAXIMO_BUSCA = 100     # teto de resultados por página na busca
+LIMITE_MAXIMO_LISTAGEM = 500  # teto de itens por página na paginação por page/limit
+
+def pagina_por_cursor(snap, ultima, limit):
+    """
+    Paginação por cursor (keyset): o cursor guarda a chave
+    (CNPJ, Ano, Trimestre) da última linha entregue. A próxima página
+    começa na primeira chave maior que ela, achada por busca binária,
+    então a página 1000 custa o mesmo que a primeira, e uma recarga no
+    meio da navegação não pula nem repete linhas (page/limit continua
+    funcionando para quem já usa).
+    Retorna (linhas, chave da última linha ou None se acabou)
+    """
+    indices = snap["indices"]
+    ordem = indices["ordem"]
+    inicio = 0
+    if ultima is not None:
+        inicio = bisect.bisect_right(range(len(ordem)), ultima,
+                                     key=lambda i: chave_da_linha(indices, ordem[i]))
+
+    posicoes = ordem[inicio:inicio + limit]
+    proxima = None
+    if inicio + limit < len(ordem):
+        proxima = chave_da_linha(indices, posicoes[-1])
+    return snap["df_operadoras"].iloc[posicoes], proxima
+
+# -----------------------------------------------------------------
+# REPOSITÓRIO: de onde as rotas tiram os dados
+# -----------------------------------------------------------------
+def registros_resposta(df):
+    """
+    Linhas do snapshot (tipos compactos) no formato das respostas:
+    CNPJ em texto e valores em reais
+    """
+    return serializacao_json.registros(tipos_compactos.expandir(df))
+
+# As rotas só chamam repositorio["..."](...). Há duas versões com as
+# mesmas funções:
+#   memória → snapshot de DataFrames lidos do Parquet/CSV (padrão)
+#   banco   → consultas no teste3_banco.sql (ANS_BANCO=postgresql://... ou
+#             arquivo SQLite), com pool de conexões (repositorio_banco.py)
+
+def memoria_listar(page, limit, uf=None):
+    snap = snapshot
+    df_operadoras, indices = snap["df_operadoras"], snap["indices"]
+    
+    # Filtro opcional por estado, usando o índice de UF
+    base = df_operadoras
+    total = indices["total"]
+    if uf:
+        base = df_operadoras.iloc[indices["uf"].get(uf.upper(), [])]
+        total = indices["total_uf"].get(uf.upper(), 0)
+    
+    start = (page - 1) * limit
+    return registros_resposta(base.iloc[start:start + limit]), total
+
+def memoria_cursor(ultima, limit):
+    snap = snapshot
+    pagina, proxima = pagina_por_cursor(snap, ultima, limit)
+    return registros_resposta(pagina), proxima, snap["indices"]["total"]
+
+def memoria_detalhes(cnpj):
+    snap = snapshot
+    df_operadoras, df_agregado, indices = snap["df_operadoras"], snap["df_agregado"], snap["indices"]
     
-    df_agregado = pd.DataFrame([
-        {"RazaoSocial": "Hospital Sao Paulo", "UF": "SP", "TotalDespesas": 330000.25},
-        {"RazaoSocial": "Clinica Saude Total", "UF": "RJ", "TotalDespesas": 155000.00},
-        {"RazaoSocial": "Laboratorio Diagnostico", "UF": "MG", "TotalDespesas": 50000.25},
-    ])
+    # Busca pelo CNPJ no índice (sem varrer a tabela)
+    posicoes = indices["cnpj"].get(cnpj)
+    if posicoes is None:
+        return None
+    
+    operadora = df_operadoras.iloc[posicoes]
+    primeira = tipos_compactos.expandir(operadora.iloc[:1]).iloc[0]
+    
+    # Pega dados agregados também
+    posicoes_agregado = indices["razao_social"].get(primeira['RazaoSocial'], [])
+    agregado = df_agregado.iloc[posicoes_agregado]
+    
+    return {
+        "cnpj": primeira['CNPJ'],
+        "razao_social": primeira['RazaoSocial'],
+        "uf": primeira.get('UF'),
+        "despesas": tipos_compactos.soma_reais(operadora, 'ValorDespesas'),
+        "agregado": registros_resposta(agregado)
+    }
+
+def memoria_despesas(cnpj):
+    snap = snapshot
+    posicoes = snap["indices"]["cnpj"].get(cnpj)
+    if posicoes is None:
+        return None
+    return registros_resposta(snap["df_operadoras"].iloc[posicoes])
+
+def memoria_estatisticas():
+    return snapshot["estatisticas"]
+
+def memoria_buscar(q, page, limit):
+    resultados, total = busca_operadoras.buscar(snapshot["indices"]["busca"], q, limite=limit, pagina=page)
+    return registros_resposta(resultados), total
+
+def memoria_analise(resumos, chave, calcular):
+    # Guardada nos resumos do mesmo snapshot usado no cálculo: uma carga
+    # nova já começa sem respostas, e uma resposta calculada com os dados
+    # antigos nunca vai parar no snapshot novo
+    respostas = resumos["respostas"]
+    guardada = respostas.get(chave)
+    if guardada is None:
+        guardada = calcular(resumos)
+        if len(respostas) >= repositorio_banco.MAXIMO_ANALISES_GUARDADAS:
+            respostas.clear()
+        respostas[chave] = guardada
+    return guardada
+
+def memoria_trimestres():
+    return snapshot["resumos"]["trimestres"]
+
+def memoria_crescimento(inicio, fim, limite):
+    return memoria_analise(snapshot["resumos"], ("crescimento", inicio, fim, limite),
+                           lambda resumos: analises_trimestre.crescimento(
+                               resumos["operadora"], resumos["operadoras"], inicio, fim, limite))
+
+def memoria_top_ufs(trimestre, limite):
+    return memoria_analise(snapshot["resumos"], ("top_ufs", trimestre, limite),
+                           lambda resumos: analises_trimestre.top_ufs(
+                               resumos["operadora"], resumos["operadoras"], trimestre, limite))
+
+def memoria_acima_da_media(minimo, limite):
+    return memoria_analise(snapshot["resumos"], ("acima_da_media", minimo, limite),
+                           lambda resumos: analises_trimestre.acima_da_media(
+                               resumos["operadora"], resumos["operadoras"], minimo, limite))
+
+def memoria_status():
+    snap = snapshot
+    return {
+        "modo": "memoria",
+        "versao": snap["estatisticas"]["etag"],
+        "registros": len(snap["df_operadoras"]),
+        "registros_agregados": len(snap["df_agregado"]),
+        "carregado_em": snap["carregado_em"],
+        "tempo_carga_s": round(snap["tempo_carga"], 3),
+        "memoria_mb": {chave.replace("_bytes", ""): round(valor / 2**20, 2)
+                       for chave, valor in snap["memoria"].items()},
+        "cargas": cargas,
+        "snapshot_anterior_em_uso": snapshot_anterior_em_uso
+    }
+
+def memoria_recarregar():
+    recarregar_dados(forcar=True)
+    return memoria_status()
+
+REPOSITORIO_MEMORIA = {
+    "listar": memoria_listar,
+    "cursor": memoria_cursor,
+    "detalhes": memoria_detalhes,
+    "despesas": memoria_despesas,
+    "estatisticas": memoria_estatisticas,
+    "buscar": memoria_buscar,
+    "status": memoria_status,
+    "recarregar": memoria_recarregar,
+    "trimestres": memoria_trimestres,
+    "crescimento": memoria_crescimento,
+    "top_ufs": memoria_top_ufs,
+    "acima_da_media": memoria_acima_da_media,
+}
+
+ANS_BANCO = os.environ.get("ANS_BANCO")
+if ANS_BANCO:
+    pool = repositorio_banco.criar_pool(ANS_BANCO)
+    repositorio = repositorio_banco.criar_repositorio(pool, app.json.dumps)
+    print(f"\n🗄️  Modo banco: {pool['tipo']}, pool de até {pool['tamanho']} conexões "
+          f"(espera máxima {pool['espera_maxima']}s)")
+else:
+    recarregar_dados(forcar=True)
+    repositorio = REPOSITORIO_MEMORIA
+
+# -----------------------------------------------------------------
+# MÉTRICAS: latência de cada rota (e perfil de uma requisição)
+# -----------------------------------------------------------------
+@app.before_request
+def iniciar_medida():
+    g.inicio = time.perf_counter()
+    g.perfil = None
+    # Com ANS_PERFIL=1 no servidor, ?perfil=1 grava o cProfile desta requisição
+    if metricas.PERFIL_ATIVO and request.args.get("perfil"):
+        g.perfil = metricas.iniciar_perfil()
+
+@app.after_request
+def concluir_medida(resposta):
+    # A regra da rota (/api/operadoras/<cnpj>), não a URL: uma série por rota
+    rota = request.url_rule.rule if request.url_rule else "sem_rota"
+    if g.get("perfil") is not None:
+        nome = rota.strip("/").replace("/", "_").replace("<", "").replace(">", "") or "raiz"
+        resposta.headers["X-Perfil"] = metricas.concluir_perfil(g.perfil, nome)
+    if "inicio" in g:
+        metricas.registrar_requisicao(rota, request.method, resposta.status_code,
+                                      time.perf_counter() - g.inicio)
+    return resposta
+
+def medidas_instantaneas():
+    # Valores do momento para o /metrics (gauges)
+    if ANS_BANCO:
+        return {
+            "ans_pool_conexoes_abertas": pool["abertas"],
+            "ans_pool_conexoes_livres": pool["livres"].qsize(),
+            "ans_pool_esgotado_total": pool["esgotado"],
+        }
+    snap = snapshot
+    return {
+        "ans_snapshot_registros": len(snap["df_operadoras"]),
+        "ans_snapshot_carga_segundos": round(snap["tempo_carga"], 4),
+        "ans_snapshot_memoria_bytes": snap["memoria"]["depois_bytes"],
+        "ans_snapshot_cargas_total": cargas,
+        "ans_snapshot_anterior_em_uso_total": snapshot_anterior_em_uso,
+    }
+
+@app.route('/metrics', methods=['GET'])
+def metricas_prometheus():
+    """
+    Métricas no formato texto do Prometheus (por processo: com vários
+    workers, cada um responde com as suas)
+    """
+    return app.response_class(metricas.texto_prometheus(medidas_instantaneas()),
+                              mimetype="text/plain; version=0.0.4")
+
+@app.errorhandler(repositorio_banco.PoolEsgotado)
+def pool_esgotado(e):
+    # Banco ocupado: melhor pedir para tentar de novo do que enfileirar sem fim
+    return jsonify({
+        "success": False,
+        "error": str(e)
+    }), 503
 
 # -----------------------------------------------------------------
 # ROTA 1: Listar operadoras com paginação
@@ -62,39 +569,97 @@ def listar_operadoras():
     """
     Retorna lista de operadoras com paginação
     Exemplo: /api/operadoras?page=1&limit=10
+    Por cursor: /api/operadoras?cursor=&limit=100 (primeira página) e depois
+    /api/operadoras?cursor=<next_cursor da resposta anterior>
     """
     try:
         # Pega parâmetros da URL
         page = request.args.get('page', 1, type=int)
         limit = request.args.get('limit', 10, type=int)
+        uf = request.args.get('uf')
         
-        # Calcula início e fim
-        start = (page - 1) * limit
-        end = start + limit
+        if 'cursor' in request.args:
+            if uf:
+                return jsonify({
+                    "success": False,
+                    "error": "Filtro por UF não é suportado no modo cursor"
+                }), 400
+            limit = max(1, min(limit, LIMITE_MAXIMO_CURSOR))
+            cursor = request.args['cursor']
+            try:
+                ultima = decodificar_cursor(cursor) if cursor else None
+            except ValueError as e:
+                return jsonify({
+                    "success": False,
+                    "error": str(e)
+                }), 400
+            dados, proxima, total = repositorio["cursor"](ultima, limit)
+            return jsonify({
+                "success": True,
+                "data": dados,
+                "pagination": {
+                    "limit": limit,
+                    "next_cursor": codificar_cursor(proxima) if proxima else None,
+                    "total": total
+                }
+            })
+        
+        # Mesmos limites da busca: limit=0 não divide por zero em "pages"
+        # e limit negativo não vira um LIMIT -1 (sem limite) no banco
+        page = max(1, page)
+        limit = max(1, min(limit, LIMITE_MAXIMO_LISTAGEM))
+        dados, total = repositorio["listar"](page, limit, uf)
+        
+        return jsonify({
+            "success": True,
+            "data": dados,
+            "pagination": {
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "pages": (total + limit - 1) // limit
+            }
+        })
         
-        # -----------------------------------------------------------------
-        # TRADE-OFF: Paginação
-        # -----------------------------------------------------------------
-        print("\n TRADE-OFF: Como fazer paginação?")
-        print("   Opção A: Offset-based (SELECT ... LIMIT X OFFSET Y)")
-        print("   Opção B: Cursor-based (mais complexo, melhor performance)")
-        print("   ESCOLHI: Offset-based")
-        print("   POR QUÊ: Dados pequenos, implementação simples")
+    except repositorio_banco.PoolEsgotado:
+        raise
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+# -----------------------------------------------------------------
+# ROTA 1b: Busca de operadoras por nome ou CNPJ
+# -----------------------------------------------------------------
+@app.route('/api/operadoras/search', methods=['GET'])
+def buscar_operadoras():
+    """
+    Busca no servidor, sem acentos e por começo de palavra
+    Exemplo: /api/operadoras/search?q=saude&page=1&limit=10
+    (uma linha por operadora, com o total de despesas)
+    """
+    try:
+        q = request.args.get('q', '')
+        page = max(1, request.args.get('page', 1, type=int))
+        limit = max(1, min(request.args.get('limit', 10, type=int), LIMITE_MAXIMO_BUSCA))
         
-        # Pega os dados paginados
-        dados = df_operadoras.iloc[start:end].to_dict('records')
+        dados, total = repositorio["buscar"](q, page, limit)
         
         return jsonify({
             "success": True,
+            "query": q,
             "data": dados,
             "pagination": {
                 "page": page,
                 "limit": limit,
-                "total": len(df_operadoras),
-                "pages": (len(df_operadoras) + limit - 1) // limit
+                "total": total,
+                "pages": (total + limit - 1) // limit
             }
         })
         
+    except repositorio_banco.PoolEsgotado:
+        raise
     except Exception as e:
         return jsonify({
             "success": False,
@@ -110,31 +675,21 @@ def detalhes_operadora(cnpj):
     Retorna detalhes de uma operadora específica
     """
     try:
-        # Filtra pelo CNPJ
-        operadora = df_operadoras[df_operadoras['CNPJ'] == cnpj]
+        resultado = repositorio["detalhes"](normalizar_cnpj(cnpj))
         
-        if operadora.empty:
+        if resultado is None:
             return jsonify({
                 "success": False,
                 "error": "Operadora não encontrada"
             }), 404
         
-        # Pega dados agregados também
-        agregado = df_agregado[df_agregado['RazaoSocial'] == operadora.iloc[0]['RazaoSocial']]
-        
-        resultado = {
-            "cnpj": operadora.iloc[0]['CNPJ'],
-            "razao_social": operadora.iloc[0]['RazaoSocial'],
-            "uf": operadora.iloc[0]['UF'],
-            "despesas": operadora['ValorDespesas'].sum(),
-            "agregado": agregado.to_dict('records') if not agregado.empty else []
-        }
-        
         return jsonify({
             "success": True,
             "data": resultado
         })
         
+    except repositorio_banco.PoolEsgotado:
+        raise
     except Exception as e:
         return jsonify({
             "success": False,
@@ -148,30 +703,19 @@ def detalhes_operadora(cnpj):
 def estatisticas():
     """
     Retorna estatísticas agregadas
+    (calculadas na carga dos dados; aqui só devolve a resposta pronta)
     """
     try:
-        # -----------------------------------------------------------------
-        # TRADE-OFF: Cache vs cálculo na hora
-        # -----------------------------------------------------------------
-        print("\n🤔 TRADE-OFF: Cache ou calcular sempre?")
-        print("   Opção A: Calcular sempre → Dados sempre atualizados")
-        print("   Opção B: Cache por 5 minutos → Mais rápido")
-        print("   ✅ ESCOLHI: Calcular sempre")
-        print("   POR QUÊ: Dados pequenos, atualização frequente")
-        
-        estatisticas = {
-            "total_operadoras": len(df_operadoras),
-            "total_despesas": df_operadoras['ValorDespesas'].sum(),
-            "media_despesas": df_operadoras['ValorDespesas'].mean(),
-            "top_5_operadoras": df_agregado.head(5).to_dict('records'),
-            "distribuicao_uf": df_agregado.groupby('UF')['TotalDespesas'].sum().to_dict()
-        }
+        cache = repositorio["estatisticas"]()
+        resposta = app.response_class(cache["corpo"], mimetype="application/json")
         
-        return jsonify({
-            "success": True,
-            "data": estatisticas
-        })
+        # Com o ETag o navegador pergunta "mudou?" e recebe 304 se não mudou
+        resposta.set_etag(cache["etag"])
+        resposta.headers["Cache-Control"] = "no-cache"
+        return resposta.make_conditional(request)
         
+    except repositorio_banco.PoolEsgotado:
+        raise
     except Exception as e:
         return jsonify({
             "success": False,
@@ -187,10 +731,9 @@ def historico_despesas(cnpj):
     Retorna histórico de despesas de uma operadora
     """
     try:
-        # Filtra despesas pelo CNPJ
-        historico = df_operadoras[df_operadoras['CNPJ'] == cnpj]
+        historico = repositorio["despesas"](normalizar_cnpj(cnpj))
         
-        if historico.empty:
+        if historico is None:
             return jsonify({
                 "success": False,
                 "error": "Nenhuma despesa encontrada"
@@ -198,15 +741,183 @@ def historico_despesas(cnpj):
         
         return jsonify({
             "success": True,
-            "data": historico.to_dict('records')
+            "data": historico
+        })
+        
+    except repositorio_banco.PoolEsgotado:
+        raise
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+# -----------------------------------------------------------------
+# ROTAS 4b: Análises do Teste 3 (pelos resumos por trimestre)
+# -----------------------------------------------------------------
+LIMITE_MAXIMO_ANALISE = 100
+
+def erro_parametro(e):
+    return jsonify({
+        "success": False,
+        "error": str(e)
+    }), 400
+
+@app.route('/api/analises/crescimento', methods=['GET'])
+def analise_crescimento():
+    """
+    QUERY 1: operadoras com maior crescimento da despesa média
+    Exemplo: /api/analises/crescimento?inicio=2024-1&fim=2024-2&limit=5
+    (sem inicio/fim: primeiro e último trimestre carregados)
+    """
+    try:
+        try:
+            trimestres = repositorio["trimestres"]()
+            inicio = request.args.get('inicio')
+            fim = request.args.get('fim')
+            inicio = analises_trimestre.ler_trimestre(inicio) if inicio else (trimestres[0] if trimestres else None)
+            fim = analises_trimestre.ler_trimestre(fim) if fim else (trimestres[-1] if trimestres else None)
+        except ValueError as e:
+            return erro_parametro(e)
+        limit = max(1, min(request.args.get('limit', 5, type=int), LIMITE_MAXIMO_ANALISE))
+        
+        dados = repositorio["crescimento"](inicio, fim, limit) if inicio and fim else []
+        
+        return jsonify({
+            "success": True,
+            "data": dados,
+            "parametros": {
+                "inicio": "%d-%d" % inicio if inicio else None,
+                "fim": "%d-%d" % fim if fim else None,
+                "limit": limit
+            }
+        })
+        
+    except repositorio_banco.PoolEsgotado:
+        raise
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/analises/ufs', methods=['GET'])
+def analise_ufs():
+    """
+    QUERY 2: estados com maiores despesas
+    Exemplo: /api/analises/ufs?limit=5 ou /api/analises/ufs?trimestre=2024-1
+    """
+    try:
+        try:
+            trimestre = request.args.get('trimestre')
+            trimestre = analises_trimestre.ler_trimestre(trimestre) if trimestre else None
+        except ValueError as e:
+            return erro_parametro(e)
+        limit = max(1, min(request.args.get('limit', 5, type=int), LIMITE_MAXIMO_ANALISE))
+        
+        return jsonify({
+            "success": True,
+            "data": repositorio["top_ufs"](trimestre, limit),
+            "parametros": {
+                "trimestre": "%d-%d" % trimestre if trimestre else None,
+                "limit": limit
+            }
+        })
+        
+    except repositorio_banco.PoolEsgotado:
+        raise
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/analises/acima-da-media', methods=['GET'])
+def analise_acima_da_media():
+    """
+    QUERY 3: operadoras com despesas acima da média do trimestre
+    Exemplo: /api/analises/acima-da-media?minimo=2&limit=100
+    """
+    try:
+        minimo = max(1, request.args.get('minimo', 2, type=int))
+        limit = max(1, min(request.args.get('limit', LIMITE_MAXIMO_ANALISE, type=int), LIMITE_MAXIMO_ANALISE))
+        
+        return jsonify({
+            "success": True,
+            "data": repositorio["acima_da_media"](minimo, limit),
+            "parametros": {
+                "minimo": minimo,
+                "limit": limit
+            }
         })
         
+    except repositorio_banco.PoolEsgotado:
+        raise
     except Exception as e:
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+# -----------------------------------------------------------------
+# ROTA 5: Recarregar os dados
+# -----------------------------------------------------------------
+# Com ANS_TOKEN_RECARGA definida, a recarga exige o header
+# "Authorization: Bearer <token>"; sem ela, só aceita pedidos da própria máquina
+ANS_TOKEN_RECARGA = os.environ.get("ANS_TOKEN_RECARGA")
+ENDERECOS_LOCAIS = {"127.0.0.1", "::1"}
+
+
+def recarga_autorizada():
+    if ANS_TOKEN_RECARGA:
+        enviado = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        return hmac.compare_digest(enviado.encode(), ANS_TOKEN_RECARGA.encode())
+    return request.remote_addr in ENDERECOS_LOCAIS
+
+
+@app.route('/api/recarregar', methods=['POST'])
+def recarregar():
+    """
+    Relê os arquivos do pipeline (ex.: depois de um trimestre novo)
+    e recalcula índices e estatísticas
+    (no modo banco: descarta o cache de estatísticas e da busca)
+    """
+    if not recarga_autorizada():
+        return jsonify({
+            "success": False,
+            "error": "Recarga não autorizada"
+        }), 403
+
+    try:
+        return jsonify({
+            "success": True,
+            "data": repositorio["recarregar"]()
+        })
+        
+    except repositorio_banco.PoolEsgotado:
+        raise
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+# -----------------------------------------------------------------
+# ROTA 6: Situação dos dados carregados
+# -----------------------------------------------------------------
+@app.route('/api/status', methods=['GET'])
+def status():
+    """
+    Versão, tamanho e tempo de carga do snapshot em uso
+    (no modo banco: tamanho das tabelas e medidas do pool)
+    """
+    dados = repositorio["status"]()
+    dados["rotas"] = metricas.resumo_rotas()
+    return jsonify({
+        "success": True,
+        "data": dados
+    })
+
 # -----------------------------------------------------------------
 # INICIAR SERVIDOR
 # -----------------------------------------------------------------
@@ -216,9 +927,19 @@ if __name__ == '__main__':
     print("🌐 Acesse: http://localhost:5000")
     print("📚 Rotas disponíveis:")
     print("   • GET /api/operadoras")
+    print("   • GET /api/operadoras/search?q=")
     print("   • GET /api/operadoras/<cnpj>")
     print("   • GET /api/operadoras/<cnpj>/despesas")
     print("   • GET /api/estatisticas")
+    print("   • GET /api/analises/crescimento | ufs | acima-da-media")
+    print("   • POST /api/recarregar")
+    print("   • GET /api/status")
+    print("   • GET /metrics")
     print("=" * 50)
     
-    app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
+    # Com debug=True o Flask roda o app num processo filho (reloader);
+    # o monitor só precisa rodar nele (e só no modo memória)
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true" and not ANS_BANCO:
+        iniciar_monitor()
+    
+    app.run(debug=True, host='0.0.0.0', port=5001)
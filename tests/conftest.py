@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Os módulos ficam na raiz do projeto (mesmo esquema dos benchmarks)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+def gerar_consolidado(operadoras=30, trimestres=((2024, 1), (2024, 2), (2024, 3)), deslocamento=0):
+    """
+    Consolidado pequeno no formato do Teste 1 (uma linha por operadora e trimestre)
+    """
+    linhas = []
+    for i in range(operadoras):
+        for ano, trimestre in trimestres:
+            linhas.append({
+                "CNPJ": f"{i + deslocamento + 1:014d}",
+                "RazaoSocial": f"OPERADORA {i + deslocamento:03d}",
+                "Trimestre": trimestre,
+                "Ano": ano,
+                "ValorDespesas": round(1000 + i * 37.5 + trimestre * 10.01, 2),
+            })
+    return pd.DataFrame(linhas)
+
+
+def gerar_agregado(consolidado, ufs=("SP", "RJ", "MG")):
+    grupos = consolidado.groupby("RazaoSocial", sort=False)["ValorDespesas"]
+    agregado = pd.DataFrame({
+        "RazaoSocial": grupos.sum().index,
+        "TotalDespesas": grupos.sum().to_numpy(),
+        "MediaTrimestral": grupos.mean().to_numpy(),
+        "DesvioPadrao": grupos.std().to_numpy(),
+    })
+    agregado.insert(1, "UF", [ufs[i % len(ufs)] for i in range(len(agregado))])
+    return agregado
+
+
+@pytest.fixture
+def api():
+    """
+    teste4_api em modo memória (importado da raiz, com os dados de exemplo);
+    o snapshot original (e o estado da recarga) volta no fim de cada teste
+    """
+    atual = os.getcwd()
+    os.chdir(RAIZ)
+    try:
+        import teste4_api
+    finally:
+        os.chdir(atual)
+    original = (teste4_api.snapshot, teste4_api._snapshot_anterior, teste4_api.cargas,
+                teste4_api.snapshot_anterior_em_uso)
+    yield teste4_api
+    (teste4_api.snapshot, teste4_api._snapshot_anterior, teste4_api.cargas,
+     teste4_api.snapshot_anterior_em_uso) = original
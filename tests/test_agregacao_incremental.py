@@ -0,0 +1,75 @@
+"""
+Agregação incremental (agregacao_incremental.py): igual ao cálculo completo do Teste 2
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import gerar_consolidado
+
+import agregacao_incremental
+import teste2_validacao
+
+TRIMESTRES = ((2023, 4), (2024, 1), (2024, 2), (2024, 3))
+
+
+def despesas(deslocamento_valor=0.0):
+    df = gerar_consolidado(operadoras=12, trimestres=TRIMESTRES)
+    df["UF"] = np.where(df.index % 2 == 0, "SP", "RJ")
+    # Valores grandes com pouca variação: onde subtrair estados perde precisão
+    df["ValorDespesas"] = 1e9 + df["ValorDespesas"] + deslocamento_valor
+    return df
+
+
+def calculo_completo(df):
+    agregado = df.groupby(["RazaoSocial", "UF"]).agg({"ValorDespesas": ["sum", "mean", "std"]}).reset_index()
+    agregado.columns = ["RazaoSocial", "UF", "TotalDespesas", "MediaTrimestral", "DesvioPadrao"]
+    return agregado.sort_values("TotalDespesas", ascending=False).reset_index(drop=True)
+
+
+def atualizar(df, pasta):
+    for (ano, trimestre), parte in df.groupby(["Ano", "Trimestre"]):
+        agregacao_incremental.atualizar_trimestre(parte, ano, trimestre, pasta=pasta)
+
+
+def test_igual_ao_calculo_completo(tmp_path):
+    df = despesas()
+    atualizar(df, str(tmp_path))
+
+    resultado = agregacao_incremental.gerar_agregado(pasta=str(tmp_path))
+    pd.testing.assert_frame_equal(resultado, calculo_completo(df), check_dtype=False, rtol=1e-12)
+
+
+def test_n_continua_inteiro(tmp_path):
+    df = despesas()
+    atualizar(df, str(tmp_path))
+    # Grupo que só aparece num trimestre: o merge com os outros deixa lacunas
+    extra = df.iloc[[0]].assign(RazaoSocial="SO NO ULTIMO", Ano=2024, Trimestre=3)
+    agregacao_incremental.atualizar_trimestre(pd.concat([df[df["Trimestre"] == 3], extra]), 2024, 3,
+                                              pasta=str(tmp_path))
+
+    totais = pd.read_csv(tmp_path / "totais.csv", dtype=str)
+    assert not totais["n"].str.contains(r"\.").any()
+    assert agregacao_incremental.refazer_totais(str(tmp_path))["n"].dtype == "int64"
+
+
+def test_republicar_e_remover_trimestre(tmp_path):
+    df = despesas()
+    atualizar(df, str(tmp_path))
+
+    # A ANS republica 2024/1 com outros valores e 2023/4 sai do histórico
+    republicado = despesas(deslocamento_valor=123.45)
+    republicado = republicado[(republicado["Ano"] == 2024) & (republicado["Trimestre"] == 1)]
+    agregacao_incremental.atualizar_trimestre(republicado, 2024, 1, pasta=str(tmp_path))
+    agregacao_incremental.remover_trimestre(2023, 4, pasta=str(tmp_path))
+
+    restante = pd.concat([df[(df["Ano"] == 2024) & (df["Trimestre"] != 1)], republicado])
+    resultado = agregacao_incremental.gerar_agregado(pasta=str(tmp_path))
+    pd.testing.assert_frame_equal(resultado, calculo_completo(restante), check_dtype=False, rtol=1e-12)
+
+
+def test_trimestre_sem_incremental_e_recusado(capsys):
+    with pytest.raises(SystemExit):
+        teste2_validacao.main(["--trimestre", "2024-3"])
+    assert "--incremental" in capsys.readouterr().err
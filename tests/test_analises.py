@@ -0,0 +1,51 @@
+"""
+Análises por trimestre (analises_trimestre.py) e o cache delas no snapshot da API
+"""
+
+import math
+
+from conftest import gerar_agregado, gerar_consolidado
+
+import analises_trimestre
+import tipos_compactos
+
+
+def resumos_de(consolidado):
+    compacto = tipos_compactos.compactar(consolidado)
+    _, resumo_operadora = analises_trimestre.resumir(compacto)
+    operadoras = analises_trimestre.operadoras_com_uf(
+        compacto, tipos_compactos.compactar(gerar_agregado(consolidado)))
+    return resumo_operadora, operadoras
+
+
+def test_crescimento_com_media_inicial_zero():
+    consolidado = gerar_consolidado(operadoras=3, trimestres=((2024, 1), (2024, 2)))
+    zerada = (consolidado["CNPJ"] == consolidado["CNPJ"].iloc[0]) & (consolidado["Trimestre"] == 1)
+    consolidado.loc[zerada, "ValorDespesas"] = 0.0
+
+    resposta = analises_trimestre.crescimento(*resumos_de(consolidado), (2024, 1), (2024, 2), limite=10)
+
+    taxas = {linha["cnpj"]: linha["crescimento_percentual"] for linha in resposta}
+    assert all(math.isfinite(taxa) for taxa in taxas.values())
+    assert taxas[consolidado["CNPJ"].iloc[0]] == 0
+
+
+def test_resposta_guardada_no_snapshot_usado_no_calculo(api, monkeypatch):
+    consolidado = gerar_consolidado()
+    api.usar_dados(consolidado, gerar_agregado(consolidado))
+    antigo = api.snapshot
+    novo_consolidado = gerar_consolidado(deslocamento=100)
+
+    # Uma recarga acontece enquanto a análise está sendo calculada
+    calcular = analises_trimestre.crescimento
+
+    def calcular_durante_recarga(*args, **kwargs):
+        api.usar_dados(novo_consolidado, gerar_agregado(novo_consolidado))
+        return calcular(*args, **kwargs)
+
+    monkeypatch.setattr(analises_trimestre, "crescimento", calcular_durante_recarga)
+    api.memoria_crescimento((2024, 1), (2024, 3), 5)
+
+    assert api.snapshot is not antigo
+    assert api.snapshot["resumos"]["respostas"] == {}
+    assert len(antigo["resumos"]["respostas"]) == 1
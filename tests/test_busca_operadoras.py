@@ -0,0 +1,81 @@
+"""
+Busca de operadoras (busca_operadoras.py): acentos, CNPJ com pontuação, ordem dos grupos e páginas
+"""
+
+import pandas as pd
+import pytest
+
+from conftest import gerar_consolidado
+
+import busca_operadoras
+
+NOMES = {
+    "11222333000181": "SAÚDE TOTAL LTDA",
+    "11222444000190": "CLÍNICA SAÚDE-VIDA",
+    "55666777000102": "UNIMED SÃO PAULO",
+    "11222555000155": "SAUDE",
+    "99888777000166": "AMIL ASSISTÊNCIA MÉDICA",
+}
+
+
+@pytest.fixture
+def indice():
+    # Operadoras genéricas ("OPERADORA 000"...) mais os nomes acima
+    consolidado = gerar_consolidado(operadoras=40)
+    extras = pd.DataFrame([{"CNPJ": cnpj, "RazaoSocial": nome, "Trimestre": 1, "Ano": 2024, "ValorDespesas": 10.0}
+                           for cnpj, nome in NOMES.items()])
+    return busca_operadoras.construir_indice_busca(pd.concat([consolidado, extras], ignore_index=True))
+
+
+def razoes(indice, consulta, **kwargs):
+    resultado, total = busca_operadoras.buscar(indice, consulta, **kwargs)
+    return resultado["RazaoSocial"].tolist(), total
+
+
+def test_sem_acento_encontra_com_acento(indice):
+    encontradas, total = razoes(indice, "saude")
+    assert set(encontradas) == {"SAÚDE TOTAL LTDA", "CLÍNICA SAÚDE-VIDA", "SAUDE"}
+    assert total == 3
+    assert razoes(indice, "sao paulo")[0] == ["UNIMED SÃO PAULO"]
+    assert razoes(indice, "Assistencia Medica")[0] == ["AMIL ASSISTÊNCIA MÉDICA"]
+
+
+def test_cnpj_com_pontuacao(indice):
+    encontradas, total = razoes(indice, "11.222.3")
+    assert encontradas == ["SAÚDE TOTAL LTDA"]
+    assert total == 1
+    assert set(razoes(indice, "11.222")[0]) == {"SAÚDE TOTAL LTDA", "CLÍNICA SAÚDE-VIDA", "SAUDE"}
+    assert razoes(indice, "55.666.777/0001-02")[0] == ["UNIMED SÃO PAULO"]
+
+
+def test_comeco_do_nome_antes_de_palavra(indice):
+    # Grupo 1 (nome começa com "saude"), do mais curto para o mais longo;
+    # depois o grupo 2 ("saude" é começo de uma palavra do meio)
+    assert razoes(indice, "saude")[0] == ["SAUDE", "SAÚDE TOTAL LTDA", "CLÍNICA SAÚDE-VIDA"]
+
+
+@pytest.mark.parametrize("limite", [1, 3, 7, 40])
+def test_paginas_iguais_a_ordenar_tudo(indice, limite):
+    completa, total = razoes(indice, "operadora", limite=1000)
+    assert total == 40
+    assert completa == sorted(completa, key=lambda nome: (len(nome), nome))
+
+    paginas = []
+    for pagina in range(1, total // limite + 2):
+        encontradas, total_pagina = razoes(indice, "operadora", limite=limite, pagina=pagina)
+        assert total_pagina == total
+        paginas.append(encontradas)
+
+    # Todas cheias menos a última, que tem só o resto
+    assert all(len(p) == limite for p in paginas[:-1])
+    assert len(paginas[-1]) == total % limite
+    assert sum(paginas, []) == completa
+    assert razoes(indice, "operadora", limite=limite, pagina=total // limite + 5) == ([], total)
+
+
+@pytest.mark.parametrize("consulta", ["", "   ", "--", "nenhuma", "saude inexistente", "000999"])
+def test_sem_resultado(indice, consulta):
+    resultado, total = busca_operadoras.buscar(indice, consulta)
+    assert total == 0
+    assert resultado.empty
+    assert list(resultado.columns) == list(indice["operadoras"].columns)
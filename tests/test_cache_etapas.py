@@ -0,0 +1,141 @@
+"""
+Impressão digital das etapas (cache_etapas.py): o código e as entradas que decidem a saída
+"""
+
+import os
+
+import pytest
+
+from conftest import gerar_consolidado
+
+import cache_etapas
+import formato_colunar
+import teste1_api
+import teste2_validacao
+import tipos_compactos
+
+
+def nomes(arquivos):
+    return {os.path.basename(arquivo) for arquivo in arquivos}
+
+
+def test_modulos_importados_indiretamente_entram():
+    assert {"teste1_api.py", "formato_colunar.py", "zip_paralelo.py"} <= nomes(
+        cache_etapas.modulos_do_projeto(teste1_api))
+    # tipos_compactos → cadastro_operadoras
+    assert nomes(cache_etapas.modulos_do_projeto(tipos_compactos)) == {"tipos_compactos.py", "cadastro_operadoras.py"}
+
+
+@pytest.fixture
+def impressoes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("dados")
+    gerar_consolidado().to_csv(formato_colunar.CONSOLIDADO_CSV, index=False)
+
+    chamadas = []
+    calcular = cache_etapas.impressao_digital
+
+    def guardar_argumentos(etapa, entradas, parametros=None, codigo=(), **kwargs):
+        chamadas.append({"entradas": entradas, "parametros": parametros, "codigo": nomes(codigo)})
+        return calcular(etapa, entradas, parametros, codigo, **kwargs)
+
+    monkeypatch.setattr(cache_etapas, "impressao_digital", guardar_argumentos)
+    return chamadas
+
+
+def test_teste2_so_usa_a_fonte_lida(impressoes):
+    teste2_validacao.main([])
+    assert impressoes[-1]["parametros"]["fonte"] == "csv"
+    assert formato_colunar.CONSOLIDADO_PARQUET not in impressoes[-1]["entradas"]
+    assert "cadastro_operadoras.py" in impressoes[-1]["codigo"]
+
+    if formato_colunar.PARQUET_DISPONIVEL:
+        df = formato_colunar.carregar_consolidado()
+        formato_colunar.salvar_consolidado_parquet(df)
+        teste2_validacao.main([])
+        assert impressoes[-1]["parametros"]["fonte"] == "parquet"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # Hashes anotados de outro teste (outra pasta) não valem aqui
+    monkeypatch.setattr(cache_etapas, "_hashes", None)
+    monkeypatch.chdir(tmp_path)
+    return str(tmp_path / "cache")
+
+
+def escrever(caminho, texto):
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write(texto)
+
+
+def ler(caminho):
+    with open(caminho, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_guardar_e_restaurar(cache):
+    os.makedirs("saida/particoes")
+    escrever("saida/a.csv", "a,b\n1,2\n")
+    escrever("saida/particoes/parte-0.txt", "zero")
+    saidas = ["saida/a.csv", "saida/particoes"]
+    chave = cache_etapas.impressao_digital("etapa", [], {"x": 1}, pasta=cache)
+    data_original = os.stat("saida/a.csv").st_mtime_ns
+
+    cache_etapas.guardar(chave, saidas, pasta=cache)
+    escrever("saida/a.csv", "alterado")
+    escrever("saida/particoes/parte-0.txt", "alterado")
+
+    assert cache_etapas.restaurar(chave, saidas, pasta=cache)
+    assert ler("saida/a.csv") == "a,b\n1,2\n"
+    assert ler("saida/particoes/parte-0.txt") == "zero"
+    assert os.stat("saida/a.csv").st_mtime_ns == data_original
+
+    # Saída que não foi guardada: não restaura nada
+    assert not cache_etapas.restaurar(chave, saidas + ["saida/outra.csv"], pasta=cache)
+    assert not cache_etapas.restaurar("nao-existe", saidas, pasta=cache)
+
+
+def test_entrada_ou_modulo_alterado_nao_acha(cache):
+    escrever("entrada.csv", "1\n")
+    # Cópia dos .py (tipos_compactos importa cadastro_operadoras)
+    codigo = []
+    for arquivo in cache_etapas.modulos_do_projeto(tipos_compactos):
+        codigo.append(os.path.basename(arquivo))
+        escrever(codigo[-1], ler(arquivo))
+    escrever("saida.csv", "resultado")
+
+    def chave():
+        return cache_etapas.impressao_digital("etapa", ["entrada.csv"], codigo=codigo, pasta=cache)
+
+    original = chave()
+    cache_etapas.guardar(original, ["saida.csv"], pasta=cache)
+    assert chave() == original
+
+    escrever("entrada.csv", "2\n")
+    assert chave() != original
+    assert not cache_etapas.restaurar(chave(), ["saida.csv"], pasta=cache)
+
+    escrever("entrada.csv", "1\n")
+    assert chave() == original
+    escrever("cadastro_operadoras.py", ler("cadastro_operadoras.py") + "\n# mudou\n")
+    assert chave() != original
+    assert not cache_etapas.restaurar(chave(), ["saida.csv"], pasta=cache)
+
+
+def test_limpar_apaga_as_menos_usadas(cache):
+    escrever("saida.bin", "x" * 1000)
+    for numero, chave in enumerate(["velha", "media", "nova"]):
+        cache_etapas.guardar(chave, ["saida.bin"], pasta=cache, limite=10 ** 6)
+        os.utime(os.path.join(cache, chave), (1000 + numero, 1000 + numero))
+    # Restaurar conta como uso: "velha" passa a ser a mais recente
+    assert cache_etapas.restaurar("velha", ["saida.bin"], pasta=cache)
+    tamanho = cache_etapas._tamanho(os.path.join(cache, "velha"))
+
+    # Cabem duas entradas: só a usada há mais tempo sai
+    assert cache_etapas.limpar(cache, limite=2 * tamanho) == 1
+    assert sorted(os.listdir(cache)) == ["hashes.json", "nova", "velha"]
+
+    # A que acabou de ser guardada fica, mesmo sozinha passando do limite
+    assert cache_etapas.guardar("nova", ["saida.bin"], pasta=cache, limite=1) == 1
+    assert sorted(os.listdir(cache)) == ["hashes.json", "nova"]
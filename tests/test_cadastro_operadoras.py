@@ -0,0 +1,120 @@
+"""
+JOIN com o cadastro (cadastro_operadoras.py): juntar dá o mesmo resultado do pd.merge(..., how="left")
+"""
+
+import os
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cadastro_operadoras
+
+MODALIDADES = ["Medicina de Grupo", "Cooperativa Médica", "Autogestão", "Odontologia de Grupo"]
+UFS = ["SP", "RJ", "MG", "RS", None]
+
+
+def gerar_cadastro(quantidade=300, semente=3):
+    rng = random.Random(semente)
+    linhas = []
+    for i in range(quantidade):
+        linhas.append({
+            "Registro_ANS": str(300000 + i) if rng.random() > 0.05 else None,
+            "CNPJ": f"{rng.randrange(10 ** 13, 10 ** 14):014d}",
+            "Razao_Social": f"OPERADORA {i}",
+            "Modalidade": rng.choice(MODALIDADES),
+            "UF": rng.choice(UFS),
+        })
+    cadastro = pd.DataFrame(linhas)
+    # CNPJ repetido com outros dados (vale a primeira linha) e um inválido
+    repetidos = cadastro.iloc[:10].assign(Registro_ANS="999999", UF="AC")
+    invalido = pd.DataFrame([{"Registro_ANS": "1", "CNPJ": "123", "Razao_Social": "X", "Modalidade": "Y", "UF": "AM"}])
+    return pd.concat([cadastro, repetidos, invalido], ignore_index=True)
+
+
+def gerar_despesas(cadastro, quantidade=2000, semente=4):
+    rng = random.Random(semente)
+    cnpjs = cadastro["CNPJ"].tolist()
+    valores = []
+    for _ in range(quantidade):
+        sorteio = rng.random()
+        if sorteio < 0.7:
+            valores.append(rng.choice(cnpjs))
+        elif sorteio < 0.8:
+            cnpj = rng.choice(cnpjs)
+            valores.append(f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}")
+        elif sorteio < 0.95:
+            # Fora do cadastro
+            valores.append(f"{rng.randrange(10 ** 13):014d}")
+        else:
+            valores.append(rng.choice(["", "123", None]))
+    return pd.DataFrame({"CNPJ": valores, "ValorDespesas": np.arange(quantidade, dtype=float)})
+
+
+def com_merge(despesas, cadastro):
+    """
+    O JOIN antigo, com o CNPJ em texto (só dígitos) e a primeira linha de cada CNPJ do cadastro
+    """
+    cadastro = cadastro.rename(columns=cadastro_operadoras.COLUNAS_CADOP)
+    cadastro = cadastro[cadastro["CNPJ"].str.fullmatch(r"\d{14}")].drop_duplicates("CNPJ", keep="first")
+    chave = despesas["CNPJ"].str.replace(r"\D", "", regex=True)
+    resultado = pd.merge(despesas.assign(Chave=chave),
+                         cadastro[["CNPJ", "RegistroANS", "Modalidade", "UF"]].rename(columns={"CNPJ": "Chave"}),
+                         on="Chave", how="left")
+    return resultado.drop(columns="Chave")
+
+
+def comparar(juntado, esperado):
+    assert len(juntado) == len(esperado)
+    assert juntado["CNPJ"].tolist() == esperado["CNPJ"].tolist()
+    assert juntado["RegistroANS"].tolist() == pd.to_numeric(esperado["RegistroANS"]).astype("Int64").tolist()
+    for coluna in ("Modalidade", "UF"):
+        assert juntado[coluna].astype(object).where(juntado[coluna].notna(), None).tolist() == \
+            esperado[coluna].astype(object).where(esperado[coluna].notna(), None).tolist()
+
+
+def salvar(cadastro, caminho):
+    cadastro.to_csv(caminho, sep=";", index=False)
+
+
+@pytest.fixture
+def arquivos(tmp_path):
+    return str(tmp_path / "Relatorio_cadop.csv"), str(tmp_path / "indice")
+
+
+def test_igual_ao_merge(arquivos):
+    caminho, pasta = arquivos
+    cadastro = gerar_cadastro()
+    despesas = gerar_despesas(cadastro)
+    salvar(cadastro, caminho)
+
+    juntado = cadastro_operadoras.juntar(despesas, cadastro_operadoras.carregar_indice(caminho, pasta))
+
+    comparar(juntado, com_merge(despesas, pd.read_csv(caminho, sep=";", dtype=str)))
+    assert juntado["RegistroANS"].isna().any() and juntado["RegistroANS"].notna().any()
+    # CNPJ repetido no cadastro não duplica a despesa
+    assert len(juntado) == len(despesas)
+
+
+def test_indice_refeito_quando_o_cadastro_muda(arquivos):
+    caminho, pasta = arquivos
+    cadastro = gerar_cadastro()
+    despesas = gerar_despesas(cadastro)
+    salvar(cadastro, caminho)
+    cadastro_operadoras.carregar_indice(caminho, pasta)
+    gravado = os.stat(os.path.join(pasta, "cnpjs.npy")).st_mtime_ns
+
+    # Mesmo arquivo: abre o índice gravado
+    cadastro_operadoras.carregar_indice(caminho, pasta)
+    assert os.stat(os.path.join(pasta, "cnpjs.npy")).st_mtime_ns == gravado
+
+    # Cadastro novo: operadoras que saem, que entram e que mudam de UF
+    novo = pd.concat([cadastro.iloc[50:].assign(UF=cadastro["UF"].iloc[50:].replace("SP", "PR")),
+                      gerar_cadastro(40, semente=9)], ignore_index=True)
+    salvar(novo, caminho)
+
+    juntado = cadastro_operadoras.juntar(despesas, cadastro_operadoras.carregar_indice(caminho, pasta))
+
+    comparar(juntado, com_merge(despesas, pd.read_csv(caminho, sep=";", dtype=str)))
+    assert "PR" in set(juntado["UF"].dropna())
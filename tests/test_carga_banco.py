@@ -0,0 +1,114 @@
+"""
+Carga no SQLite (teste3_carga.py): upsert idempotente, resumos por trimestre e índices recriados
+"""
+
+import sqlite3
+
+import pytest
+
+from conftest import RAIZ, gerar_agregado, gerar_consolidado
+
+import teste3_carga
+
+
+@pytest.fixture
+def arquivos(tmp_path, monkeypatch):
+    # O schema (teste3_banco.sql) é lido da raiz do projeto
+    monkeypatch.chdir(RAIZ)
+    consolidado = gerar_consolidado(operadoras=40)
+    caminhos = {"consolidado": str(tmp_path / "consolidado.csv"), "agregado": str(tmp_path / "agregado.csv"),
+                "destino": str(tmp_path / "ans.db")}
+    consolidado.to_csv(caminhos["consolidado"], index=False)
+    gerar_agregado(consolidado).to_csv(caminhos["agregado"], index=False)
+    return consolidado, caminhos
+
+
+def carregar(caminhos, **kwargs):
+    banco = teste3_carga.conectar(caminhos["destino"])
+    try:
+        return teste3_carga.carregar(banco, caminhos["consolidado"], caminhos["agregado"], **kwargs)
+    finally:
+        banco["conexao"].close()
+
+
+def consultar(caminhos, sql):
+    with sqlite3.connect(caminhos["destino"]) as conexao:
+        return conexao.execute(sql).fetchall()
+
+
+def test_carga_repetida_nao_duplica(arquivos):
+    consolidado, caminhos = arquivos
+    carregar(caminhos)
+    primeira = consultar(caminhos, "SELECT cnpj, ano, trimestre, valor_despesas FROM despesas ORDER BY 1, 2, 3")
+    carregar(caminhos)
+
+    assert len(primeira) == len(consolidado)
+    assert consultar(caminhos, "SELECT cnpj, ano, trimestre, valor_despesas FROM despesas ORDER BY 1, 2, 3") == primeira
+    assert consultar(caminhos, "SELECT COUNT(*) FROM operadoras") == [(40,)]
+    assert consultar(caminhos, "SELECT COUNT(*) FROM despesas_agregadas") == [(40,)]
+
+
+def test_linha_alterada_e_atualizada(arquivos):
+    consolidado, caminhos = arquivos
+    carregar(caminhos)
+
+    # Trimestre recarregado com um valor corrigido
+    alterado = consolidado[consolidado["Trimestre"] == 2].copy()
+    alterado.loc[alterado.index[0], "ValorDespesas"] = 123456.78
+    alterado.to_csv(caminhos["consolidado"], index=False)
+    carregar(caminhos)
+
+    cnpj = alterado["CNPJ"].iloc[0]
+    assert consultar(caminhos, f"SELECT valor_despesas FROM despesas WHERE cnpj = '{cnpj}' "
+                               "AND ano = 2024 AND trimestre = 2") == [(123456.78,)]
+    assert consultar(caminhos, "SELECT COUNT(*) FROM despesas") == [(len(consolidado),)]
+
+
+def test_resumos_iguais_as_despesas(arquivos):
+    consolidado, caminhos = arquivos
+    relatorio = carregar(caminhos)
+    assert relatorio["trimestres"] == ["2024-1", "2024-2", "2024-3"]
+
+    resumos = consultar(caminhos, "SELECT ano, trimestre, total_despesas, qtd_despesas "
+                                  "FROM resumo_trimestre ORDER BY 1, 2")
+    despesas = consultar(caminhos, "SELECT ano, trimestre, SUM(valor_despesas), COUNT(*) "
+                                   "FROM despesas GROUP BY 1, 2 ORDER BY 1, 2")
+    assert resumos == despesas
+    for ano, trimestre, total, quantidade in resumos:
+        do_trimestre = consolidado[consolidado["Trimestre"] == trimestre]
+        assert quantidade == len(do_trimestre)
+        assert total == pytest.approx(do_trimestre["ValorDespesas"].sum())
+
+    por_operadora = consultar(caminhos, "SELECT r.total_despesas, d.valor_despesas FROM resumo_operadora_trimestre r "
+                                        "JOIN despesas d USING (cnpj, ano, trimestre)")
+    assert len(por_operadora) == len(consolidado)
+    assert all(total == pytest.approx(valor) for total, valor in por_operadora)
+
+
+def test_indices_recriados_acima_do_limiar(arquivos, monkeypatch):
+    consolidado, caminhos = arquivos
+    esperados = {"idx_despesas_periodo", "idx_despesas_cnpj", "idx_despesas_chave", "idx_despesas_valor"}
+    apagados = []
+    executar = teste3_carga.executar
+
+    def guardar_drops(banco, sql, parametros=()):
+        if sql.startswith("DROP INDEX"):
+            apagados.append(sql.split()[-1])
+        return executar(banco, sql, parametros)
+
+    monkeypatch.setattr(teste3_carga, "executar", guardar_drops)
+
+    # Abaixo do limiar: os índices ficam
+    assert not carregar(caminhos)["indices_recriados"]
+    assert not apagados
+
+    monkeypatch.setattr(teste3_carga, "LIMIAR_RECRIAR_INDICES", 10)
+    relatorio = carregar(caminhos)
+
+    assert relatorio["indices_recriados"]
+    assert "indices" in relatorio["etapas"]
+    assert set(apagados) == esperados
+    existentes = {nome for (nome,) in consultar(caminhos, "SELECT name FROM sqlite_master "
+                                                          "WHERE type = 'index' AND tbl_name = 'despesas'")}
+    assert esperados <= existentes
+    assert consultar(caminhos, "SELECT COUNT(*) FROM despesas") == [(len(consolidado),)]
@@ -0,0 +1,159 @@
+"""
+Download do Teste 1 contra um servidor HTTP local: arquivo inteiro (200),
+continuação (206), sem alterações (304), faixa inválida (416) e
+atualização interrompida no meio
+"""
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import teste1_api
+
+
+class Servidor:
+    def __init__(self):
+        self.conteudo = b"0123456789" * 1000
+        self.etag = '"v1"'
+        self.cortar = False  # manda só metade e fecha a conexão
+        self.pedidos = []    # (status, cabeçalhos recebidos)
+
+
+def criar_handler(estado):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def responder(self, status, corpo=b"", cabecalhos=()):
+            estado.pedidos.append((status, dict(self.headers)))
+            self.send_response(status)
+            self.send_header("ETag", estado.etag)
+            for nome, valor in cabecalhos:
+                self.send_header(nome, valor)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            if estado.cortar:
+                self.wfile.write(corpo[:len(corpo) // 2])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            conteudo = estado.conteudo
+            if self.headers.get("If-None-Match") == estado.etag:
+                return self.responder(304)
+            faixa = self.headers.get("Range")
+            if_range = self.headers.get("If-Range")
+            if faixa and (if_range is None or if_range == estado.etag):
+                inicio = int(faixa.removeprefix("bytes=").rstrip("-"))
+                if inicio >= len(conteudo):
+                    return self.responder(416, cabecalhos=[("Content-Range", f"bytes */{len(conteudo)}")])
+                return self.responder(206, conteudo[inicio:], [
+                    ("Content-Range", f"bytes {inicio}-{len(conteudo) - 1}/{len(conteudo)}")])
+            return self.responder(200, conteudo)
+
+    return Handler
+
+
+@pytest.fixture
+def servidor():
+    estado = Servidor()
+    http = ThreadingHTTPServer(("127.0.0.1", 0), criar_handler(estado))
+    thread = threading.Thread(target=http.serve_forever, daemon=True)
+    thread.start()
+    estado.url = f"http://127.0.0.1:{http.server_address[1]}/arquivo.zip"
+    yield estado
+    http.shutdown()
+    http.server_close()
+
+
+def ler(caminho, modo="rb"):
+    with open(caminho, modo) as f:
+        return f.read()
+
+
+def test_200_baixa_inteiro_e_grava_validadores(servidor, tmp_path):
+    destino = str(tmp_path / "arquivo.zip")
+    assert teste1_api.baixar_arquivo(servidor.url, destino)
+
+    assert ler(destino) == servidor.conteudo
+    assert json.loads(ler(destino + ".meta.json", "r"))["etag"] == '"v1"'
+    assert not os.path.exists(destino + ".part")
+    assert not os.path.exists(destino + ".part.meta.json")
+
+
+def test_304_mantem_arquivo(servidor, tmp_path):
+    destino = str(tmp_path / "arquivo.zip")
+    teste1_api.baixar_arquivo(servidor.url, destino)
+    assert teste1_api.baixar_arquivo(servidor.url, destino)
+
+    status, cabecalhos = servidor.pedidos[-1]
+    assert status == 304
+    assert cabecalhos["If-None-Match"] == '"v1"'
+    assert ler(destino) == servidor.conteudo
+
+
+def test_206_continua_do_part(servidor, tmp_path):
+    destino = str(tmp_path / "arquivo.zip")
+    with open(destino + ".part", "wb") as f:
+        f.write(servidor.conteudo[:3000])
+    with open(destino + ".part.meta.json", "w") as f:
+        json.dump({"etag": '"v1"', "last_modified": None}, f)
+
+    assert teste1_api.baixar_arquivo(servidor.url, destino)
+
+    status, cabecalhos = servidor.pedidos[-1]
+    assert status == 206
+    assert cabecalhos["Range"] == "bytes=3000-"
+    assert cabecalhos["If-Range"] == '"v1"'
+    assert ler(destino) == servidor.conteudo
+
+
+def test_part_de_outra_versao_baixa_tudo(servidor, tmp_path):
+    destino = str(tmp_path / "arquivo.zip")
+    with open(destino + ".part", "wb") as f:
+        f.write(b"x" * 3000)
+    with open(destino + ".part.meta.json", "w") as f:
+        json.dump({"etag": '"v0"', "last_modified": None}, f)
+
+    assert teste1_api.baixar_arquivo(servidor.url, destino)
+
+    assert servidor.pedidos[-1][0] == 200
+    assert ler(destino) == servidor.conteudo
+
+
+def test_416_recomeca(servidor, tmp_path):
+    destino = str(tmp_path / "arquivo.zip")
+    with open(destino + ".part", "wb") as f:
+        f.write(b"x" * (len(servidor.conteudo) + 10))
+
+    assert teste1_api.baixar_arquivo(servidor.url, destino)
+
+    assert [status for status, _ in servidor.pedidos] == [416, 200]
+    assert ler(destino) == servidor.conteudo
+
+
+def test_atualizacao_interrompida_nao_grava_validadores_novos(servidor, tmp_path):
+    destino = str(tmp_path / "arquivo.zip")
+    teste1_api.baixar_arquivo(servidor.url, destino)
+    antigo = servidor.conteudo
+
+    # Nova versão no servidor, e o download dela cai no meio
+    servidor.conteudo = b"abcdefghij" * 1000
+    servidor.etag = '"v2"'
+    servidor.cortar = True
+    assert not teste1_api.baixar_arquivo(servidor.url, destino)
+
+    assert ler(destino) == antigo
+    assert json.loads(ler(destino + ".meta.json", "r"))["etag"] == '"v1"'
+
+    # Na próxima execução o servidor não responde 304: baixa a versão nova
+    servidor.cortar = False
+    assert teste1_api.baixar_arquivo(servidor.url, destino)
+    assert servidor.pedidos[-1][0] == 200
+    assert ler(destino) == servidor.conteudo
+    assert json.loads(ler(destino + ".meta.json", "r"))["etag"] == '"v2"'
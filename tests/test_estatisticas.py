@@ -0,0 +1,40 @@
+"""
+/api/estatisticas: resposta pronta com ETag, 304 quando não mudou e ETag novo depois da recarga
+"""
+
+from conftest import gerar_agregado, gerar_consolidado
+
+
+def test_etag_e_304(api):
+    consolidado = gerar_consolidado()
+    api.usar_dados(consolidado, gerar_agregado(consolidado))
+    cliente = api.app.test_client()
+
+    resposta = cliente.get("/api/estatisticas")
+    etag = resposta.headers["ETag"]
+    assert resposta.status_code == 200
+    assert resposta.headers["Cache-Control"] == "no-cache"
+    assert resposta.get_json()["data"]["total_operadoras"] == len(consolidado)
+
+    repetida = cliente.get("/api/estatisticas", headers={"If-None-Match": etag})
+    assert repetida.status_code == 304
+    assert repetida.headers["ETag"] == etag
+    assert not repetida.get_data()
+
+    assert cliente.get("/api/estatisticas", headers={"If-None-Match": '"outro"'}).status_code == 200
+
+
+def test_etag_novo_depois_da_recarga(api, monkeypatch):
+    consolidado = gerar_consolidado()
+    api.usar_dados(consolidado, gerar_agregado(consolidado))
+    cliente = api.app.test_client()
+    etag = cliente.get("/api/estatisticas").headers["ETag"]
+
+    novo = gerar_consolidado(operadoras=31)
+    monkeypatch.setattr(api, "carregar_dados", lambda: (novo, gerar_agregado(novo)))
+    assert api.recarregar_dados(forcar=True)
+
+    resposta = cliente.get("/api/estatisticas", headers={"If-None-Match": etag})
+    assert resposta.status_code == 200
+    assert resposta.headers["ETag"] != etag
+    assert resposta.get_json()["data"]["total_operadoras"] == len(novo)
@@ -0,0 +1,92 @@
+"""
+Parquet entre as etapas (formato_colunar.py): mesma ordem do CSV e só quando ainda vale
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import gerar_agregado, gerar_consolidado
+
+import cache_etapas
+import formato_colunar
+
+pytestmark = pytest.mark.skipif(not formato_colunar.PARQUET_DISPONIVEL, reason="pyarrow não instalado")
+
+# Fora da ordem das pastas (Ano=2023 viria antes de Ano=2024)
+TRIMESTRES = ((2024, 2), (2023, 4), (2024, 1))
+
+
+@pytest.fixture
+def caminhos(tmp_path):
+    return {"caminho_csv": str(tmp_path / "consolidado.csv"),
+            "caminho_parquet": str(tmp_path / "consolidado.parquet")}
+
+
+def gravar(df, caminhos):
+    df.to_csv(caminhos["caminho_csv"], index=False)
+    formato_colunar.salvar_consolidado_parquet(df, caminhos["caminho_parquet"], caminhos["caminho_csv"])
+
+
+def ler_csv(caminho):
+    return formato_colunar._tipar_consolidado(pd.read_csv(caminho, dtype={"CNPJ": str}))
+
+
+def test_parquet_volta_na_ordem_do_csv(caminhos):
+    gravar(gerar_consolidado(trimestres=TRIMESTRES), caminhos)
+    assert formato_colunar._parquet_atualizado(caminhos["caminho_parquet"], caminhos["caminho_csv"])
+
+    esperado = ler_csv(caminhos["caminho_csv"])
+    pd.testing.assert_frame_equal(formato_colunar.carregar_consolidado(**caminhos), esperado)
+
+    filtrado = formato_colunar.carregar_consolidado(["CNPJ", "ValorDespesas"], [(2024, 1), (2023, 4)], **caminhos)
+    parte = esperado[esperado["Trimestre"].isin([1, 4])].reset_index(drop=True)[["CNPJ", "ValorDespesas"]]
+    pd.testing.assert_frame_equal(filtrado, parte)
+
+
+def test_pedacos_do_streaming_na_ordem_do_csv(caminhos):
+    df = gerar_consolidado(trimestres=TRIMESTRES)
+    df.to_csv(caminhos["caminho_csv"], index=False)
+    for parte, inicio in enumerate(range(0, len(df), 7)):
+        formato_colunar.acrescentar_consolidado_parquet(df.iloc[inicio:inicio + 7], caminhos["caminho_parquet"],
+                                                        parte=parte, inicio=inicio)
+    formato_colunar.concluir_consolidado_parquet(caminhos["caminho_parquet"], caminhos["caminho_csv"])
+
+    pd.testing.assert_frame_equal(formato_colunar.carregar_consolidado(**caminhos),
+                                  ler_csv(caminhos["caminho_csv"]))
+
+
+def test_csv_regravado_com_data_antiga_nao_usa_parquet_velho(caminhos):
+    gravar(gerar_consolidado(), caminhos)
+    antes = os.stat(caminhos["caminho_csv"]).st_mtime
+
+    # CSV novo, mas com data anterior à do Parquet (cópia, checkout, relógio)
+    gerar_consolidado(operadoras=31).to_csv(caminhos["caminho_csv"], index=False)
+    os.utime(caminhos["caminho_csv"], (antes - 60, antes - 60))
+
+    assert not formato_colunar._parquet_atualizado(caminhos["caminho_parquet"], caminhos["caminho_csv"])
+    assert len(formato_colunar.carregar_consolidado(**caminhos)) == 31 * 3
+
+
+def test_agregado_guarda_a_origem(tmp_path):
+    csv, parquet = str(tmp_path / "agregado.csv"), str(tmp_path / "agregado.parquet")
+    agregado = gerar_agregado(gerar_consolidado())
+    agregado.to_csv(csv, index=False)
+    formato_colunar.salvar_agregado_parquet(agregado, parquet, csv)
+    assert formato_colunar._parquet_atualizado(parquet, csv)
+
+    agregado.head(5).to_csv(csv, index=False)
+    assert not formato_colunar._parquet_atualizado(parquet, csv)
+    assert len(formato_colunar.carregar_agregado(csv, parquet)) == 5
+
+
+def test_saidas_restauradas_do_cache_continuam_valendo(tmp_path, caminhos):
+    gravar(gerar_consolidado(), caminhos)
+    saidas = [caminhos["caminho_csv"], caminhos["caminho_parquet"]]
+    pasta_cache = str(tmp_path / "cache")
+    cache_etapas.guardar("chave", saidas, pasta=pasta_cache)
+
+    gerar_consolidado(operadoras=5).to_csv(caminhos["caminho_csv"], index=False)
+    assert cache_etapas.restaurar("chave", saidas, pasta=pasta_cache)
+    assert formato_colunar._parquet_atualizado(caminhos["caminho_parquet"], caminhos["caminho_csv"])
@@ -0,0 +1,35 @@
+"""
+GET /metrics (metricas.py): formato texto do Prometheus com a latência de cada rota
+"""
+
+import re
+
+ROTA = 'rota="/api/estatisticas"'
+
+
+def contagem(texto):
+    encontrada = re.search(r'^ans_http_requisicao_segundos_count\{metodo="GET",' + ROTA + r'\} (\d+)$',
+                           texto, re.MULTILINE)
+    return int(encontrada.group(1)) if encontrada else 0
+
+
+def test_metrics_depois_de_uma_requisicao(api):
+    cliente = api.app.test_client()
+    antes = contagem(cliente.get("/metrics").get_data(as_text=True))
+
+    assert cliente.get("/api/estatisticas").status_code == 200
+    resposta = cliente.get("/metrics")
+    texto = resposta.get_data(as_text=True)
+
+    assert resposta.mimetype == "text/plain"
+    assert "version=0.0.4" in resposta.headers["Content-Type"]
+    assert "# TYPE ans_http_requisicao_segundos summary" in texto
+    assert "# TYPE ans_http_requisicoes_total counter" in texto
+    assert "# TYPE ans_snapshot_registros gauge" in texto
+    for quantil in ("0.5", "0.95", "0.99"):
+        assert f'ans_http_requisicao_segundos{{metodo="GET",{ROTA},quantile="{quantil}"}}' in texto
+    assert f'ans_http_requisicoes_total{{codigo="200",metodo="GET",{ROTA}}}' in texto
+    assert contagem(texto) == antes + 1
+
+    cliente.get("/api/estatisticas")
+    assert contagem(cliente.get("/metrics").get_data(as_text=True)) == antes + 2
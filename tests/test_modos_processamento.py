@@ -0,0 +1,97 @@
+"""
+Teste 1: em memória, streaming (--streaming) e paralelo (--workers) gravam as mesmas saídas
+"""
+
+import io
+import os
+import random
+import zipfile
+
+import pandas as pd
+import pytest
+
+import formato_colunar
+import teste1_api
+
+COLUNAS = ["CNPJ", "RazaoSocial", "Trimestre", "Ano", "ValorDespesas"]
+
+
+def gerar_fontes(pasta, semente=5):
+    """
+    Três trimestres (um dentro de ZIP) com os problemas que as regras tratam:
+    CNPJ repetido no mesmo arquivo e entre arquivos, valor ≤ 0 e trimestre
+    inválido (inclusive na primeira aparição do CNPJ)
+    """
+    rng = random.Random(semente)
+    fontes = []
+    for numero, trimestre in enumerate((1, 2, 3), start=1):
+        linhas = [";".join(COLUNAS)]
+        for _ in range(120):
+            cnpj = f"{rng.randrange(1, 150):014d}"
+            trimestre_linha = rng.choice([trimestre] * 8 + [0, 5])
+            valor = rng.choice([round(rng.uniform(1, 1e6), 2)] * 8 + [0, -123.45])
+            linhas.append(f"{cnpj};OPERADORA {cnpj[-3:]};{trimestre_linha};2024;{valor}")
+        texto = "\n".join(linhas) + "\n"
+
+        caminho = os.path.join(pasta, f"{trimestre}T2024.csv")
+        if numero == 2:
+            caminho = os.path.join(pasta, f"{trimestre}T2024.zip")
+            with zipfile.ZipFile(caminho, "w") as zipf:
+                zipf.writestr(f"{trimestre}T2024.csv", texto)
+        else:
+            with open(caminho, "w", encoding="utf-8") as f:
+                f.write(texto)
+        fontes.append(caminho)
+    return fontes
+
+
+def rodar(modo, fontes, pasta):
+    os.makedirs(os.path.join(pasta, "dados"))
+    atual = os.getcwd()
+    os.chdir(pasta)
+    try:
+        if modo == "memoria":
+            resultado = teste1_api.processar_dados(fontes, parquet=True)
+        elif modo == "streaming":
+            resultado = teste1_api.processar_dados_streaming(fontes, tamanho_chunk=7, parquet=True)
+        else:
+            resultado = teste1_api.processar_dados_paralelo(fontes, workers=2, tamanho_chunk=7, parquet=True)
+        assert resultado is not None
+
+        with open(formato_colunar.CONSOLIDADO_CSV, "rb") as f:
+            csv = f.read()
+        with zipfile.ZipFile(teste1_api.CONSOLIDADO_ZIP) as zipf:
+            no_zip = {nome: zipf.read(nome) for nome in zipf.namelist()}
+        parquet = formato_colunar.carregar_consolidado() if formato_colunar.PARQUET_DISPONIVEL else None
+        return csv, no_zip, parquet
+    finally:
+        os.chdir(atual)
+
+
+@pytest.fixture(scope="module")
+def saidas(tmp_path_factory):
+    pasta = tmp_path_factory.mktemp("fontes")
+    fontes = gerar_fontes(str(pasta))
+    return {modo: rodar(modo, fontes, str(tmp_path_factory.mktemp(modo)))
+            for modo in ("memoria", "streaming", "paralelo")}
+
+
+@pytest.mark.parametrize("modo", ["streaming", "paralelo"])
+def test_mesmas_saidas_do_modo_em_memoria(saidas, modo):
+    csv, no_zip, parquet = saidas[modo]
+    csv_memoria, no_zip_memoria, parquet_memoria = saidas["memoria"]
+
+    assert csv == csv_memoria
+    assert no_zip == no_zip_memoria
+    if parquet is not None:
+        pd.testing.assert_frame_equal(parquet, parquet_memoria)
+
+
+def test_regras_aplicadas(saidas):
+    csv, _, _ = saidas["memoria"]
+    df = pd.read_csv(io.BytesIO(csv), dtype={"CNPJ": str})
+
+    assert df["CNPJ"].is_unique
+    assert df["CNPJ"].str.len().eq(14).all()
+    assert df["Trimestre"].between(1, 4).all()
+    assert (df["ValorDespesas"] >= 0).all() and (df["ValorDespesas"] == 0).any()
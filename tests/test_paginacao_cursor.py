@@ -0,0 +1,62 @@
+"""
+Paginação por cursor (/api/operadoras?cursor=): não pula nem repete linhas,
+mesmo com os dados recarregados no meio da navegação
+"""
+
+import pandas as pd
+
+from conftest import gerar_agregado, gerar_consolidado
+
+
+def chave(linha):
+    return (linha["CNPJ"], linha["Ano"], linha["Trimestre"])
+
+
+def paginas(cliente, cursor="", limit=7):
+    while cursor is not None:
+        resposta = cliente.get(f"/api/operadoras?cursor={cursor}&limit={limit}").get_json()
+        assert resposta["success"]
+        yield resposta["data"], resposta["pagination"]["next_cursor"]
+        cursor = resposta["pagination"]["next_cursor"]
+
+
+def chaves_ordenadas(df):
+    return sorted(zip(df["CNPJ"], df["Ano"].astype(int), df["Trimestre"].astype(int)))
+
+
+def test_percorre_tudo_uma_vez_na_ordem(api):
+    # Linhas embaralhadas: a ordem vem do índice, não do arquivo
+    consolidado = gerar_consolidado(operadoras=20).sample(frac=1, random_state=3).reset_index(drop=True)
+    api.usar_dados(consolidado, gerar_agregado(consolidado))
+
+    vistas = [chave(linha) for dados, _ in paginas(api.app.test_client()) for linha in dados]
+
+    assert vistas == chaves_ordenadas(consolidado)
+
+
+def test_recarga_no_meio_nao_pula_nem_repete(api):
+    antigo = gerar_consolidado(operadoras=20)
+    api.usar_dados(antigo, gerar_agregado(antigo))
+    cliente = api.app.test_client()
+
+    primeira_metade, cursor = [], ""
+    for dados, cursor in paginas(cliente):
+        primeira_metade += [chave(linha) for linha in dados]
+        if len(primeira_metade) >= 28:
+            break
+    ultima_vista = primeira_metade[-1]
+
+    # Nova versão: some uma operadora já vista e uma ainda não vista,
+    # entram CNPJs antes e depois do cursor, e as posições das linhas mudam
+    cnpjs = sorted(antigo["CNPJ"].unique())
+    novo = pd.concat([
+        antigo[~antigo["CNPJ"].isin([cnpjs[2], cnpjs[15]])],
+        gerar_consolidado(operadoras=1, deslocamento=-1),
+        gerar_consolidado(operadoras=3, deslocamento=100),
+    ]).sample(frac=1, random_state=5).reset_index(drop=True)
+    api.usar_dados(novo, gerar_agregado(novo))
+
+    segunda_metade = [chave(linha) for dados, _ in paginas(cliente, cursor) for linha in dados]
+
+    assert not set(primeira_metade) & set(segunda_metade)
+    assert segunda_metade == [c for c in chaves_ordenadas(novo) if c > ultima_vista]
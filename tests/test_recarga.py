@@ -0,0 +1,60 @@
+"""
+POST /api/recarregar: só da própria máquina, ou de qualquer lugar com o token;
+a recarga não fica presa esperando um snapshot antigo ainda em uso
+"""
+
+import time
+
+import pytest
+
+from conftest import gerar_agregado, gerar_consolidado
+
+
+@pytest.fixture
+def recargas(api, monkeypatch):
+    pedidos = []
+    monkeypatch.setattr(api, "repositorio", {**api.repositorio, "recarregar": lambda: pedidos.append(1) or {}})
+    return pedidos
+
+
+def recarregar(api, endereco, **headers):
+    cliente = api.app.test_client()
+    return cliente.post("/api/recarregar", headers=headers, environ_base={"REMOTE_ADDR": endereco})
+
+
+def test_sem_token_so_aceita_localhost(api, recargas):
+    assert recarregar(api, "127.0.0.1").status_code == 200
+    assert recarregar(api, "::1").status_code == 200
+    assert recarregar(api, "10.0.0.7").status_code == 403
+    assert len(recargas) == 2
+
+
+def test_com_token_exige_o_header(api, recargas, monkeypatch):
+    monkeypatch.setattr(api, "ANS_TOKEN_RECARGA", "segredo")
+
+    assert recarregar(api, "127.0.0.1").status_code == 403
+    assert recarregar(api, "10.0.0.7", Authorization="Bearer errado").status_code == 403
+    assert recarregar(api, "10.0.0.7", Authorization="Bearer segredo").status_code == 200
+    assert len(recargas) == 1
+
+
+def test_snapshot_antigo_em_uso_nao_segura_a_recarga(api, monkeypatch):
+    consolidado = gerar_consolidado()
+    monkeypatch.setattr(api, "carregar_dados", lambda: (consolidado, gerar_agregado(consolidado)))
+    api.usar_dados(consolidado, gerar_agregado(consolidado))
+    em_uso = api.snapshot  # como uma requisição lenta que ainda não terminou
+    antes = api.snapshot_anterior_em_uso
+
+    inicio = time.monotonic()
+    assert api.recarregar_dados(forcar=True)
+    assert time.monotonic() - inicio < 5
+    assert api.snapshot is not em_uso
+    assert api.snapshot_anterior_em_uso == antes + 1
+
+    texto = api.app.test_client().get("/metrics").get_data(as_text=True)
+    assert f"ans_snapshot_anterior_em_uso_total {antes + 1}" in texto
+
+    # Snapshot antigo liberado: recarrega sem contar nada
+    del em_uso
+    assert api.recarregar_dados(forcar=True)
+    assert api.snapshot_anterior_em_uso == antes + 1
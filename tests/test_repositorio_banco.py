@@ -0,0 +1,106 @@
+"""
+Repositório no banco (repositorio_banco.py) sobre um SQLite carregado pelo teste3_carga.py
+"""
+
+import json
+
+import pytest
+
+from conftest import gerar_agregado, gerar_consolidado
+
+import repositorio_banco
+import teste3_carga
+
+
+@pytest.fixture
+def dados():
+    consolidado = gerar_consolidado(operadoras=200)
+    return consolidado, gerar_agregado(consolidado)
+
+
+@pytest.fixture
+def repositorio(tmp_path, dados):
+    consolidado, agregado = dados
+    consolidado.to_csv(tmp_path / "consolidado.csv", index=False)
+    agregado.to_csv(tmp_path / "agregado.csv", index=False)
+    destino = str(tmp_path / "ans.db")
+    teste3_carga.main(["--destino", destino, "--consolidado", str(tmp_path / "consolidado.csv"),
+                       "--agregado", str(tmp_path / "agregado.csv")])
+    pool = repositorio_banco.criar_pool(destino)
+    return repositorio_banco.criar_repositorio(pool, json.dumps)
+
+
+@pytest.fixture
+def consultas(monkeypatch):
+    nomes = []
+    consultar = repositorio_banco.consultar
+
+    def contar_consultas(pool, nome, sql, parametros=()):
+        nomes.append(nome)
+        return consultar(pool, nome, sql, parametros)
+
+    monkeypatch.setattr(repositorio_banco, "consultar", contar_consultas)
+    return nomes
+
+
+def test_contagem_uma_vez_por_filtro(repositorio, consultas):
+    total = repositorio["listar"](1, 2)[1]
+    assert repositorio["listar"](2, 2)[1] == total
+    assert repositorio["listar"](1, 2, uf="sp")[1] == repositorio["listar"](2, 2, uf="SP")[1]
+    assert consultas.count("contar") == 1
+    assert consultas.count("contar_uf") == 1
+
+    repositorio["recarregar"]()
+    repositorio["listar"](1, 2)
+    assert consultas.count("contar") == 2
+
+
+def test_total_despesas_igual_ao_modo_memoria(repositorio, api, dados):
+    api.usar_dados(*dados)
+    banco = json.loads(repositorio["estatisticas"]()["corpo"])["data"]
+    memoria = json.loads(api.snapshot["estatisticas"]["corpo"])["data"]
+
+    assert banco["total_despesas"] == memoria["total_despesas"]
+    assert banco["total_despesas"] == round(banco["total_despesas"], 2)
+
+
+def test_tudo_vence_junto(repositorio, consultas, monkeypatch):
+    def consultar_tudo():
+        repositorio["listar"](1, 2)
+        repositorio["estatisticas"]()
+        repositorio["trimestres"]()
+        repositorio["buscar"]("operadora", 1, 5)
+        return list(consultas)
+
+    # Só a listagem em si vai ao banco de novo enquanto o cache vale
+    primeira = consultar_tudo()
+    segunda = consultar_tudo()[len(primeira):]
+    assert {"contar", "totais", "operadoras_busca"} <= set(primeira)
+    assert set(segunda) == {"listar"}
+
+    # Venceu o prazo: contagem, estatísticas, análises e busca vencem juntas
+    monkeypatch.setattr(repositorio_banco, "CACHE_BANCO_S", -1)
+    terceira = consultar_tudo()[len(primeira) + len(segunda):]
+    assert set(primeira) <= set(terceira)
+
+
+def test_pool_esgotado_contado(tmp_path):
+    pool = repositorio_banco.criar_pool(str(tmp_path / "vazio.db"), tamanho=1, espera_maxima=0.01)
+    with repositorio_banco.conexao_do_pool(pool):
+        for _ in range(3):
+            with pytest.raises(repositorio_banco.PoolEsgotado):
+                with repositorio_banco.conexao_do_pool(pool):
+                    pass
+    assert pool["esgotado"] == 3
+
+
+def test_listagem_com_limit_invalido(api, dados):
+    api.usar_dados(*dados)
+    cliente = api.app.test_client()
+    for limit, page in ((0, 1), (-1, 1), (10, 0), (10 ** 6, -3)):
+        resposta = cliente.get(f"/api/operadoras?page={page}&limit={limit}")
+        assert resposta.status_code == 200
+        paginacao = resposta.get_json()["pagination"]
+        assert 1 <= paginacao["limit"] <= api.LIMITE_MAXIMO_LISTAGEM
+        assert paginacao["page"] >= 1
+        assert len(resposta.get_json()["data"]) == paginacao["limit"] or paginacao["pages"] == 1
@@ -0,0 +1,81 @@
+"""
+JSON das respostas (serializacao_json.py): tipos do NumPy/pandas, NaN como null e opções do dumps
+"""
+
+import datetime
+import decimal
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import serializacao_json
+
+VALORES = {
+    "inteiro": np.int64(7),
+    "pequeno": np.int8(-3),
+    "real": np.float64(1.25),
+    "nan": float("nan"),
+    "nan_numpy": np.float64("nan"),
+    "infinito": float("inf"),
+    "logico": np.bool_(True),
+    "vetor": np.array([1, 2, 3]),
+    "data_hora": pd.Timestamp("2024-03-31 12:30:00"),
+    "nulo_pandas": pd.NA,
+    "data_nula": pd.NaT,
+    "data": datetime.date(2024, 1, 2),
+    "decimal": decimal.Decimal("10.50"),
+}
+
+ESPERADO = {
+    "inteiro": 7,
+    "pequeno": -3,
+    "real": 1.25,
+    "nan": None,
+    "nan_numpy": None,
+    "infinito": None,
+    "logico": True,
+    "vetor": [1, 2, 3],
+    "data_hora": "2024-03-31T12:30:00",
+    "nulo_pandas": None,
+    "data_nula": None,
+    "data": "Tue, 02 Jan 2024 00:00:00 GMT",
+    "decimal": "10.50",
+}
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "json"])
+def provedor(api, request, monkeypatch):
+    if request.param and not serializacao_json.ORJSON_DISPONIVEL:
+        pytest.skip("orjson não instalado")
+    monkeypatch.setattr(serializacao_json, "ORJSON_DISPONIVEL", request.param)
+    return api.app.json
+
+
+def test_tipos_do_numpy_e_pandas(provedor):
+    assert json.loads(provedor.dumps(VALORES)) == ESPERADO
+
+
+def test_resposta_do_jsonify(api, provedor):
+    with api.app.app_context():
+        resposta = provedor.response({"data": [{"b": np.int64(2), "a": float("nan")}]})
+    assert resposta.mimetype == "application/json"
+    # Ordem das chaves da rota mantida
+    assert resposta.get_data(as_text=True) == '{"data":[{"b":2,"a":null}]}'
+
+    with api.app.app_context():
+        assert json.loads(provedor.response(1, 2).get_data()) == [1, 2]
+        assert json.loads(provedor.response(x=1).get_data()) == {"x": 1}
+
+
+def test_opcoes_do_dumps(provedor):
+    dados = {"b": 1, "a": [1]}
+    assert provedor.dumps(dados, sort_keys=True) == '{"a":[1],"b":1}'
+    assert json.loads(provedor.dumps(dados, indent=2)) == dados
+    assert "\n  " in provedor.dumps(dados, indent=2)
+
+    with pytest.raises(TypeError):
+        provedor.dumps(dados, ensure_ascii=True)
+    with pytest.raises(ValueError):
+        provedor.dumps(dados, indent=4)
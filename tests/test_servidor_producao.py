@@ -0,0 +1,95 @@
+"""
+servidor_producao.py com vários workers: recarga feita pelo processo principal
+e worker que morre substituído
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+from conftest import RAIZ, gerar_agregado, gerar_consolidado
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="precisa de fork")
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def pedir(porta, rota, metodo="GET"):
+    requisicao = urllib.request.Request(f"http://127.0.0.1:{porta}{rota}", method=metodo)
+    with urllib.request.urlopen(requisicao, timeout=5) as resposta:
+        return json.loads(resposta.read())["data"]
+
+
+def esperar(condicao, limite=15):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        try:
+            if condicao():
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def filhos(pid):
+    resultado = subprocess.run(["pgrep", "-P", str(pid)], capture_output=True, text=True)
+    return {int(linha) for linha in resultado.stdout.split()}
+
+
+@pytest.fixture
+def servidor(tmp_path):
+    (tmp_path / "dados").mkdir()
+    consolidado = gerar_consolidado()
+    consolidado.to_csv(tmp_path / "dados" / "consolidado_despesas.csv", index=False)
+    gerar_agregado(consolidado).to_csv(tmp_path / "dados" / "despesas_agregadas.csv", index=False)
+
+    porta = porta_livre()
+    processo = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, "servidor_producao.py"), "--workers", "2", "--threads", "2",
+         "--porta", str(porta), "--host", "127.0.0.1", "--compressao", "0", "--sem-monitor"],
+        cwd=tmp_path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        assert esperar(lambda: len(filhos(processo.pid)) == 2 and pedir(porta, "/api/status"))
+        yield processo, porta, tmp_path
+    finally:
+        processo.send_signal(signal.SIGTERM)
+        processo.wait(timeout=15)
+
+
+def versoes(porta, vezes=8):
+    return {pedir(porta, "/api/status")["versao"] for _ in range(vezes)}
+
+
+def test_recarga_troca_todos_os_workers(servidor):
+    processo, porta, pasta = servidor
+    antigos = filhos(processo.pid)
+    versao = pedir(porta, "/api/status")["versao"]
+
+    novo = gerar_consolidado(operadoras=40)
+    novo.to_csv(pasta / "dados" / "consolidado_despesas.csv", index=False)
+    assert pedir(porta, "/api/recarregar", "POST")["recarga"] == "agendada"
+
+    assert esperar(lambda: filhos(processo.pid).isdisjoint(antigos) and versoes(porta) != {versao})
+    assert len(filhos(processo.pid)) == 2
+    assert {pedir(porta, "/api/status")["registros"] for _ in range(8)} == {len(novo)}
+
+
+def test_worker_que_morre_e_substituido(servidor):
+    processo, porta, _ = servidor
+    morto = min(filhos(processo.pid))
+    os.kill(morto, signal.SIGKILL)
+
+    assert esperar(lambda: morto not in filhos(processo.pid) and len(filhos(processo.pid)) == 2)
+    assert pedir(porta, "/api/status")["registros"] == len(gerar_consolidado())
@@ -0,0 +1,34 @@
+"""
+Tipos compactos do snapshot (tipos_compactos.py): ida e volta sem mudar os dados
+"""
+
+import pandas as pd
+
+from conftest import gerar_agregado, gerar_consolidado
+
+import tipos_compactos
+
+
+def test_consolidado_volta_igual():
+    consolidado = gerar_consolidado()
+    consolidado.loc[0, "CNPJ"] = "00012345000199"  # zeros à esquerda
+
+    volta = tipos_compactos.expandir(tipos_compactos.compactar(consolidado))
+
+    assert volta["CNPJ"].tolist() == consolidado["CNPJ"].tolist()
+    assert volta["ValorDespesas"].tolist() == consolidado["ValorDespesas"].tolist()
+    assert volta["Ano"].tolist() == consolidado["Ano"].tolist()
+
+
+def test_media_e_desvio_continuam_float():
+    agregado = gerar_agregado(gerar_consolidado())
+    agregado.loc[0, "MediaTrimestral"] = 1234.56789
+
+    compacto = tipos_compactos.compactar(agregado)
+    volta = tipos_compactos.expandir(compacto)
+
+    assert compacto["MediaTrimestral"].dtype == "float64"
+    assert compacto["DesvioPadrao"].dtype == "float64"
+    pd.testing.assert_series_equal(volta["MediaTrimestral"], agregado["MediaTrimestral"])
+    pd.testing.assert_series_equal(volta["DesvioPadrao"], agregado["DesvioPadrao"])
+    assert tipos_compactos.soma_reais(compacto, "TotalDespesas") == round(agregado["TotalDespesas"].sum(), 2)
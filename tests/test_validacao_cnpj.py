@@ -0,0 +1,70 @@
+"""
+validar_cnpjs (vetorizado) dá o mesmo resultado do validar_cnpj (um por vez)
+"""
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import teste2_validacao
+
+
+def com_digitos(base12):
+    digitos = [int(d) for d in base12]
+    for pesos in (teste2_validacao.PESOS_DV1, teste2_validacao.PESOS_DV2):
+        resto = sum(d * p for d, p in zip(digitos, pesos)) % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    return "".join(map(str, digitos))
+
+
+def pontuar(cnpj):
+    return f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}"
+
+
+def cnpjs_variados(quantidade=3000, semente=11):
+    rng = random.Random(semente)
+    valores = ["", "nan", "00000000000000", "11111111111111", "11.222.333/0001-81",
+               "1122233300018", "112223330001811", "11222333000181 ", "ab222333000181",
+               "١١٢٢٢٣٣٣٠٠٠١٨١", "0" * 30]
+    for _ in range(quantidade):
+        valido = com_digitos(f"{rng.randrange(10 ** 12):012d}")
+        sorteio = rng.random()
+        if sorteio < 0.4:
+            valores.append(valido)
+        elif sorteio < 0.6:
+            valores.append(pontuar(valido))
+        elif sorteio < 0.8:
+            # Um dígito verificador errado
+            valores.append(valido[:13] + str((int(valido[13]) + 1) % 10))
+        else:
+            valores.append(str(rng.randrange(10 ** 15)))
+    return valores
+
+
+@pytest.mark.parametrize("tamanho_bloco", [1_000_000, 7])
+def test_texto_igual_ao_escalar(tamanho_bloco):
+    serie = pd.Series(cnpjs_variados() + [None, np.nan], dtype=object)
+    esperado = [teste2_validacao.validar_cnpj(c) for c in serie]
+
+    resultado = teste2_validacao.validar_cnpjs(serie, tamanho_bloco=tamanho_bloco)
+
+    assert resultado.tolist() == esperado
+    assert resultado.any() and not resultado.all()
+
+
+def test_string_do_pandas_igual_ao_escalar():
+    serie = pd.Series(cnpjs_variados(500), dtype="string")
+    assert teste2_validacao.validar_cnpjs(serie).tolist() == [teste2_validacao.validar_cnpj(c) for c in serie]
+
+
+def test_numeros_sem_zeros_a_esquerda_igual_ao_escalar():
+    # CNPJ lido como número: "00012345000199" vira 12345000199
+    validos = [int(com_digitos(f"{i * 7919:012d}")) for i in range(1, 500)]
+    serie = pd.Series(validos + [v + 1 for v in validos] + [0, -5, 10 ** 14, 10 ** 14 - 1], dtype="int64")
+
+    resultado = teste2_validacao.validar_cnpjs(serie, tamanho_bloco=64)
+
+    assert resultado.tolist() == [teste2_validacao.validar_cnpj(c) for c in serie]
+    assert resultado[:len(validos)].all()
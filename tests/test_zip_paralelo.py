@@ -0,0 +1,93 @@
+"""
+ZIP gravado pelo zip_paralelo.py: abre no zipfile e no unzip com o mesmo conteúdo
+"""
+
+import os
+import random
+import shutil
+import subprocess
+import zipfile
+
+import pytest
+
+from conftest import gerar_consolidado
+
+import zip_paralelo
+
+
+def conteudo_misto(tamanho, semente=7):
+    # Metade repetitiva (comprime bem), metade aleatória (não comprime)
+    rng = random.Random(semente)
+    texto = b"CNPJ,RazaoSocial,Trimestre,Ano,ValorDespesas\n" * (tamanho // 90)
+    return texto + rng.randbytes(tamanho - len(texto))
+
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_membros_voltam_iguais(tmp_path, monkeypatch, threads):
+    # Blocos pequenos: vários blocos por membro, comprimidos fora de ordem
+    monkeypatch.setattr(zip_paralelo, "TAMANHO_BLOCO_ZIP", 64 * 1024)
+    membros = {
+        "dados/vazio.csv": b"",
+        "dados/grande.csv": conteudo_misto(700_000),
+        "dados/operações.csv": "razão social,ç\n".encode("utf-8") * 1000,
+    }
+    caminho = tmp_path / "saida.zip"
+    with zip_paralelo.ZipParalelo(str(caminho), nivel=6, threads=threads) as zipf:
+        for nome, dados in membros.items():
+            with zipf.membro(nome) as escrever:
+                for inicio in range(0, len(dados), 50_000):
+                    escrever(dados[inicio:inicio + 50_000])
+        assert zipf.nomes() == list(membros)
+
+    with zipfile.ZipFile(caminho) as lido:
+        assert lido.testzip() is None
+        assert lido.namelist() == list(membros)
+        for nome, dados in membros.items():
+            assert lido.read(nome) == dados
+            assert lido.getinfo(nome).compress_type == zipfile.ZIP_DEFLATED
+
+
+@pytest.mark.skipif(shutil.which("unzip") is None, reason="unzip não instalado")
+def test_unzip_aceita(tmp_path):
+    caminho = tmp_path / "saida.zip"
+    with zip_paralelo.ZipParalelo(str(caminho)) as zipf:
+        with zipf.membro("a.csv") as escrever:
+            escrever(conteudo_misto(300_000))
+    resultado = subprocess.run(["unzip", "-t", str(caminho)], capture_output=True, text=True)
+    assert resultado.returncode == 0, resultado.stdout + resultado.stderr
+
+
+def test_csv_e_zip_igual_ao_to_csv(tmp_path):
+    df = gerar_consolidado(operadoras=500)
+    csv, zip_ = str(tmp_path / "consolidado.csv"), str(tmp_path / "consolidado.zip")
+
+    with zip_paralelo.csv_e_zip(csv, zip_, "consolidado.csv") as escrever:
+        zip_paralelo.escrever_csv(escrever, df, linhas_por_pedaco=333)
+
+    esperado = df.to_csv(index=False).encode("utf-8")
+    with open(csv, "rb") as f:
+        assert f.read() == esperado
+    with zipfile.ZipFile(zip_) as lido:
+        assert lido.read("consolidado.csv") == esperado
+
+
+def test_adicionar_arquivo(tmp_path):
+    origem = tmp_path / "origem.csv"
+    origem.write_bytes(conteudo_misto(2 * zip_paralelo.TAMANHO_BLOCO_ZIP + 123))
+    caminho = tmp_path / "saida.zip"
+    with zip_paralelo.ZipParalelo(str(caminho)) as zipf:
+        zipf.adicionar_arquivo(str(origem), "origem.csv")
+    with zipfile.ZipFile(caminho) as lido:
+        assert lido.read("origem.csv") == origem.read_bytes()
+    assert os.path.getsize(caminho) < os.path.getsize(origem)
+
+
+def test_mais_de_65535_membros_usa_fim_zip64(tmp_path):
+    caminho = tmp_path / "muitos.zip"
+    with zip_paralelo.ZipParalelo(str(caminho), threads=1) as zipf:
+        for i in range(0x10000):
+            with zipf.membro(f"m{i}.txt") as escrever:
+                escrever(str(i).encode())
+    with zipfile.ZipFile(caminho) as lido:
+        assert len(lido.namelist()) == 0x10000
+        assert lido.read("m65535.txt") == b"65535"
@@ -0,0 +1,142 @@
+"""
+TIPOS COMPACTOS: consolidado e agregado ocupando menos memória na API
+Autora: Mileide Silva de Arruda
+
+A API guarda o consolidado e o agregado inteiros na memória (snapshot).
+Lidos do CSV/Parquet, CNPJ, RazaoSocial e UF são textos, e o mesmo nome
+de operadora se repete em toda linha de cada trimestre. Aqui cada coluna
+vira o menor tipo que guarda o mesmo dado:
+
+    CNPJ                    → int64 (14 dígitos cabem; zeros à esquerda
+                              voltam na hora de responder)
+    RazaoSocial, UF,
+    Modalidade              → category (código pequeno + dicionário),
+                              quando os valores se repetem
+    Trimestre / Ano         → int8 / int16
+    ValorDespesas,
+    TotalDespesas           → int64 em centavos, em colunas com o sufixo
+                              "Centavos" (ValorDespesasCentavos...)
+
+Centavos inteiros somam sem erro de arredondamento (0.1 + 0.2 em float
+não dá 0.3). O sufixo no nome deixa claro que a coluna está em centavos:
+um ValorDespesas inteiro lido de um CSV continua sendo reais.
+MediaTrimestral e DesvioPadrao são resultados de conta (não valores
+lançados) e continuam float64, com todas as casas que o Teste 2 gravou.
+
+Quanto se ganha depende de quanto os textos se repetem. No histórico da
+ANS (várias linhas por operadora) o snapshot fica cerca de 2,5x menor que
+em str (Arrow, padrão do pandas 3) e 6,7x menor que em object. No
+consolidado do Teste 1 há uma linha por CNPJ: a razão social não se
+repete, não vira categoria e continua sendo a maior coluna, então o
+ganho fica em torno de 1,3x sobre str e 3,6x sobre object
+(benchmarks/bench_memoria.py).
+
+expandir() faz o caminho de volta só nas linhas que vão para a resposta,
+com os mesmos nomes e formatos de antes.
+"""
+
+import numpy as np
+import pandas as pd
+
+import cadastro_operadoras
+
+COLUNAS_CATEGORIA = ["RazaoSocial", "UF", "Modalidade"]
+COLUNAS_INTEIRAS = {"Trimestre": "int8", "Ano": "int16"}
+COLUNAS_DINHEIRO = ["ValorDespesas", "TotalDespesas"]
+SUFIXO_CENTAVOS = "Centavos"
+
+
+def memoria_bytes(df):
+    """
+    Memória ocupada pelo DataFrame, contando o conteúdo dos textos
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+
+def vale_categoria(serie):
+    # Só compensa quando os valores se repetem (no agregado cada razão
+    # social aparece uma vez: o dicionário seria do tamanho da coluna)
+    return serie.nunique() <= len(serie) // 2
+
+
+def para_centavos(serie):
+    """
+    Reais (float) → centavos (int64; Int64 com vazios se houver NaN)
+    """
+    valores = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    centavos = np.round(valores * 100)
+    vazio = np.isnan(centavos)
+    if vazio.any():
+        return pd.arrays.IntegerArray(np.where(vazio, 0, centavos).astype(np.int64), vazio)
+    return centavos.astype(np.int64)
+
+
+def para_reais(serie):
+    return serie.to_numpy(dtype=np.float64, na_value=np.nan) / 100
+
+
+def compactar(df):
+    """
+    Mesmo conteúdo nos tipos compactos (outras colunas ficam como estão)
+    """
+    colunas = {}
+    for coluna in df.columns:
+        serie = df[coluna]
+        if coluna == "CNPJ":
+            cnpjs = cadastro_operadoras.cnpjs_para_inteiros(serie)
+            # CNPJ vazio ou fora do padrão não cabe no inteiro: fica como categoria
+            colunas[coluna] = cnpjs if (cnpjs >= 0).all() else serie.astype("category")
+        elif coluna in COLUNAS_CATEGORIA and vale_categoria(serie):
+            colunas[coluna] = serie.astype("category")
+        elif coluna in COLUNAS_INTEIRAS and not serie.isna().any():
+            colunas[coluna] = serie.astype(COLUNAS_INTEIRAS[coluna])
+        elif coluna in COLUNAS_DINHEIRO:
+            colunas[coluna + SUFIXO_CENTAVOS] = para_centavos(serie)
+        else:
+            colunas[coluna] = serie
+    return pd.DataFrame(colunas, index=df.index)
+
+
+def cnpjs_texto(serie):
+    """
+    CNPJ como texto, seja qual for o tipo da coluna
+    (int64 → 14 dígitos com os zeros à esquerda)
+    """
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        return serie.astype(str).str.zfill(14)
+    return serie.astype(str)
+
+
+def expandir(df):
+    """
+    Volta ao formato das respostas: CNPJ em texto, reais em float,
+    sem o sufixo Centavos nos nomes
+    """
+    colunas = {}
+    for coluna in df.columns:
+        serie = df[coluna]
+        if coluna == "CNPJ" and pd.api.types.is_integer_dtype(serie.dtype):
+            colunas[coluna] = cnpjs_texto(serie).to_numpy(dtype=object)
+        elif coluna.endswith(SUFIXO_CENTAVOS):
+            colunas[coluna[:-len(SUFIXO_CENTAVOS)]] = para_reais(serie)
+        else:
+            colunas[coluna] = serie
+    return pd.DataFrame(colunas, index=df.index)
+
+
+def reais(df, coluna):
+    """
+    Coluna de dinheiro em reais (float), esteja ela compacta ou não
+    """
+    if coluna + SUFIXO_CENTAVOS in df.columns:
+        return pd.Series(para_reais(df[coluna + SUFIXO_CENTAVOS]), index=df.index, name=coluna)
+    return df[coluna]
+
+
+def soma_reais(df, coluna):
+    """
+    Soma exata quando a coluna está em centavos (soma inteira, divide no fim)
+    """
+    if coluna + SUFIXO_CENTAVOS in df.columns:
+        return int(df[coluna + SUFIXO_CENTAVOS].sum()) / 100
+    return float(df[coluna].sum())
@@ -0,0 +1,254 @@
+"""
+ZIP PARALELO: CSV e ZIP gravados juntos, com compressão em várias threads
+Autora: Mileide Silva de Arruda
+
+Antes, o Teste 1 e o Teste 2 gravavam o CSV inteiro e depois o liam de
+novo do disco para colocar no ZIP (zipf.write), sem compressão
+(ZIP_STORED, o padrão do zipfile) e numa thread só.
+
+Aqui cada pedaço do CSV, assim que é gerado, vai para o arquivo CSV e para
+o membro do ZIP ao mesmo tempo. O ZIP não precisa reler nada do disco.
+
+A compressão (DEFLATE, a mesma do ZIP_DEFLATED) é feita em blocos de
+TAMANHO_BLOCO_ZIP, cada um numa thread (o zlib solta o GIL enquanto
+comprime), como faz o pigz:
+
+    - cada bloco termina com um "sync flush" (fecha num byte inteiro),
+      então os blocos comprimidos podem ser simplesmente concatenados
+    - cada bloco começa com os últimos 32 KB do anterior como dicionário,
+      então a compressão fica quase igual à de um bloco só
+    - o CRC32 é calculado na ordem, enquanto os dados entram
+
+O arquivo ZIP em volta (cabeçalhos e diretório central) é gravado pela
+classe ZipParalelo, seguindo o formato publicado, sem usar partes internas
+do zipfile. O resultado é um ZIP comum (abre em qualquer programa).
+"""
+
+import os
+import struct
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+NIVEL_ZIP = 6                      # 1 (rápido) a 9 (menor)
+TAMANHO_BLOCO_ZIP = 1024 * 1024    # bytes por bloco comprimido em paralelo
+THREADS_ZIP = os.cpu_count() or 1
+LINHAS_POR_PEDACO = 100_000        # linhas do DataFrame convertidas em CSV por vez
+JANELA_DEFLATE = 32 * 1024         # o DEFLATE só olha 32 KB para trás
+FIM_DEFLATE = b"\x03\x00"          # bloco final vazio (fecha o fluxo)
+
+# Estruturas do ZIP (APPNOTE.TXT da PKWARE)
+ASSINATURA_LOCAL = 0x04034B50
+ASSINATURA_CENTRAL = 0x02014B50
+ASSINATURA_FIM = 0x06054B50
+ASSINATURA_FIM_ZIP64 = 0x06064B50
+ASSINATURA_LOCALIZADOR_ZIP64 = 0x07064B50
+EXTRA_ZIP64 = 0x0001
+VERSAO_ZIP64 = 45                  # versão 4.5: necessária para ZIP64
+SISTEMA_UNIX = 3
+LIMITE_ZIP32 = 0xFFFFFFFF
+
+
+def _comprimir_bloco(bloco, dicionario, nivel):
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, -15, zdict=dicionario) if dicionario \
+        else zlib.compressobj(nivel, zlib.DEFLATED, -15)
+    return compressor.compress(bloco) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class CompressorParalelo:
+    """
+    Mesma interface do zlib.compressobj (compress/flush, DEFLATE puro),
+    mas comprimindo vários blocos ao mesmo tempo
+    """
+    def __init__(self, nivel=NIVEL_ZIP, threads=THREADS_ZIP, tamanho_bloco=TAMANHO_BLOCO_ZIP):
+        self.nivel = nivel
+        self.tamanho_bloco = tamanho_bloco
+        self.maximo_pendentes = max(threads, 1) * 2  # limita a memória em uso
+        self.executor = ThreadPoolExecutor(max_workers=max(threads, 1), thread_name_prefix="zip")
+        self.pendentes = deque()
+        self.buffer = bytearray()
+        self.anterior = b""
+
+    def _enviar(self, bloco):
+        self.pendentes.append(self.executor.submit(_comprimir_bloco, bloco, self.anterior, self.nivel))
+        self.anterior = bloco[-JANELA_DEFLATE:]
+
+    def _prontos(self, esperar_todos=False):
+        # Devolve os blocos já comprimidos, sempre na ordem em que entraram
+        saida = []
+        while self.pendentes and (esperar_todos or self.pendentes[0].done()
+                                  or len(self.pendentes) > self.maximo_pendentes):
+            saida.append(self.pendentes.popleft().result())
+        return b"".join(saida)
+
+    def compress(self, dados):
+        self.buffer += dados
+        while len(self.buffer) >= self.tamanho_bloco:
+            self._enviar(bytes(self.buffer[:self.tamanho_bloco]))
+            del self.buffer[:self.tamanho_bloco]
+        return self._prontos()
+
+    def flush(self):
+        if self.buffer:
+            self._enviar(bytes(self.buffer))
+            self.buffer.clear()
+        try:
+            return self._prontos(esperar_todos=True) + FIM_DEFLATE
+        finally:
+            self.executor.shutdown()
+
+
+class ZipParalelo:
+    """
+    Arquivo ZIP gravado por aqui mesmo (formato do APPNOTE da PKWARE), sem
+    mexer no zipfile por dentro: cada membro é o fluxo DEFLATE do
+    CompressorParalelo, e o cabeçalho de cada um é corrigido no fim (CRC e
+    tamanhos), como o zipfile faz em arquivos com seek. Sempre ZIP64 nos
+    cabeçalhos locais (o tamanho final não é conhecido ao começar).
+
+        with ZipParalelo("saida.zip") as zipf:
+            with zipf.membro("dados/a.csv") as escrever:
+                escrever(b"...")
+    """
+    def __init__(self, caminho, nivel=NIVEL_ZIP, threads=THREADS_ZIP):
+        self.nivel = nivel
+        self.threads = threads
+        self.arquivo = open(caminho, "wb")
+        self.membros = []  # (nome, data_hora, crc, comprimido, original, posição)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.close()
+
+    def nomes(self):
+        return [membro[0] for membro in self.membros]
+
+    @contextmanager
+    def membro(self, nome):
+        """
+        Abre um membro para escrita; escrever(bytes) comprime e grava
+        """
+        nome_bytes = nome.encode("utf-8")
+        data_hora = _data_hora_dos(datetime.now())
+        posicao = self.arquivo.tell()
+        self.arquivo.write(struct.pack(
+            "<IHHHHHIIIHH", ASSINATURA_LOCAL, VERSAO_ZIP64, _flags(nome), zipfile.ZIP_DEFLATED,
+            *data_hora, 0, LIMITE_ZIP32, LIMITE_ZIP32, len(nome_bytes), 20))
+        self.arquivo.write(nome_bytes)
+        self.arquivo.write(struct.pack("<HHQQ", EXTRA_ZIP64, 16, 0, 0))
+
+        compressor = CompressorParalelo(self.nivel, self.threads)
+        estado = {"crc": 0, "original": 0, "comprimido": 0}
+
+        def gravar(comprimido):
+            self.arquivo.write(comprimido)
+            estado["comprimido"] += len(comprimido)
+
+        def escrever(dados):
+            estado["crc"] = zlib.crc32(dados, estado["crc"])
+            estado["original"] += len(dados)
+            gravar(compressor.compress(dados))
+
+        try:
+            yield escrever
+        finally:
+            gravar(compressor.flush())
+
+        # Volta ao cabeçalho local e grava o CRC e os tamanhos de verdade
+        fim = self.arquivo.tell()
+        self.arquivo.seek(posicao + 14)
+        self.arquivo.write(struct.pack("<I", estado["crc"]))
+        self.arquivo.seek(posicao + 30 + len(nome_bytes) + 4)
+        self.arquivo.write(struct.pack("<QQ", estado["original"], estado["comprimido"]))
+        self.arquivo.seek(fim)
+        self.membros.append((nome, data_hora, estado["crc"], estado["comprimido"], estado["original"], posicao))
+
+    def adicionar_arquivo(self, caminho, nome=None):
+        """
+        Coloca um arquivo que já existe no ZIP, lendo em blocos (sem carregar inteiro)
+        """
+        with open(caminho, "rb") as origem, self.membro(nome or caminho) as escrever:
+            while bloco := origem.read(TAMANHO_BLOCO_ZIP):
+                escrever(bloco)
+
+    def close(self):
+        if self.arquivo.closed:
+            return
+        inicio_diretorio = self.arquivo.tell()
+        for nome, data_hora, crc, comprimido, original, posicao in self.membros:
+            # Campos que não cabem em 32 bits vão para o extra ZIP64 (nesta ordem)
+            grandes = [valor for valor in (original, comprimido, posicao) if valor >= LIMITE_ZIP32]
+            extra = struct.pack(f"<HH{len(grandes)}Q", EXTRA_ZIP64, 8 * len(grandes), *grandes) if grandes else b""
+            nome_bytes = nome.encode("utf-8")
+            self.arquivo.write(struct.pack(
+                "<IBBBBHHHHIIIHHHHHII", ASSINATURA_CENTRAL, VERSAO_ZIP64, SISTEMA_UNIX, VERSAO_ZIP64, 0,
+                _flags(nome), zipfile.ZIP_DEFLATED, *data_hora, crc,
+                min(comprimido, LIMITE_ZIP32), min(original, LIMITE_ZIP32), len(nome_bytes), len(extra),
+                0, 0, 0, 0o644 << 16, min(posicao, LIMITE_ZIP32)))
+            self.arquivo.write(nome_bytes)
+            self.arquivo.write(extra)
+        fim_diretorio = self.arquivo.tell()
+        tamanho_diretorio = fim_diretorio - inicio_diretorio
+        quantidade = len(self.membros)
+
+        if quantidade >= 0xFFFF or inicio_diretorio >= LIMITE_ZIP32 or tamanho_diretorio >= LIMITE_ZIP32:
+            self.arquivo.write(struct.pack(
+                "<IQHHIIQQQQ", ASSINATURA_FIM_ZIP64, 44, VERSAO_ZIP64, VERSAO_ZIP64, 0, 0,
+                quantidade, quantidade, tamanho_diretorio, inicio_diretorio))
+            self.arquivo.write(struct.pack("<IIQI", ASSINATURA_LOCALIZADOR_ZIP64, 0, fim_diretorio, 1))
+        self.arquivo.write(struct.pack(
+            "<IHHHHIIH", ASSINATURA_FIM, 0, 0, min(quantidade, 0xFFFF), min(quantidade, 0xFFFF),
+            min(tamanho_diretorio, LIMITE_ZIP32), min(inicio_diretorio, LIMITE_ZIP32), 0))
+        self.arquivo.close()
+
+
+def _data_hora_dos(momento):
+    # Formato de data/hora do MS-DOS usado nos cabeçalhos do ZIP
+    hora = momento.hour << 11 | momento.minute << 5 | momento.second // 2
+    data = (max(momento.year, 1980) - 1980) << 9 | momento.month << 5 | momento.day
+    return hora, data
+
+
+def _flags(nome):
+    # Bit 11: nome em UTF-8 (só quando não é ASCII, como o zipfile)
+    return 0 if nome.isascii() else 0x800
+
+
+@contextmanager
+def csv_no_zip(zipf, caminho_csv, nome_membro=None):
+    """
+    Abre o CSV e um membro num ZipParalelo já aberto; cada escrever(bytes) vai para os dois.
+    nome_membro: nome dentro do ZIP (padrão: o caminho do CSV)
+    """
+    with open(caminho_csv, "wb") as arquivo, zipf.membro(nome_membro or caminho_csv) as membro:
+        def escrever(dados):
+            arquivo.write(dados)
+            membro(dados)
+        yield escrever
+
+
+@contextmanager
+def csv_e_zip(caminho_csv, caminho_zip, nome_membro=None, nivel=NIVEL_ZIP, threads=THREADS_ZIP):
+    """
+    Mesmo que csv_no_zip, abrindo o ZIP (com o CSV como único membro)
+    """
+    with ZipParalelo(caminho_zip, nivel, threads) as zipf, \
+            csv_no_zip(zipf, caminho_csv, nome_membro) as escrever:
+        yield escrever
+
+
+def escrever_csv(escrever, df, cabecalho=True, linhas_por_pedaco=LINHAS_POR_PEDACO, **opcoes):
+    """
+    Converte o DataFrame em CSV aos pedaços e passa cada pedaço para escrever()
+    (mesmo texto de df.to_csv(index=False))
+    """
+    if len(df) == 0 and cabecalho:
+        escrever(df.to_csv(index=False, **opcoes).encode("utf-8"))
+    for inicio in range(0, len(df), linhas_por_pedaco):
+        pedaco = df.iloc[inicio:inicio + linhas_por_pedaco]
+        escrever(pedaco.to_csv(index=False, header=cabecalho and inicio == 0, **opcoes).encode("utf-8"))